@@ -0,0 +1,63 @@
+"""
+Throughput benchmark for the offline food parser (food_parser.parse_food_message).
+
+Run from the backend directory:
+    python -m benchmarks.food_parser --messages 100000
+"""
+import argparse
+import random
+import time
+
+from food_parser import FOOD_LEXICON, parse_food_message
+
+TEMPLATES = [
+    "{qty} {food} available at {place}",
+    "{food} aur {food2} {qty} ghar pe hai, jaldi le jao",
+    "Leftover {food} for {n} people from {place}, cooked at 2 PM",
+    "{qty} {food} near {place}, NGO only",
+    "{food2} {qty} free hai {place} madhe",
+    "Fresh {food} and {food2}, approx {qty}, pickup before 9pm",
+    "{n} {food} packets at {place} Rs {n}",
+    "I have some extra food, please contact me",
+]
+QUANTITIES = ["5kg", "2 kg", "500 g", "10 plates", "do kilo", "3 litres", "20 meals", "1.5 kgs", "4 packets"]
+PLACES = ["FC Road, Pune", "Shivaji Nagar", "Hotel Sagar", "Kothrud Mess", "office canteen", "Andheri West"]
+
+
+def synthetic_messages(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    aliases = [alias for _, _, names in FOOD_LEXICON for alias in names]
+    return [
+        rng.choice(TEMPLATES).format(
+            qty=rng.choice(QUANTITIES),
+            food=rng.choice(aliases),
+            food2=rng.choice(aliases),
+            place=rng.choice(PLACES),
+            n=rng.randint(2, 60),
+        )
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    messages = synthetic_messages(args.messages)
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        results = [parse_food_message(m, cooked_at="2026-01-10T14:00:00") for m in messages]
+        best = min(best, time.perf_counter() - start)
+
+    complete = sum(1 for r in results if r.complete)
+    print(
+        f"{len(messages)} messages in {best:.3f}s -> {len(messages) / best:,.0f} msg/s, "
+        f"{best / len(messages) * 1e6:.1f} us/msg; complete (no LLM needed): {complete / len(messages):.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+End-to-end load test: seed a synthetic dataset (seed_bulk.py), then drive a weighted
+mix of real API calls (feed polling, donate, claim + verify, profile, dashboards, chat)
+and report per-route throughput and p50/p95/p99 latency.
+
+Requests go through the ASGI app in-process by default, or to a running server with
+--base-url (which must use the same --db). The LLM is replaced by the in-process stub
+(LLM_PROVIDER=stub) unless --llm groq is given, and outgoing mail is suppressed.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --users 100000 --donations 1000000 --ngos 10000 --duration 60
+    python -m benchmarks.load_test --db sqlite:///./bench.db --skip-seed --concurrency 32
+
+Each run is saved to benchmarks/results/<UTC timestamp>_<git sha>.json and compared
+with the previous run on the same dataset size.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+BENCH_PASSWORD = "Bench@123"
+REGRESSION_THRESHOLD = 0.20
+
+AREAS = ["FC Road", "Shivaji Nagar", "Kothrud", "Andheri West", "Dadar", "Civil Lines", "MG Road", "Station Road"]
+QUANTITIES = ["2 kg", "5 kg", "500 g", "10 plates", "4 packets", "20 meals", "3 kg", "1.5 kg", "25 pieces"]
+
+# operation -> relative weight in the default mix
+DEFAULT_MIX = {
+    "feed": 40,
+    "donate": 10,
+    "claim_verify": 5,
+    "profile": 10,
+    "my_donations": 5,
+    "user_dashboard": 10,
+    "leaderboard": 5,
+    "chat": 5,
+    "ngo_dashboard": 5,
+    "admin_dashboard": 5,
+}
+
+
+def configure_environment(args):
+    """Must run before `main` is imported: it reads its configuration at import time."""
+    os.environ["DATABASE_URL"] = args.db
+    os.environ["MAIL_SUPPRESS_SEND"] = "True"
+    os.environ["LLM_PROVIDER"] = args.llm
+    os.environ["STUB_LLM_LATENCY"] = str(args.llm_latency)
+    for key, value in {
+        "MAIL_USERNAME": "bench",
+        "MAIL_PASSWORD": "bench",
+        "MAIL_FROM": "bench@example.com",
+        "MAIL_SERVER": "localhost",
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+# -------------------------------------------------
+# DATASET
+# -------------------------------------------------
+def seed_dataset(users: int, donations: int, ngos: int, seed: int):
+    """Fresh dataset from seed_bulk with a cheap shared hash so logins don't dominate."""
+    from seed_bulk import seed_bulk
+    seed_bulk(users=users, donations=donations, ngos=ngos, seed=seed, prefix="bench",
+              password=BENCH_PASSWORD, bcrypt_rounds=4, reset=True)
+
+
+def dataset_size(main) -> dict:
+    from sqlalchemy import func, select
+    with main.engine.connect() as conn:
+        return {
+            "users": conn.execute(select(func.count()).select_from(main.User)).scalar(),
+            "ngos": conn.execute(select(func.count()).select_from(main.NGO)).scalar(),
+            "donations": conn.execute(select(func.count()).select_from(main.Donation)).scalar(),
+        }
+
+
+# -------------------------------------------------
+# LOAD GENERATION
+# -------------------------------------------------
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.recording = False
+
+    async def call(self, client, method: str, url: str, route: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        if self.recording:
+            self.samples.setdefault(route, []).append(elapsed)
+            if response.status_code >= 400:
+                errors = self.errors.setdefault(route, {})
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+        return response
+
+
+class VirtualUser:
+    """One logged-in donor (plus, lazily, an NGO session) issuing requests from the mix."""
+    def __init__(self, make_client, recorder: Recorder, rng: random.Random, size: dict, main):
+        self.make_client = make_client
+        self.recorder = recorder
+        self.rng = rng
+        self.size = size
+        self.main = main
+        self.client = make_client()
+        self.ngo_client = None
+        self.admin_client = None
+        self.user_index = rng.randint(1, max(size["users"] - 1, 1))
+        self.feed_ids = []
+
+    async def login(self):
+        await self.client.post("/login", data={"username": f"bench_user_{self.user_index}", "password": BENCH_PASSWORD})
+
+    async def feed(self):
+        response = await self.recorder.call(self.client, "GET", "/donations", "GET /donations")
+        if response.status_code == 200:
+            ids = [d["id"] for d in response.json() if not d["is_ngo_only"]]
+            self.feed_ids = self.rng.sample(ids, min(len(ids), 20))
+
+    async def donate(self):
+        text = f"{self.rng.choice(QUANTITIES)} {self.rng.choice(['dal', 'rice', 'roti', 'biryani', 'poha'])} at {self.rng.choice(AREAS)}"
+        cooked_at = datetime.utcnow().replace(microsecond=0).isoformat()
+        return await self.recorder.call(self.client, "POST", "/donations", "POST /donations",
+                                        data={"text": text, "cooked_at": cooked_at})
+
+    async def claim_verify(self):
+        # Donate, have another account claim it, then verify with the OTP read from the DB
+        # (it is only ever emailed).
+        response = await self.donate()
+        if response.status_code != 201:
+            return
+        donation_id = response.json()["donation_id"]
+        claimer = self.make_client()
+        claimer_index = self.user_index % (self.size["users"] - 1) + 1
+        await claimer.post("/login", data={"username": f"bench_user_{claimer_index}", "password": BENCH_PASSWORD})
+        response = await self.recorder.call(claimer, "POST", f"/donations/{donation_id}/claim", "POST /donations/{id}/claim")
+        await claimer.aclose()
+        if response.status_code != 200:
+            return
+        otp = await asyncio.to_thread(self.read_otp, donation_id)
+        await self.recorder.call(self.client, "POST", f"/donations/{donation_id}/verify", "POST /donations/{id}/verify",
+                                 data={"otp": otp or ""})
+
+    def read_otp(self, donation_id: int):
+        from sqlalchemy import select
+        with self.main.engine.connect() as conn:
+            return conn.execute(select(self.main.Donation.claim_secret).where(self.main.Donation.id == donation_id)).scalar()
+
+    async def profile(self):
+        await self.recorder.call(self.client, "GET", "/profile", "GET /profile")
+
+    async def my_donations(self):
+        await self.recorder.call(self.client, "GET", "/my-donations", "GET /my-donations")
+
+    async def user_dashboard(self):
+        await self.recorder.call(self.client, "GET", "/dashboard/user", "GET /dashboard/user")
+
+    async def leaderboard(self):
+        await self.recorder.call(self.client, "GET", "/leaderboard", "GET /leaderboard",
+                                 params={"metric": self.rng.choice(["donations", "kg"]), "period": self.rng.choice(["week", "month", "all"])})
+
+    async def chat(self):
+        await self.recorder.call(self.client, "POST", "/chat", "POST /chat",
+                                 json={"message": self.rng.choice(["How do I donate?", "Is 6 hour old dal safe?", "What badges can I earn?"])})
+
+    async def ngo_dashboard(self):
+        if not self.size["ngos"]:
+            return
+        if self.ngo_client is None:
+            self.ngo_client = self.make_client()
+            await self.ngo_client.post("/ngo/login", data={"email": f"bench_ngo_{self.rng.randrange(self.size['ngos'])}@example.com",
+                                                           "password": BENCH_PASSWORD})
+        await self.recorder.call(self.ngo_client, "GET", "/dashboard/ngo", "GET /dashboard/ngo")
+
+    async def admin_dashboard(self):
+        if self.admin_client is None:
+            self.admin_client = self.make_client()
+            await self.admin_client.post("/login", data={"username": "bench_admin", "password": BENCH_PASSWORD})
+        await self.recorder.call(self.admin_client, "GET", "/dashboard/admin", "GET /dashboard/admin")
+
+    async def run(self, mix: dict, stop_at: float):
+        operations = [getattr(self, name) for name in mix]
+        weights = list(mix.values())
+        while time.perf_counter() < stop_at:
+            await self.rng.choices(operations, weights)[0]()
+
+    async def close(self):
+        await self.client.aclose()
+        for client in (self.ngo_client, self.admin_client):
+            if client is not None:
+                await client.aclose()
+
+
+async def drive(main, args, size: dict, mix: dict) -> Recorder:
+    import httpx
+
+    if args.base_url:
+        def make_client():
+            return httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        transport = httpx.ASGITransport(app=main.app)
+
+        def make_client():
+            return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    users = [VirtualUser(make_client, recorder, random.Random(rng.random()), size, main) for _ in range(args.concurrency)]
+    await asyncio.gather(*(user.login() for user in users))
+
+    warmup_until = time.perf_counter() + args.warmup
+    await asyncio.gather(*(user.run(mix, warmup_until) for user in users))
+    recorder.recording = True
+    recorder.started = time.perf_counter()
+    await asyncio.gather(*(user.run(mix, recorder.started + args.duration) for user in users))
+    recorder.elapsed = time.perf_counter() - recorder.started
+    await asyncio.gather(*(user.close() for user in users))
+    return recorder
+
+
+# -------------------------------------------------
+# REPORTING
+# -------------------------------------------------
+def percentile(sorted_values, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder) -> dict:
+    routes = {}
+    for route, samples in sorted(recorder.samples.items()):
+        samples.sort()
+        routes[route] = {
+            "requests": len(samples),
+            "errors": recorder.errors.get(route, {}),
+            "rps": round(len(samples) / recorder.elapsed, 2),
+            "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+            "max_ms": round(samples[-1] * 1000, 2),
+        }
+    return routes
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_result(dataset: dict):
+    for path in sorted(RESULTS_DIR.glob("*.json"), reverse=True):
+        result = json.loads(path.read_text())
+        if result.get("dataset") == dataset:
+            return path, result
+    return None, None
+
+
+def print_report(result: dict, previous: dict):
+    print(f"\n{'route':32} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  vs prev p95")
+    for route, stats in result["routes"].items():
+        errors = sum(stats["errors"].values())
+        delta = ""
+        before = (previous or {}).get("routes", {}).get(route)
+        if before and before["p95_ms"]:
+            change = stats["p95_ms"] / before["p95_ms"] - 1
+            delta = f"{change:+.0%}" + ("  REGRESSION" if change > REGRESSION_THRESHOLD else "")
+        print(f"{route:32} {stats['requests']:>7} {errors:>5} {stats['rps']:>8.1f} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}  {delta}")
+    print(f"\nTotal: {result['total_requests']:,} requests in {result['duration_s']}s -> {result['total_rps']:.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="sqlite:///./bench.db")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--donations", type=int, default=1000000)
+    parser.add_argument("--ngos", type=int, default=10000)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the dataset already in --db")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before the run")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--mix", type=json.loads, default=None, help='JSON weights, e.g. \'{"feed": 1, "donate": 1}\'')
+    parser.add_argument("--llm", choices=["stub", "groq"], default="stub")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="stub LLM seconds per call")
+    parser.add_argument("--base-url", help="target a running server instead of the in-process app")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    mix = args.mix or DEFAULT_MIX
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        parser.error(f"unknown operations in --mix: {', '.join(sorted(unknown))}")
+
+    configure_environment(args)
+    import logging
+    for name in ("meal-mitra", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    import main as app_main
+
+    if not args.skip_seed:
+        seed_dataset(args.users, args.donations, args.ngos, args.seed)
+    size = dataset_size(app_main)
+    if size["users"] < 2:
+        sys.exit("Dataset is empty; run without --skip-seed first.")
+
+    recorder = asyncio.run(drive(app_main, args, size, mix))
+    routes = summarize(recorder)
+    total = sum(stats["requests"] for stats in routes.values())
+    result = {
+        "revision": git_revision(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "dataset": size,
+        "database": app_main.engine.dialect.name,
+        "target": args.base_url or "in-process",
+        "concurrency": args.concurrency,
+        "llm": args.llm,
+        "llm_latency_s": args.llm_latency,
+        "mix": mix,
+        "duration_s": round(recorder.elapsed, 1),
+        "total_requests": total,
+        "total_rps": round(total / recorder.elapsed, 2),
+        "routes": routes,
+    }
+
+    previous_path, previous = previous_result(size)
+    print_report(result, previous)
+    if previous_path:
+        print(f"Compared with {previous_path.name}")
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}_{result['revision']}.json"
+        path.write_text(json.dumps(result, indent=2))
+        print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Query latency of the in-memory NGO index (ngo_matching.GridIndex) against NGO count, as
+served by GET /ngos/nearby, compared with measuring every NGO.
+
+Run from the backend directory:
+    python -m benchmarks.ngo_index --counts 1000 10000 100000 --radius 10
+"""
+import argparse
+import random
+import statistics
+import time
+
+from ngo_matching import GridIndex, NGOEntry, haversine_km
+
+# A few city centres with NGOs spread ~15 km around each, like seed_bulk.py generates.
+CITY_CENTERS = {
+    "Pune": (18.5204, 73.8567), "Mumbai": (19.0760, 72.8777), "Nagpur": (21.1458, 79.0882),
+    "Nashik": (19.9975, 73.7898), "Aurangabad": (19.8762, 75.3433),
+}
+CITY_SPREAD_DEG = 0.13
+
+
+def synthetic_ngos(count: int, rng: random.Random):
+    centers = list(CITY_CENTERS.values())
+    for ngo_id in range(count):
+        lat, lng = rng.choice(centers)
+        yield NGOEntry(
+            ngo_id, f"NGO {ngo_id}",
+            lat + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG),
+            lng + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG),
+            100.0, ()
+        )
+
+
+def query_points(count: int, rng: random.Random):
+    """Mostly inside cities, like real users, with a share of points far from any NGO."""
+    centers = list(CITY_CENTERS.values())
+    points = []
+    for _ in range(count):
+        if rng.random() < 0.9:
+            lat, lng = rng.choice(centers)
+            points.append((lat + rng.uniform(-0.1, 0.1), lng + rng.uniform(-0.1, 0.1)))
+        else:
+            points.append((rng.uniform(15.0, 22.0), rng.uniform(72.5, 80.5)))
+    return points
+
+
+def brute_force(entries, lat, lng, radius_km, limit):
+    matches = [(haversine_km(lat, lng, e.lat, e.lng), e) for e in entries]
+    matches = [m for m in matches if m[0] <= radius_km]
+    matches.sort(key=lambda m: m[0])
+    return matches[:limit]
+
+
+def timed(fn, points):
+    samples = []
+    for lat, lng in points:
+        started = time.perf_counter()
+        fn(lat, lng)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--radius", type=float, default=10.0, help="query radius in km")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--cell-km", type=float, default=2.0)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--brute-force-queries", type=int, default=50, help="0 to skip the full-scan baseline")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"radius {args.radius} km, limit {args.limit}, {args.cell_km} km cells; latencies in ms (p50 / p95)")
+    print(f"{'NGOs':>8} {'build':>8} {'nearest':>15} {'within':>15} {'full scan':>15}")
+    for count in args.counts:
+        rng = random.Random(args.seed)
+        entries = list(synthetic_ngos(count, rng))
+        index = GridIndex(cell_km=args.cell_km)
+        started = time.perf_counter()
+        index.replace_all(entries)
+        build_ms = (time.perf_counter() - started) * 1000
+        points = query_points(args.queries, rng)
+
+        for lat, lng in points[:20]:
+            expected = [e.id for _, e in brute_force(entries, lat, lng, args.radius, args.limit)]
+            assert [e.id for _, e in index.nearest(lat, lng, args.limit, args.radius)] == expected
+
+        nearest = timed(lambda lat, lng: index.nearest(lat, lng, args.limit, args.radius), points)
+        within = timed(lambda lat, lng: index.within(lat, lng, args.radius, limit=args.limit), points)
+        if args.brute_force_queries:
+            scan = timed(lambda lat, lng: brute_force(entries, lat, lng, args.radius, args.limit), points[:args.brute_force_queries])
+            scan_text = f"{scan[0]:7.2f} /{scan[1]:6.2f}"
+        else:
+            scan_text = "-"
+        print(
+            f"{count:>8,} {build_ms:>7.0f}ms {nearest[0]:7.3f} /{nearest[1]:6.3f} "
+            f"{within[0]:7.3f} /{within[1]:6.3f} {scan_text:>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
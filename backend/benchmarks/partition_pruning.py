@@ -0,0 +1,133 @@
+"""
+Checks which donation partitions the app's own queries touch once donations is partitioned.
+
+Seeds a small dataset into a Postgres database (its tables are dropped and recreated), converts
+it with the same steps as migrate_partitions.py, drives
+the donation-heavy endpoints in-process, captures every statement they send that reads or
+writes `donations` itself, and runs EXPLAIN on each with the same parameters. For every statement it
+reports the partitions in the plan; statements that filter on status or created_at should
+list only donations_active or the relevant months.
+
+Run from the backend directory against a throwaway database:
+    python -m benchmarks.partition_pruning --db postgresql://localhost/mealmitra_bench
+"""
+import argparse
+import os
+import re
+import sys
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+BENCH_PASSWORD = "Bench@123"
+MUTATING = re.compile(r"^\s*(INSERT|CREATE|ALTER|DROP|LOCK|SET)\b", re.IGNORECASE)
+# The parent table itself, not donations_archive or the partitions the maintenance job probes.
+DONATIONS = re.compile(r"\bdonations\b")
+
+
+def configure_environment(db: str):
+    """Must run before `main` is imported: it reads its configuration at import time."""
+    os.environ["DATABASE_URL"] = db
+    os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+    os.environ["MAIL_SUPPRESS_SEND"] = "True"
+    os.environ["LLM_PROVIDER"] = "stub"
+    for key, value in {
+        "MAIL_USERNAME": "bench",
+        "MAIL_PASSWORD": "bench",
+        "MAIL_FROM": "bench@example.com",
+        "MAIL_SERVER": "localhost",
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+def plan_relations(node) -> set:
+    """Relation names scanned anywhere in an EXPLAIN (FORMAT JSON) plan node."""
+    relations = set()
+    if "Relation Name" in node:
+        relations.add(node["Relation Name"])
+    for child in node.get("Plans", []):
+        relations |= plan_relations(child)
+    return relations
+
+
+def drive(client, admin):
+    """The donation reads and writes the app does most; each call's SQL is captured."""
+    client.get("/donations")
+    client.get("/donations", params={"sort": "urgency"})
+    client.get("/donations", params={"sort": "priority", "lat": 18.52, "lng": 73.85, "radius_km": 10})
+    client.get("/donations/search", params={"q": "rice"})
+    client.get("/my-donations")
+    client.get("/profile")
+    client.get("/dashboard/user")
+    response = client.get("/donations")
+    if response.status_code == 200 and response.json():
+        client.post(f"/donations/{response.json()[0]['id']}/claim")
+    admin.get("/dashboard/admin")
+    admin.get("/admin/donations")
+    admin.post("/admin/archive")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="Postgres URL of a database that may be wiped")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--donations", type=int, default=20000)
+    parser.add_argument("--months-back", type=int, default=4)
+    args = parser.parse_args()
+
+    configure_environment(args.db)
+    import main as app_main
+    if app_main.engine.dialect.name != "postgresql":
+        sys.exit("Partitioning is Postgres-only; pass a postgresql:// URL with --db")
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from seed_bulk import seed_bulk
+    from donation_partitions import add_months, month_start, partition_donations
+
+    seed_bulk(users=args.users, donations=args.donations, ngos=10, prefix="bench",
+              password=BENCH_PASSWORD, bcrypt_rounds=4, reset=True)
+    this_month = month_start(datetime.now(timezone.utc).date())
+    partition_donations(app_main.engine, add_months(this_month, -args.months_back),
+                        add_months(this_month, app_main.PARTITION_MONTHS_AHEAD))
+    app_main.upgrade_schema(app_main.engine)
+    app_main.setup_search_index(app_main.engine)
+
+    captured = OrderedDict()
+
+    @event.listens_for(app_main.engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if DONATIONS.search(statement) and not executemany and not MUTATING.match(statement):
+            captured.setdefault(statement, parameters)
+
+    admin = TestClient(app_main.app)
+    with TestClient(app_main.app) as client:
+        client.post("/login", data={"username": "bench_user_1", "password": BENCH_PASSWORD})
+        admin.post("/login", data={"username": "bench_admin", "password": BENCH_PASSWORD})
+        drive(client, admin)
+    event.remove(app_main.engine, "before_cursor_execute", capture)
+
+    raw = app_main.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("SELECT c.relname FROM pg_class c WHERE c.relname LIKE 'donations\\_%%' AND c.relkind = 'r' "
+                       "AND c.relname <> 'donations_archive'")
+        partitions = {row[0] for row in cursor.fetchall()}
+        print(f"{len(partitions)} partitions: {', '.join(sorted(partitions))}\n")
+        unpruned = 0
+        for statement, parameters in captured.items():
+            # EXPLAIN without ANALYZE never runs the statement, so UPDATE/DELETE are safe here.
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0][0]["Plan"]
+            scanned = plan_relations(plan) & partitions
+            if len(scanned) == len(partitions):
+                unpruned += 1
+            summary = " ".join(statement.split())
+            print(f"{len(scanned):>3}/{len(partitions)}  {summary[:140]}")
+            print(f"          {', '.join(sorted(scanned)) or '-'}")
+        raw.rollback()
+    finally:
+        raw.close()
+    print(f"\n{len(captured)} statements, {unpruned} scan every partition (lookups by id or user alone can't prune)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Planning time and route quality of pickup_routes.plan_route for random city-sized instances.
+
+Run from the backend directory:
+    python -m benchmarks.pickup_routes --stops 50 100 200 --runs 20
+"""
+import argparse
+import random
+import statistics
+import time
+
+from pickup_routes import Stop, distance_matrix, plan_route
+
+START = (18.5204, 73.8567)  # Pune
+
+
+def random_stops(count: int, rng: random.Random, deadline_share: float):
+    return [
+        Stop(
+            i,
+            START[0] + rng.uniform(-0.12, 0.12),
+            START[1] + rng.uniform(-0.12, 0.12),
+            rng.uniform(2, 30) if rng.random() < deadline_share else None
+        )
+        for i in range(count)
+    ]
+
+
+def input_order_km(stops) -> float:
+    """Length of visiting the stops in the order given, as a naive baseline."""
+    dist = distance_matrix([START] + [(s.lat, s.lng) for s in stops])
+    return sum(dist[i][i + 1] for i in range(len(stops)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stops", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--deadline-share", type=float, default=0.3, help="fraction of stops with a safe_until")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'stops':>6} {'p50 ms':>8} {'max ms':>8} {'km':>8} {'unordered km':>13} {'late':>6}")
+    for count in args.stops:
+        rng = random.Random(args.seed)
+        timings, lengths, baselines, late = [], [], [], []
+        for _ in range(args.runs):
+            stops = random_stops(count, rng, args.deadline_share)
+            started = time.perf_counter()
+            route = plan_route(START[0], START[1], stops)
+            timings.append((time.perf_counter() - started) * 1000)
+            lengths.append(route.total_km)
+            baselines.append(input_order_km(stops))
+            late.append(sum(route.late))
+        print(
+            f"{count:>6} {statistics.median(timings):>8.1f} {max(timings):>8.1f} {statistics.mean(lengths):>8.1f} "
+            f"{statistics.mean(baselines):>13.1f} {statistics.mean(late):>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
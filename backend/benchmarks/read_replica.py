@@ -0,0 +1,128 @@
+"""
+Checks read-replica routing and read-your-writes stickiness with two SQLite files.
+
+The primary and the "replica" are separate database files in a temporary directory;
+replication only happens when this script copies the primary over the replica, so every
+read that sees a write before that copy must have gone to the primary. One client writes,
+another only reads. It checks that the writer's reads stay on the primary for
+READ_YOUR_WRITES_SECONDS after its write and then go back to the (stale) replica, that the
+reader reads the replica throughout, that the feed hides donations the replica still has as
+Available past safe_until, and that every replica-routed route answers. Exits non-zero if
+any check fails.
+
+Run from the backend directory:
+    python -m benchmarks.read_replica --window 2
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+BENCH_PASSWORD = "Bench@123"
+REPLICA_ROUTES = [
+    "/donations", "/profile", "/profile/badges", "/dashboard/user", "/dashboard/user/timeseries",
+    "/dashboard/admin", "/dashboard/admin/timeseries", "/admin/users", "/admin/donations",
+    "/admin/ngos", "/admin/organizations",
+]
+
+
+def configure_environment(directory: str, window: float):
+    """Must run before `main` is imported: it reads its configuration at import time."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory}/primary.db"
+    os.environ["REPLICA_DATABASE_URL"] = f"sqlite:///{directory}/replica.db"
+    os.environ["READ_YOUR_WRITES_SECONDS"] = str(window)
+    os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+    os.environ["MAIL_SUPPRESS_SEND"] = "True"
+    os.environ["LLM_PROVIDER"] = "stub"
+    for key, value in {
+        "MAIL_USERNAME": "bench",
+        "MAIL_PASSWORD": "bench",
+        "MAIL_FROM": "bench@example.com",
+        "MAIL_SERVER": "localhost",
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--window", type=float, default=2, help="READ_YOUR_WRITES_SECONDS for the run")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="read_replica_")
+    configure_environment(directory, args.window)
+    import main as app_main
+    from fastapi.testclient import TestClient
+
+    def replicate():
+        """Copy the primary over the replica: the only way writes reach it here."""
+        source = sqlite3.connect(f"{directory}/primary.db")
+        target = sqlite3.connect(f"{directory}/replica.db")
+        source.backup(target)
+        source.close()
+        target.close()
+        app_main.replica_engine.dispose()
+
+    failures = []
+
+    def check(name: str, ok: bool, detail=""):
+        print(f"{'ok  ' if ok else 'FAIL'}  {name}{f'  ({detail})' if detail else ''}")
+        if not ok:
+            failures.append(name)
+
+    writer, reader = TestClient(app_main.app), TestClient(app_main.app)
+    for client, name in ((writer, "bench_writer"), (reader, "bench_reader")):
+        client.post("/register", data={"username": name, "email": f"{name}@example.com", "password": BENCH_PASSWORD})
+    with app_main.SessionLocal() as db:
+        db.query(app_main.User).filter(app_main.User.username == "bench_reader").update({app_main.User.is_admin: True})
+        db.commit()
+    replicate()
+    for client, name in ((writer, "bench_writer"), (reader, "bench_reader")):
+        client.post("/login", data={"username": name, "password": BENCH_PASSWORD})
+    # Registering and logging in are writes too; start with both clients off the primary.
+    time.sleep(args.window + 0.1)
+
+    response = writer.post("/donations", data={"text": "5 kg rice at Pune station"})
+    check("writer donates", response.is_success, response.status_code)
+
+    feed = writer.get("/donations").json()
+    profile = writer.get("/profile").json()
+    check("writer sees its donation right away (primary)", len(feed) == 1, f"{len(feed)} in feed")
+    check("writer's profile counts it right away (primary)", profile.get("total_donations") == 1, profile.get("total_donations"))
+    feed = reader.get("/donations").json()
+    admin_list = reader.get("/admin/donations").json()
+    check("reader still reads the replica", feed == [], f"{len(feed)} in feed")
+    check("reader's admin list still reads the replica", len(admin_list) == 0, f"{len(admin_list)} listed")
+
+    time.sleep(args.window + 0.1)
+    feed = writer.get("/donations").json()
+    check(f"writer is back on the replica after {args.window}s", feed == [], f"{len(feed)} in feed")
+
+    replicate()
+    writer_feed, reader_feed = writer.get("/donations").json(), reader.get("/donations").json()
+    check("both see the donation once replicated", len(writer_feed) == len(reader_feed) == 1,
+          f"{len(writer_feed)} / {len(reader_feed)}")
+
+    # Past safe_until on the primary; the replica still has it as Available.
+    with app_main.SessionLocal() as db:
+        db.query(app_main.Donation).update({
+            app_main.Donation.safe_until: app_main.datetime.now(app_main.timezone.utc) - app_main.timedelta(hours=1)
+        })
+        db.commit()
+    replicate()
+    with sqlite3.connect(f"{directory}/replica.db") as replica:
+        replica.execute("UPDATE donations SET status = 'Available'")
+    feed = reader.get("/donations").json()
+    check("feed hides stale donations the replica still lists", feed == [], f"{len(feed)} in feed")
+
+    for route in REPLICA_ROUTES:
+        status = reader.get(route).status_code
+        check(f"GET {route} on the replica", status == 200, status)
+
+    print(f"\n{len(failures)} of the checks failed" if failures else "\nall checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
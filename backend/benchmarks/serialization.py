@@ -0,0 +1,97 @@
+"""
+Microbenchmark: ORM + response_model validation vs. the column-tuple/orjson fast path
+used by the Donation list endpoints.
+
+Run from the backend directory:
+    python -m benchmarks.serialization --rows 10000 100000
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+
+# main.py builds its mail config at import time; placeholders are enough offline.
+for key, value in {
+    "MAIL_USERNAME": "bench",
+    "MAIL_PASSWORD": "bench",
+    "MAIL_FROM": "bench@example.com",
+    "MAIL_SERVER": "localhost",
+}.items():
+    os.environ.setdefault(key, value)
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from typing import List
+
+from main import Base, Donation, DonationResponse, donation_list_response
+
+FOODS = ["Rice and Daal", "Veg Biryani", "Chapati", "Paneer Sabzi", "Bread"]
+LOCATIONS = ["Pune Residency", "FC Road Canteen", "Shivaji Nagar", "Kothrud Mess"]
+
+
+def build_session(rows: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    batch = [
+        {
+            "user_id": i % 500 + 1,
+            "raw_text": f"{i % 20 + 1}kg {FOODS[i % len(FOODS)]} available near {LOCATIONS[i % len(LOCATIONS)]}",
+            "food": FOODS[i % len(FOODS)],
+            "quantity": f"{i % 20 + 1}kg",
+            "location": LOCATIONS[i % len(LOCATIONS)],
+            "safe_until": datetime(2026, 1, 10, 20, 0),
+            "cooked_at": datetime(2026, 1, 10, 14, 0),
+            "lat": 18.5204,
+            "lng": 73.8567,
+            "price": 0,
+            "status": "Available",
+            "is_ngo_only": i % 7 == 0,
+        }
+        for i in range(rows)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Donation), batch)
+    return sessionmaker(bind=engine)()
+
+
+def time_call(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[DonationResponse])
+
+    for rows in args.rows:
+        db = build_session(rows)
+        query = db.query(Donation).filter(Donation.status == "Available")
+
+        def orm_path():
+            # What FastAPI does for response_model=List[DonationResponse] with ORM objects.
+            db.expunge_all()
+            return adapter.dump_json(adapter.validate_python(query.all(), from_attributes=True))
+
+        def fast_path():
+            return donation_list_response(query).body
+
+        orm_s = time_call(orm_path, args.repeat)
+        fast_s = time_call(fast_path, args.repeat)
+        print(
+            f"{rows:>8} rows | orm+validate {orm_s * 1000:8.1f} ms | "
+            f"tuples+orjson {fast_s * 1000:8.1f} ms | speedup {orm_s / fast_s:5.2f}x"
+        )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
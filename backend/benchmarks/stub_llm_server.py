@@ -0,0 +1,97 @@
+"""
+Stand-in for the Groq chat completions API, for exercising timeouts, fallbacks and the
+circuit breaker without touching the real service.
+
+Run from the backend directory, then point the app at it:
+    python -m benchmarks.stub_llm_server --port 8099 --latency 6 --failure-rate 0.3
+    GROQ_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=stub uvicorn main:app
+
+Answers come from llm_providers.stub_completion_text, as with LLM_PROVIDER=stub, but over
+real HTTP so client timeouts and retries are exercised too. Chat replies are streamed word
+by word when `stream` is set.
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_providers import stub_completion_text
+
+
+def make_handler(latency: float, jitter: float, failure_rate: float, rng: random.Random):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not self.path.endswith("/chat/completions"):
+                self.send_json(404, {"error": {"message": "not found"}})
+                return
+
+            time.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+            if rng.random() < failure_rate:
+                self.send_json(503, {"error": {"message": "stub failure", "type": "service_unavailable"}})
+                return
+
+            json_mode = (request.get("response_format") or {}).get("type") == "json_object"
+            text = stub_completion_text(request.get("messages", []), json_mode)
+            base = {"id": "stub", "created": int(time.time()), "model": request.get("model", "stub")}
+
+            if not request.get("stream"):
+                self.send_json(200, {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for word in text.split(" "):
+                chunk = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "finish_reason": None, "delta": {"content": word + " "}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    handler = make_handler(args.latency, args.jitter, args.failure_rate, random.Random(args.seed))
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Stub LLM listening on http://{args.host}:{args.port} "
+          f"(latency {args.latency}s, failure rate {args.failure_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Optional Postgres layout for the donations table, applied by migrate_partitions.py:
+
+    donations                   PARTITION BY LIST (status)
+      donations_active          Available, Claimed: the small hot set the feed reads
+      donations_history         every other status, PARTITION BY RANGE (created_at)
+        donations_2026_07 ...   one per creation month (UTC)
+        donations_history_default   created_at outside the monthly ranges
+
+A feed query on status = 'Available' only touches donations_active, and the archive job's
+created_at < cutoff only touches the old months. Status changes move rows between partitions
+(Postgres 11+). A partitioned table's unique constraints must contain its partition keys, so
+the primary key is (id, status, created_at), which makes created_at NOT NULL. That key rules out
+duplicate rows; ids stay unique because they all come from the one sequence. Lookups by id
+alone probe each partition's primary key index.
+
+Partitions are created here, ahead of time, and dropped once the archive job has emptied
+them; nothing in this module deletes rows.
+"""
+import logging
+import re
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger("meal-mitra")
+
+PARENT = "donations"
+ACTIVE_PARTITION = "donations_active"
+HISTORY_PARTITION = "donations_history"
+HISTORY_DEFAULT_PARTITION = "donations_history_default"
+ACTIVE_STATUSES = ("Available", "Claimed")
+PRIMARY_KEY = ("id", "status", "created_at")
+
+_MONTH_NAME_RE = re.compile(rf"^{PARENT}_(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_partition_name(month: date) -> str:
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def is_partitioned(conn) -> bool:
+    return conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid))"
+    ), {"name": PARENT}).scalar()
+
+
+def month_partitions(conn) -> Dict[date, str]:
+    """Existing monthly partitions of donations_history, by first day of the month."""
+    names = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class child ON child.oid = i.inhrelid JOIN pg_class parent ON parent.oid = i.inhparent "
+        "WHERE parent.relname = :parent AND pg_table_is_visible(parent.oid)"
+    ), {"parent": HISTORY_PARTITION}).scalars()
+    partitions = {}
+    for name in names:
+        match = _MONTH_NAME_RE.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def _create_month_partition(conn, month: date) -> str:
+    # created_at is timestamptz: explicit UTC bounds, whatever the session's TimeZone.
+    name = month_partition_name(month)
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {HISTORY_PARTITION} "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    ))
+    return name
+
+
+def partition_donations(bind, first_month: date, last_month: date) -> int:
+    """
+    Turn the unpartitioned donations table into the layout above, with monthly partitions from
+    first_month to last_month, and return the number of rows copied. Columns keep their types,
+    NOT NULLs and defaults (the id sequence included). Everything happens in one transaction
+    with the table locked throughout, so on a large table this is a maintenance-window step.
+    Rows without created_at get cooked_at, safe_until or the current time instead; rows
+    without a status make it fail before anything changes.
+    """
+    with bind.begin() as conn:
+        if is_partitioned(conn):
+            raise ValueError(f"{PARENT} is already partitioned")
+        conn.execute(text(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE"))
+        missing_status = conn.execute(text(f"SELECT count(*) FROM {PARENT} WHERE status IS NULL")).scalar()
+        if missing_status:
+            raise ValueError(f"{missing_status} donations have no status; set one before partitioning")
+        copied = list(conn.execute(text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_name = :name AND table_schema = current_schema() AND is_generated = 'NEVER' "
+            "ORDER BY ordinal_position"
+        ), {"name": PARENT}).scalars())
+        sequence = conn.execute(text(f"SELECT pg_get_serial_sequence('{PARENT}', 'id')")).scalar()
+
+        conn.execute(text(f"ALTER TABLE {PARENT} RENAME TO {PARENT}_unpartitioned"))
+        # The old primary key's name would clash with the new one's.
+        conn.execute(text(f"ALTER TABLE {PARENT}_unpartitioned DROP CONSTRAINT IF EXISTS {PARENT}_pkey"))
+        if sequence:
+            # Keep the id sequence alive past the old table, so ids carry on where they were.
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+        conn.execute(text(
+            f"CREATE TABLE {PARENT} (LIKE {PARENT}_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED, "
+            f"CONSTRAINT {PARENT}_pkey PRIMARY KEY ({', '.join(PRIMARY_KEY)})) PARTITION BY LIST (status)"
+        ))
+        statuses = ", ".join(f"'{status}'" for status in ACTIVE_STATUSES)
+        conn.execute(text(f"CREATE TABLE {ACTIVE_PARTITION} PARTITION OF {PARENT} FOR VALUES IN ({statuses})"))
+        conn.execute(text(f"CREATE TABLE {HISTORY_PARTITION} PARTITION OF {PARENT} DEFAULT PARTITION BY RANGE (created_at)"))
+        conn.execute(text(f"CREATE TABLE {HISTORY_DEFAULT_PARTITION} PARTITION OF {HISTORY_PARTITION} DEFAULT"))
+        month = month_start(first_month)
+        while month <= last_month:
+            _create_month_partition(conn, month)
+            month = add_months(month, 1)
+
+        targets = ", ".join(copied)
+        sources = ", ".join(
+            "COALESCE(created_at, cooked_at, safe_until, now())" if name == "created_at" else name for name in copied
+        )
+        rows = conn.execute(text(
+            f"INSERT INTO {PARENT} ({targets}) SELECT {sources} FROM {PARENT}_unpartitioned"
+        )).rowcount
+        conn.execute(text(f"DROP TABLE {PARENT}_unpartitioned"))
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {PARENT}.id"))
+    logger.info("Partitioned %s: %s rows copied, monthly partitions from %s", PARENT, rows, first_month)
+    return rows
+
+
+def ensure_month_partitions(bind, first_month: date, last_month: date) -> List[str]:
+    """
+    Create the missing monthly partitions in [first_month, last_month]. A month whose rows
+    already sit in the default partition can't be split off online; it is logged and skipped.
+    """
+    with bind.connect() as conn:
+        existing = month_partitions(conn)
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            try:
+                with bind.begin() as conn:
+                    created.append(_create_month_partition(conn, month))
+            except Exception as e:
+                logger.warning("Could not create partition for %s: %s", month, e)
+        month = add_months(month, 1)
+    if created:
+        logger.info("Created donation partitions %s", ", ".join(created))
+    return created
+
+
+def drop_empty_partitions(bind, before: date, lock_timeout: Optional[str] = "5s") -> List[str]:
+    """
+    Drop monthly partitions that end on or before `before` and hold no rows (the archive job
+    moves their donations out first). Partitions that still have rows are kept.
+    """
+    with bind.connect() as conn:
+        expired = [(month, name) for month, name in sorted(month_partitions(conn).items()) if add_months(month, 1) <= before]
+    dropped = []
+    for month, name in expired:
+        try:
+            with bind.begin() as conn:
+                if lock_timeout:
+                    conn.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}'"))
+                conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+                if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+                    logger.warning("Keeping partition %s: it still has donations the archive job did not move", name)
+                    continue
+                conn.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+        except Exception as e:
+            logger.warning("Could not drop partition %s: %s", name, e)
+    if dropped:
+        logger.info("Dropped empty donation partitions %s", ", ".join(dropped))
+    return dropped
@@ -0,0 +1,130 @@
+"""
+Full-text search over donations' food, raw_text and location.
+
+SQLite keeps an external-content FTS5 table (donations_fts) in step with `donations` through
+triggers; Postgres gets a generated tsvector column with a GIN index. Either way the index is
+maintained by the database itself, so every write path (API routes, the bulk seeder, batch
+UPDATEs) stays in sync without application code having to remember it.
+
+Queries are parsed here rather than passed through: each word becomes a prefix term, and a
+word naming a food in the food_parser lexicon also matches that food's other spellings, so
+"chawal" finds donations parsed as "Rice" and "दाल" finds "dal fry".
+"""
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, inspect, table, text
+
+from food_parser import food_spellings
+
+logger = logging.getLogger("meal-mitra")
+
+FTS_TABLE = "donations_fts"
+SEARCH_COLUMNS = ("food", "raw_text", "location")
+# For joining against in queries; `rank` is FTS5's hidden bm25 column (lower is better).
+fts_table = table(FTS_TABLE, column("rowid"), column("rank"))
+
+# Words are runs of letters/digits; Devanagari vowel signs are not \w, hence the explicit range.
+_WORD_RE = re.compile(r"(?:[^\W_]|[\u0900-\u097f])+")
+MAX_QUERY_TERMS = 8
+
+_FTS5_DDL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        {", ".join(SEARCH_COLUMNS)}, content='donations', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS donations_fts_insert AFTER INSERT ON donations BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, food, raw_text, location) VALUES (new.id, new.food, new.raw_text, new.location);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS donations_fts_delete AFTER DELETE ON donations BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, food, raw_text, location) VALUES ('delete', old.id, old.food, old.raw_text, old.location);
+    END""",
+    # Status changes (claims, expiry) don't touch the indexed text, so they skip the FTS write.
+    f"""CREATE TRIGGER IF NOT EXISTS donations_fts_update AFTER UPDATE OF food, raw_text, location ON donations BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, food, raw_text, location) VALUES ('delete', old.id, old.food, old.raw_text, old.location);
+        INSERT INTO {FTS_TABLE}(rowid, food, raw_text, location) VALUES (new.id, new.food, new.raw_text, new.location);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+_TSVECTOR_DDL = [
+    """ALTER TABLE donations ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(food, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(raw_text, '')), 'C')) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_donations_search_vector ON donations USING GIN (search_vector)",
+]
+
+
+def setup_search_index(bind) -> Optional[str]:
+    """
+    Create the search index if it is missing and return the backend in use: "fts5",
+    "tsvector", or None when only the LIKE fallback is available.
+    """
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        with bind.begin() as conn:
+            for statement in _TSVECTOR_DDL:
+                conn.execute(text(statement))
+        return "tsvector"
+    if dialect != "sqlite":
+        return None
+    if inspect(bind).has_table(FTS_TABLE):
+        return "fts5"
+    try:
+        with bind.begin() as conn:
+            for statement in _FTS5_DDL:
+                conn.execute(text(statement))
+    except Exception as e:
+        # SQLite builds without FTS5 are rare but exist; search still works, just slower.
+        logger.warning("FTS5 unavailable, donation search falls back to LIKE: %s", e)
+        return None
+    logger.info("Built %s full-text index", FTS_TABLE)
+    return "fts5"
+
+
+def query_terms(q: str) -> List[Tuple[str, Tuple[str, ...]]]:
+    """
+    (typed word, other spellings) per query word. Two words forming a food alias ("vada pav")
+    are kept together as one term.
+    """
+    words = _WORD_RE.findall(q.lower())
+    terms = []
+    i = 0
+    while i < len(words) and len(terms) < MAX_QUERY_TERMS:
+        if i + 1 < len(words):
+            pair = f"{words[i]} {words[i + 1]}"
+            spellings = food_spellings(pair)
+            if spellings:
+                terms.append((pair, tuple(s for s in spellings if s != pair)))
+                i += 2
+                continue
+        word = words[i]
+        terms.append((word, tuple(s for s in food_spellings(word) if s != word)))
+        i += 1
+    return terms
+
+
+def fts5_query(terms) -> str:
+    """FTS5 MATCH expression: every term must match, as a prefix or as one of its spellings."""
+    def phrase(words: str) -> str:
+        return '"' + words.replace('"', '""') + '"'
+    groups = []
+    for typed, spellings in terms:
+        alternatives = [phrase(typed) + "*"] + [phrase(spelling) for spelling in spellings]
+        groups.append("(" + " OR ".join(alternatives) + ")")
+    return " AND ".join(groups)
+
+
+def tsquery(terms) -> str:
+    """to_tsquery('simple', ...) input equivalent to fts5_query()."""
+    def phrase(words: str, prefix: bool) -> str:
+        lexemes = words.split()
+        if prefix:
+            lexemes[-1] += ":*"
+        return " <-> ".join(lexemes)
+    groups = []
+    for typed, spellings in terms:
+        alternatives = [phrase(typed, True)] + [phrase(spelling, False) for spelling in spellings]
+        groups.append("(" + " | ".join(alternatives) + ")")
+    return " & ".join(groups)
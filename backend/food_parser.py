@@ -0,0 +1,364 @@
+"""
+Offline, deterministic parser for food donation messages.
+
+Used when Groq is unavailable, and as a cheap first pass before deciding whether an
+LLM call is needed at all. A message is tokenized once and every field is a dictionary
+lookup over a small Hindi/Marathi/English lexicon, so parsing costs microseconds.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+# -------------------------------------------------
+# FOOD LEXICON
+# -------------------------------------------------
+# (canonical English name, hours safe at room temperature, aliases)
+# Aliases cover English, Hindi/Marathi transliterations and Devanagari spellings.
+# Safety hours follow the same guidance given to the LLM: Dal/Rice 6, Cooked Veg 8,
+# Bread 24, Milk 4.
+FOOD_LEXICON = [
+    ("Vada Pav", 8, ["vada pav", "wada pav", "vadapav", "वडा पाव", "वडापाव"]),
+    ("Pav Bhaji", 8, ["pav bhaji", "pavbhaji", "पाव भाजी"]),
+    ("Chana Masala", 8, ["chana masala", "chole", "chhole", "chholey", "chickpea curry", "छोले"]),
+    ("Biryani", 6, ["biryani", "biriyani", "biriani", "बिरयानी"]),
+    ("Pulao", 6, ["pulao", "pulav", "pilaf", "पुलाव"]),
+    ("Khichdi", 6, ["khichdi", "khichadi", "khichri", "खिचड़ी", "खिचडी"]),
+    ("Rice", 6, ["rice", "chawal", "chaval", "bhaat", "bhat", "bhath", "चावल", "भात"]),
+    ("Dal", 6, ["dal", "daal", "dhal", "dal tadka", "dal fry", "varan", "aamti", "amti", "दाल", "डाळ", "वरण", "आमटी"]),
+    ("Sambar", 6, ["sambar", "sambhar", "सांबर"]),
+    ("Rajma", 8, ["rajma", "राजमा"]),
+    ("Kadhi", 6, ["kadhi", "karhi", "कढ़ी", "कढी"]),
+    ("Paneer", 6, ["paneer", "panir", "पनीर"]),
+    ("Sabzi", 8, ["sabzi", "sabji", "subzi", "subji", "bhaji", "bhajee", "shaak", "vegetable", "vegetables", "veg curry", "curry", "सब्जी", "सब्ज़ी", "भाजी"]),
+    ("Roti", 12, ["roti", "rotis", "chapati", "chapatti", "chapathi", "phulka", "fulka", "poli", "rotla", "bhakri", "bhakar", "रोटी", "चपाती", "पोळी", "भाकरी"]),
+    ("Paratha", 12, ["paratha", "parantha", "parotta", "पराठा"]),
+    ("Puri", 12, ["puri", "poori", "पूरी", "पुरी"]),
+    ("Bread", 24, ["bread", "pav", "pao", "bun", "double roti", "ब्रेड", "पाव"]),
+    ("Poha", 6, ["poha", "pohe", "पोहा", "पोहे"]),
+    ("Upma", 6, ["upma", "uppit", "उपमा"]),
+    ("Idli", 8, ["idli", "idly", "इडली"]),
+    ("Dosa", 8, ["dosa", "dosai", "डोसा"]),
+    ("Misal", 6, ["misal", "usal", "मिसळ", "उसळ"]),
+    ("Samosa", 12, ["samosa", "samosay", "समोसा"]),
+    ("Sandwich", 8, ["sandwich", "सैंडविच"]),
+    ("Noodles", 6, ["noodles", "chowmein", "chow mein", "hakka", "नूडल्स"]),
+    ("Thali", 6, ["thali", "थाली"]),
+    ("Milk", 4, ["milk", "doodh", "dudh", "दूध"]),
+    ("Curd", 6, ["curd", "dahi", "yogurt", "yoghurt", "दही"]),
+    ("Buttermilk", 6, ["buttermilk", "chaas", "chhaas", "chhach", "taak", "mattha", "छाछ", "ताक"]),
+    ("Kheer", 4, ["kheer", "payasam", "kheeri", "खीर"]),
+    ("Halwa", 12, ["halwa", "sheera", "shira", "हलवा", "शिरा"]),
+    ("Sweets", 24, ["sweets", "sweet", "mithai", "ladoo", "laddoo", "laddu", "barfi", "burfi", "jalebi", "gulab jamun", "मिठाई", "लड्डू"]),
+    ("Biscuits", 168, ["biscuit", "biscuits", "cookies", "cookie", "बिस्किट"]),
+    ("Fruits", 48, ["fruit", "fruits", "phal", "banana", "bananas", "kela", "apple", "apples", "seb", "फल", "केला", "केळी"]),
+    ("Salad", 4, ["salad", "सलाद"]),
+    ("Eggs", 6, ["egg", "eggs", "anda", "ande", "अंडा", "अंडे"]),
+    ("Chicken", 4, ["chicken", "murgh", "murg", "चिकन"]),
+    ("Mutton", 4, ["mutton", "gosht", "मटन"]),
+    ("Fish", 4, ["fish", "machli", "machhi", "मछली", "मासे"]),
+]
+
+DEFAULT_SAFETY_HOURS = 6
+PIECE_KG = 0.05
+
+# Messages are tokenized once into numbers and runs of Latin or Devanagari letters
+# (Devanagari vowel signs are not \w, hence the explicit range); everything else is
+# a dictionary lookup per token.
+_TOKEN_RE = re.compile(r"\d+(?:\.\d+)?(?::\d+)?|[a-z]+|[\u0900-\u097f]+|₹")
+
+_FOOD_BY_ALIAS = {}
+for _name, _hours, _aliases in FOOD_LEXICON:
+    for _alias in _aliases:
+        _FOOD_BY_ALIAS.setdefault(_alias, (_name, _hours))
+for _alias, _entry in list(_FOOD_BY_ALIAS.items()):
+    if _alias.isascii() and " " not in _alias:
+        _FOOD_BY_ALIAS.setdefault(_alias + "s", _entry)
+        _FOOD_BY_ALIAS.setdefault(_alias + "es", _entry)
+# Two-word aliases ("vada pav", "dal tadka") are checked before their first word alone.
+_BIGRAM_HEADS = {alias.split()[0] for alias in _FOOD_BY_ALIAS if " " in alias}
+
+# Every spelling of each food, for expanding search terms ("chawal" also finds "Rice").
+_SPELLINGS = {name: tuple(dict.fromkeys([name.lower()] + aliases)) for name, _, aliases in FOOD_LEXICON}
+
+@lru_cache(maxsize=4096)
+def food_spellings(term: str) -> Tuple[str, ...]:
+    """
+    All spellings of the food `term` names: an exact alias, or a prefix of 4+ letters that
+    only one food's aliases start with (so "chaw" expands but "cha" does not). () otherwise.
+    """
+    term = term.lower()
+    entry = _FOOD_BY_ALIAS.get(term)
+    if entry is not None:
+        return _SPELLINGS[entry[0]]
+    if len(term) < 4:
+        return ()
+    names = {name for alias, (name, _) in _FOOD_BY_ALIAS.items() if alias.startswith(term)}
+    return _SPELLINGS[names.pop()] if len(names) == 1 else ()
+
+# -------------------------------------------------
+# QUANTITIES
+# -------------------------------------------------
+# unit alias -> (canonical unit, kg per unit, priority). When a string mentions several
+# quantities the lowest priority wins, matching the original parse_kg precedence:
+# weight, then servings, then pounds, then volume and pieces.
+_UNITS = {}
+def _register_units(unit, kg, priority, aliases):
+    for alias in aliases:
+        _UNITS[alias] = (unit, kg, priority)
+
+_register_units("kg", 1.0, 0, ["kg", "kgs", "kilo", "kilos", "kilogram", "kilograms", "किलो"])
+_register_units("g", 0.001, 1, ["g", "gm", "gms", "gram", "grams", "gramme", "grammes", "ग्राम"])
+_register_units("plate", 0.4, 2, ["plate", "plates", "meal", "meals", "packet", "packets", "serving", "servings",
+                                  "pax", "box", "boxes", "thali", "thalis", "tiffin", "tiffins", "dabba", "dabbe",
+                                  "parcel", "parcels", "portion", "portions", "people", "persons", "log", "लोग",
+                                  "प्लेट", "थाली", "डब्बे", "पैकेट"])
+_register_units("lb", 0.453, 3, ["lb", "lbs", "pound", "pounds"])
+_register_units("l", 1.0, 4, ["l", "ltr", "ltrs", "litre", "litres", "liter", "liters", "लीटर", "लिटर"])
+_register_units("ml", 0.001, 4, ["ml", "millilitre", "milliliter"])
+_register_units("piece", PIECE_KG, 5, ["piece", "pieces", "pcs", "pc", "nos", "नग"])
+
+# Number words are only trusted when a unit follows ("do kilo", not "do you").
+_NUMBER_WORDS = {
+    "half": 0.5, "aadha": 0.5, "adha": 0.5, "ardha": 0.5, "आधा": 0.5, "अर्धा": 0.5,
+    "one": 1, "ek": 1, "एक": 1,
+    "dedh": 1.5, "डेढ़": 1.5,
+    "two": 2, "do": 2, "don": 2, "दो": 2, "दोन": 2,
+    "dhai": 2.5, "adich": 2.5, "ढाई": 2.5,
+    "three": 3, "teen": 3, "tin": 3, "तीन": 3,
+    "four": 4, "char": 4, "chaar": 4, "चार": 4,
+    "five": 5, "paanch": 5, "panch": 5, "pach": 5, "पांच": 5, "पाच": 5,
+    "six": 6, "chhe": 6, "saha": 6, "छह": 6, "सहा": 6,
+    "seven": 7, "saat": 7, "sat": 7, "सात": 7,
+    "eight": 8, "aath": 8, "आठ": 8,
+    "nine": 9, "nau": 9, "nao": 9, "नौ": 9, "नऊ": 9,
+    "ten": 10, "das": 10, "daha": 10, "दस": 10, "दहा": 10,
+    "twenty": 20, "bees": 20, "vees": 20, "बीस": 20, "वीस": 20,
+    "fifty": 50, "pachas": 50, "pannas": 50, "पचास": 50, "पन्नास": 50,
+    "hundred": 100, "sau": 100, "shambhar": 100, "सौ": 100, "शंभर": 100,
+}
+
+# A bare number followed by one of these is a time or duration ("2 PM", "3 hours"), not an amount.
+_TIME_SUFFIXES = {"am", "pm", "baje", "बजे", "o", "oclock", "hr", "hrs", "hour", "hours", "min", "mins",
+                  "minute", "minutes", "day", "days", "ghante", "ghanta", "tas"}
+_PRICE_PREFIXES = {"rs", "inr", "₹"}
+_PRICE_SUFFIXES = {"rs", "rupee", "rupees", "rupaye", "rupay", "रुपये", "₹"}
+_FREE_WORDS = {"free", "muft", "mofat", "मुफ्त", "मोफत"}
+_NGO_WORDS = {"ngo", "ngos", "एनजीओ"}
+_NGO_SUFFIXES = {"only", "sathi", "saathi", "sathe"}
+
+class Quantity(NamedTuple):
+    text: str
+    value: float
+    unit: Optional[str]
+    kg: float
+
+_BARE_NUMBER_PRIORITY = 99
+
+def _quantity_at(tokens: List[str], i: int) -> Optional[Tuple[int, Quantity]]:
+    """(priority, Quantity) for the amount starting at tokens[i], if there is one."""
+    token = tokens[i]
+    following = tokens[i + 1] if i + 1 < len(tokens) else ""
+    if token[0].isdigit():
+        if ":" in token:
+            return None
+        value = float(token)
+    elif token in _NUMBER_WORDS and following in _UNITS:
+        value = float(_NUMBER_WORDS[token])
+    else:
+        return None
+
+    unit_info = _UNITS.get(following)
+    if unit_info is not None:
+        unit, kg_per_unit, priority = unit_info
+        return priority, Quantity(f"{token} {following}", value, unit, value * kg_per_unit)
+    if following in _TIME_SUFFIXES or following in _PRICE_SUFFIXES or (i and tokens[i - 1] in _PRICE_PREFIXES):
+        return None
+    if following in _FOOD_BY_ALIAS:
+        # "16 pav bhaji packets": the unit may come after a one- or two-word food name.
+        for j in (i + 2, i + 3):
+            if j < len(tokens) and tokens[j] in _UNITS:
+                unit, kg_per_unit, priority = _UNITS[tokens[j]]
+                return priority, Quantity(f"{token} {tokens[j]}", value, unit, value * kg_per_unit)
+            if j >= len(tokens) or tokens[j] not in _FOOD_BY_ALIAS:
+                break
+        # "20 chapatis": a count of pieces.
+        return _UNITS["piece"][2], Quantity(f"{token} {following}", value, "piece", value * PIECE_KG)
+    # Bare number: assume kg, but only if nothing better turns up.
+    return _BARE_NUMBER_PRIORITY, Quantity(token, value, None, value)
+
+def _best_quantity(tokens: List[str]) -> Optional[Quantity]:
+    best = None
+    best_priority = None
+    for i in range(len(tokens)):
+        found = _quantity_at(tokens, i)
+        if found is not None and (best_priority is None or found[0] < best_priority):
+            best_priority, best = found
+            if best_priority == 0:
+                break
+    return best
+
+def extract_quantity(text: str) -> Optional[Quantity]:
+    """Best quantity mentioned in `text` (see unit priorities above), or None."""
+    if not text:
+        return None
+    return _best_quantity(_TOKEN_RE.findall(text.lower()))
+
+def quantity_to_kg(quantity_str: str) -> float:
+    """Approximate weight in kg for a free-text quantity (0.0 when there is no number)."""
+    quantity = extract_quantity(quantity_str)
+    return quantity.kg if quantity else 0.0
+
+# -------------------------------------------------
+# LOCATION
+# -------------------------------------------------
+_PLACE_WORDS = {
+    "ghar", "ghari", "home", "house", "office", "canteen", "mess", "hostel", "restaurant", "hotel", "cafe", "dhaba",
+    "temple", "mandir", "gurudwara", "masjid", "church", "school", "college", "hall", "society", "station",
+    "hospital", "market", "bazaar", "apartment", "flat", "घर", "घरी", "ऑफिस", "मंदिर", "कैंटीन",
+}
+_TIME_WORDS = {"morning", "evening", "night", "afternoon", "noon", "today", "tomorrow", "tonight", "the", "a", "an", "time", "hours", "hour", "minutes"}
+_PREPOSITIONS = {"at", "near", "in", "from", "opp", "opposite"}
+_PREPOSITION_RE = re.compile(r"\b(?:at|near|in|from|opp|opposite)\s+", re.IGNORECASE)
+_PLACE_END_RE = re.compile(
+    r"[;!?()]|\.(?:\s|$)|,?\s+(?:by|till|until|before|after|cooked|prepared|made|for|and|at|around|from|pickup|call|contact|rs|inr|ngos?|only)\b|\s*₹",
+    re.IGNORECASE
+)
+
+def _phrase_location(text: str) -> Optional[str]:
+    """Place named after "at/near/in/from ...", cut at punctuation or the next clause."""
+    for match in _PREPOSITION_RE.finditer(text):
+        rest = text[match.end():match.end() + 80]
+        end = _PLACE_END_RE.search(rest)
+        place = (rest[:end.start()] if end else rest).strip(" ,.-'")[:60]
+        if place and place[0].isalpha() and place.split()[0].lower() not in _TIME_WORDS:
+            return place
+    return None
+
+# -------------------------------------------------
+# SAFETY WINDOW
+# -------------------------------------------------
+# Besides ISO 8601, formats the LLM and older clients have been seen to send.
+_TIMESTAMP_FORMATS = (
+    "%Y-%m-%d %I:%M %p", "%Y-%m-%d %I:%M%p", "%Y/%m/%d %H:%M", "%Y/%m/%d %H:%M:%S",
+    "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M", "%d-%m-%Y %H:%M:%S",
+    "%d/%m/%Y %I:%M %p", "%d-%m-%Y %I:%M %p", "%d/%m/%Y", "%d-%m-%Y",
+)
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Naive UTC datetime from an ISO or common free-form timestamp string; None if unparseable."""
+    if not value or not value.strip():
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        for fmt in _TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.strptime(value.upper() if "%p" in fmt else value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+@lru_cache(maxsize=1024)
+def compute_safe_until(cooked_at: Optional[str], safety_hours: float) -> Optional[str]:
+    """cooked_at + safety_hours as an ISO timestamp, or None when cooked_at is missing or unparseable."""
+    if not cooked_at:
+        return None
+    try:
+        cooked = datetime.fromisoformat(cooked_at.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (cooked + timedelta(hours=safety_hours)).isoformat()
+
+# -------------------------------------------------
+# PARSER
+# -------------------------------------------------
+class LocalParse(NamedTuple):
+    food: str
+    quantity: str
+    location: str
+    price: float
+    is_ngo_only: bool
+    cooked_at: Optional[str]
+    safe_until: Optional[str]
+    safety_hours: int
+    foods: List[str]
+    kg: float
+
+    @property
+    def complete(self) -> bool:
+        """True when food and quantity were both recognized, i.e. an LLM call would add little."""
+        return self.food != "unknown" and self.quantity != "unknown"
+
+def parse_food_message(text: str, cooked_at: Optional[str] = None) -> LocalParse:
+    """Parse a donation message into the same fields the LLM extracts."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    last = len(tokens) - 1
+
+    foods = []
+    safety_hours = None
+    place_word = None
+    has_preposition = False
+    price = None
+    free = False
+    ngo_only = False
+    skip = -1
+    for i, token in enumerate(tokens):
+        if i == skip:
+            continue
+        entry = None
+        if token in _BIGRAM_HEADS and i < last:
+            entry = _FOOD_BY_ALIAS.get(f"{token} {tokens[i + 1]}")
+            if entry is not None:
+                skip = i + 1
+        if entry is None:
+            entry = _FOOD_BY_ALIAS.get(token)
+        if entry is not None:
+            name, hours = entry
+            if name not in foods:
+                foods.append(name)
+                # The most perishable item decides how long the whole donation is safe.
+                safety_hours = hours if safety_hours is None else min(safety_hours, hours)
+            continue
+
+        if token in _PREPOSITIONS:
+            has_preposition = True
+        elif token in _PLACE_WORDS:
+            place_word = place_word or token
+        elif token in _FREE_WORDS:
+            free = True
+        elif token in _NGO_WORDS:
+            before = tokens[i - 1] if i else ""
+            after = tokens[i + 1] if i < last else ""
+            if after in _NGO_SUFFIXES or before in ("only", "for") or (after == "ke" and i + 2 <= last and tokens[i + 2] == "liye"):
+                ngo_only = True
+        elif price is None and i < last:
+            if token in _PRICE_PREFIXES and tokens[i + 1][0].isdigit():
+                price = float(tokens[i + 1].split(":")[0])
+            elif token[0].isdigit() and ":" not in token and tokens[i + 1] in _PRICE_SUFFIXES:
+                price = float(token)
+
+    if safety_hours is None:
+        safety_hours = DEFAULT_SAFETY_HOURS
+    quantity = _best_quantity(tokens)
+    location = (_phrase_location(text) if has_preposition else None) or place_word or "unknown"
+
+    return LocalParse(
+        food=" and ".join(foods) if foods else "unknown",
+        quantity=quantity.text if quantity else "unknown",
+        location=location,
+        price=0.0 if free or price is None else price,
+        is_ngo_only=ngo_only,
+        cooked_at=cooked_at,
+        safe_until=compute_safe_until(cooked_at, safety_hours),
+        safety_hours=safety_hours,
+        foods=foods,
+        kg=quantity.kg if quantity else 0.0,
+    )
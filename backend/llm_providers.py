@@ -0,0 +1,184 @@
+"""
+LLM backends behind one small interface, so the donation parser and chatbot can run
+against Groq in production and against a deterministic in-process stub for offline
+load tests.
+
+Selected with LLM_PROVIDER:
+    groq  (default) Groq chat completions; needs GROQ_API_KEY, model from LLM_MODEL.
+    stub  No network. Answers after STUB_LLM_LATENCY (+/- STUB_LLM_JITTER) seconds and
+          fails a STUB_LLM_FAILURE_RATE fraction of calls, seeded by STUB_LLM_SEED.
+"""
+import abc
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+from groq import Groq, AsyncGroq
+
+from food_parser import parse_food_message
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+Messages = List[Dict[str, str]]
+
+
+class LLMProvider(abc.ABC):
+    name = "base"
+    model = ""
+
+    @abc.abstractmethod
+    def complete(self, messages: Messages, temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None, json_mode: bool = False) -> str:
+        """Blocking chat completion; returns the assistant message text."""
+
+    @abc.abstractmethod
+    def stream(self, messages: Messages, temperature: Optional[float] = None,
+               max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """Async iterator of response tokens. Closing it early releases the upstream stream."""
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL, timeout: float = 10.0, max_retries: int = 1):
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._client: Optional[Groq] = None
+        self._async_client: Optional[AsyncGroq] = None
+
+    @property
+    def client(self) -> Groq:
+        """Process-wide client so every call reuses the same HTTP connection pool."""
+        if self._client is None:
+            self._client = Groq(api_key=self.api_key, timeout=self.timeout, max_retries=self.max_retries)
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncGroq:
+        if self._async_client is None:
+            self._async_client = AsyncGroq(api_key=self.api_key, timeout=self.timeout, max_retries=self.max_retries)
+        return self._async_client
+
+    @staticmethod
+    def _options(temperature, max_tokens, json_mode=False) -> dict:
+        options = {}
+        if temperature is not None:
+            options["temperature"] = temperature
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        if json_mode:
+            options["response_format"] = {"type": "json_object"}
+        return options
+
+    def complete(self, messages, temperature=None, max_tokens=None, json_mode=False) -> str:
+        completion = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            **self._options(temperature, max_tokens, json_mode)
+        )
+        return completion.choices[0].message.content
+
+    async def stream(self, messages, temperature=None, max_tokens=None):
+        stream = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            **self._options(temperature, max_tokens)
+        )
+        try:
+            async for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    yield token
+        finally:
+            await stream.close()
+
+
+class StubLLMError(Exception):
+    pass
+
+
+_DONATION_RE = re.compile(r'food donation message: "(.*?)"\s*\n', re.DOTALL)
+_COOKED_AT_RE = re.compile(r'cooked/bought at: "(.*?)"')
+
+
+def stub_completion_text(messages: Messages, json_mode: bool) -> str:
+    """
+    Deterministic answer for a prompt: food-parsing prompts (json_mode) are answered from
+    the offline parser so the JSON validates as ParsedFood; anything else gets a fixed reply.
+    """
+    prompt = messages[-1]["content"] if messages else ""
+    if json_mode:
+        donation = _DONATION_RE.search(prompt)
+        cooked_at = _COOKED_AT_RE.search(prompt)
+        cooked = cooked_at.group(1) if cooked_at and cooked_at.group(1) != "Time not provided" else None
+        parsed = parse_food_message(donation.group(1) if donation else prompt, cooked)
+        return json.dumps({
+            "food": parsed.food,
+            "quantity": parsed.quantity,
+            "location": parsed.location,
+            "price": parsed.price,
+            "is_ngo_only": parsed.is_ngo_only,
+            "cooked_at": parsed.cooked_at,
+            "estimated_safety_hours": parsed.safety_hours,
+            "safe_until": parsed.safe_until,
+        })
+    return f"(stub) You asked: {prompt[:80]}. Please donate surplus food on Meal-Mitra!"
+
+
+class StubProvider(LLMProvider):
+    name = "stub"
+    model = "stub"
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, failure_rate: float = 0.0, seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def _next_call(self):
+        """(delay, fails) for the next call; the RNG is shared so runs are reproducible."""
+        with self.lock:
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            fails = self.rng.random() < self.failure_rate
+        return delay, fails
+
+    def complete(self, messages, temperature=None, max_tokens=None, json_mode=False) -> str:
+        delay, fails = self._next_call()
+        time.sleep(delay)
+        if fails:
+            raise StubLLMError("stub provider failure")
+        return stub_completion_text(messages, json_mode)
+
+    async def stream(self, messages, temperature=None, max_tokens=None):
+        delay, fails = self._next_call()
+        await asyncio.sleep(delay)
+        if fails:
+            raise StubLLMError("stub provider failure")
+        for word in stub_completion_text(messages, False).split(" "):
+            yield word + " "
+
+
+def provider_from_env(groq_api_key: Optional[str], timeout: float, max_retries: int) -> Optional[LLMProvider]:
+    """Provider named by LLM_PROVIDER, or None when Groq is selected but no API key is set."""
+    name = os.getenv("LLM_PROVIDER", "groq").strip().lower()
+    if name == "stub":
+        return StubProvider(
+            latency=float(os.getenv("STUB_LLM_LATENCY", 0.05)),
+            jitter=float(os.getenv("STUB_LLM_JITTER", 0)),
+            failure_rate=float(os.getenv("STUB_LLM_FAILURE_RATE", 0)),
+            seed=int(os.getenv("STUB_LLM_SEED", 42))
+        )
+    if name != "groq":
+        raise ValueError(f"Unknown LLM_PROVIDER '{name}'. Use 'groq' or 'stub'.")
+    if not groq_api_key:
+        return None
+    return GroqProvider(groq_api_key, model=os.getenv("LLM_MODEL", DEFAULT_MODEL), timeout=timeout, max_retries=max_retries)
@@ -1,37 +1,225 @@
-from fastapi import FastAPI, Depends, Request, Form, HTTPException, status, BackgroundTasks
+from fastapi import FastAPI, Depends, Request, Form, Query, HTTPException, status, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
+import fastapi.encoders
 from starlette.middleware.sessions import SessionMiddleware
-from sqlalchemy import Column, Integer, String, Text, Boolean, create_engine
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.datastructures import Headers, MutableHeaders
+from sqlalchemy import Column, Integer, Float, String, Text, Boolean, Date, DateTime, UniqueConstraint, Index, bindparam, case, create_engine, cast, event, extract, func, inspect, or_, select, text, update
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.types import TypeDecorator
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Callable, List, Literal, Optional, Tuple, Dict
+from functools import lru_cache
 import hashlib
+import itertools
+import math
 import re
+import sys
+import secrets
 import os
 import logging
+import logging.handlers
 import json
 import random
 import string
-from datetime import datetime, timedelta
+import threading
+import queue
+import copy
+import atexit
+import contextvars
+import statistics
+import asyncio
+import time
+import orjson
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, date, timedelta, timezone
 from dotenv import load_dotenv
-from groq import Groq
+from food_parser import parse_food_message, parse_timestamp, quantity_to_kg
+from donation_partitions import add_months, drop_empty_partitions, ensure_month_partitions, is_partitioned, month_start
+from donation_search import FTS_TABLE, fts5_query, fts_table, query_terms, setup_search_index, tsquery
+from llm_providers import provider_from_env
+from pickup_routes import Stop, plan_route
+from ngo_matching import KM_PER_DEGREE_LAT, GridIndex, NGOEntry, hours_left, parse_coordinate, parse_food_types, rank_ngos
 import bcrypt
 
 from itsdangerous import URLSafeTimedSerializer
 from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
 
+try:
+    import brotli  # Optional: enables `Content-Encoding: br`
+except ImportError:
+    brotli = None
+
 # Load environment variables
 load_dotenv()
 
 # -------------------------------------------------
 # LOGGING SETUP
 # -------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+# Records are queued by the calling thread and written by a listener thread, so handlers never
+# block the event loop on stdout. LOG_FORMAT=json emits one JSON object per line; both formats
+# carry the request id. Pass arguments instead of f-strings so filtered records are never formatted.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").strip().lower()
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", 200))
+
+
+def parse_route_rates(spec: str, setting: str) -> Dict[Tuple[str, str], float]:
+    """Parses "GET /donations=0.01,GET /dashboard/user=0.05" into {(method, route template): rate}."""
+    rates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        target, _, rate = entry.rpartition("=")
+        method, _, path = target.strip().partition(" ")
+        if not path or not rate:
+            raise ValueError(f"Invalid {setting} entry '{entry}'. Use 'METHOD /route/template=rate'.")
+        rates[(method.upper(), path.strip())] = float(rate)
+    return rates
+
+
+# INFO and DEBUG records from these routes are kept for this share of requests; warnings always are.
+LOG_SAMPLE_RATES = parse_route_rates(os.getenv("LOG_SAMPLE_RATES", "GET /donations=0.01"), "LOG_SAMPLE_RATES")
+
+
+class LogPayload:
+    """Wraps user text or LLM output so it is only truncated (and copied) if the record is emitted."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self) -> str:
+        text = str(self.value)
+        if len(text) <= LOG_PAYLOAD_MAX_CHARS:
+            return text
+        return f"{text[:LOG_PAYLOAD_MAX_CHARS]}... ({len(text)} chars)"
+
+    __repr__ = __str__
+
+
+class RequestLogContext:
+    __slots__ = ("request_id", "scope", "keep")
+
+    def __init__(self, request_id: str, scope):
+        self.request_id = request_id
+        self.scope = scope
+        # Sampling decision for the request's INFO records, made once its route is known.
+        self.keep = None
+
+
+current_log_context: contextvars.ContextVar[Optional[RequestLogContext]] = contextvars.ContextVar("current_log_context", default=None)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request and drops sampled-out INFO records from hot routes."""
+    def __init__(self, sample_rates: Dict[Tuple[str, str], float]):
+        super().__init__()
+        self.sample_rates = sample_rates
+
+    def filter(self, record) -> bool:
+        context = current_log_context.get()
+        if context is None:
+            record.request_id = record.method = record.route = None
+            return True
+        route = getattr(context.scope.get("route"), "path", None)
+        record.request_id = context.request_id
+        record.method = context.scope["method"]
+        record.route = route
+        if record.levelno >= logging.WARNING:
+            return True
+        if context.keep is None and route is not None:
+            rate = self.sample_rates.get((record.method, route))
+            context.keep = rate is None or random.random() < rate
+        return context.keep is not False
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+    """QueueHandler that only merges the message in the caller; rendering happens on the listener thread."""
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is emitted as a field.
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id", "method", "route"}
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        entry = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry.update(request_id=request_id, method=record.method, route=record.route)
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class TextLogFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        return f"{line} [{request_id}]" if request_id else line
+
+
+log_handler = logging.StreamHandler(sys.stdout)
+log_handler.setFormatter(
+    JsonLogFormatter() if LOG_FORMAT == "json"
+    else TextLogFormatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 )
+log_queue = queue.SimpleQueue()
+queue_log_handler = QueueLogHandler(log_queue)
+queue_log_handler.addFilter(RequestContextFilter(LOG_SAMPLE_RATES))
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+logging.basicConfig(level=LOG_LEVEL, handlers=[queue_log_handler])
 logger = logging.getLogger("meal-mitra")
 
+REQUEST_ID_HEADER = b"x-request-id"
+_REQUEST_ID_RE = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class RequestContextMiddleware:
+    """Assigns each request an id (reusing a well-formed inbound X-Request-ID) for its log records."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inbound = next((value for name, value in scope["headers"] if name == REQUEST_ID_HEADER), b"").decode("latin-1")
+        request_id = inbound if _REQUEST_ID_RE.fullmatch(inbound) else secrets.token_hex(8)
+        token = current_log_context.set(RequestLogContext(request_id, scope))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-request-id", request_id.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            current_log_context.reset(token)
+
 # -------------------------------------------------
 # APP SETUP
 # -------------------------------------------------
@@ -44,15 +232,33 @@ tags_metadata = [
     {"name": "General", "description": "General system operations."}
 ]
 
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of the stdlib encoder."""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+def isoformat_utc_z(value: datetime) -> str:
+    """ISO timestamp with UTC written as "Z", matching what orjson's OPT_UTC_Z emits."""
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+# Routes returning plain dicts are run through jsonable_encoder before render(), which would
+# otherwise write "+00:00" where the response_model routes write "Z".
+fastapi.encoders.ENCODERS_BY_TYPE[datetime] = isoformat_utc_z
+
 app = FastAPI(
     title="Meal-Mitra API", 
     version="1.1.0",
-    openapi_tags=tags_metadata
+    openapi_tags=tags_metadata,
+    default_response_class=FastJSONResponse
 )
 
 SECRET_KEY = os.getenv("SESSION_SECRET_KEY", "CHANGE_THIS_SECRET_KEY")
 SALT = os.getenv("RESET_PASSWORD_SALT", "meal-mitra-reset-salt")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# "llm": Groq first, local parser only as fallback. "local-first": skip Groq when the
+# local parser already found food and quantity. "local": never call Groq.
+FOOD_PARSER_MODE = os.getenv("FOOD_PARSER_MODE", "llm").strip().lower()
 
 # SMTP Configuration
 conf = ConnectionConfig(
@@ -65,14 +271,545 @@ conf = ConnectionConfig(
     MAIL_SSL_TLS=os.getenv("MAIL_SSL_TLS", "False") == "True",
     USE_CREDENTIALS=True,
     VALIDATE_CERTS=True,
+    SUPPRESS_SEND=os.getenv("MAIL_SUPPRESS_SEND", "False") == "True",
     TEMPLATE_FOLDER=os.path.join(os.path.dirname(__file__), "templates")
 )
 
 serializer = URLSafeTimedSerializer(SECRET_KEY)
 
+# -------------------------------------------------
+# HTTP COMPRESSION & CACHING MIDDLEWARE
+# -------------------------------------------------
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int, **kwargs):
+        super().__init__(app, minimum_size, **kwargs)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware that prefers brotli when the client accepts it and the package is installed."""
+    def __init__(self, app, minimum_size: int = 1024, compresslevel: int = 6, brotli_quality: int = 4):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("Accept-Encoding", "")
+        if brotli is not None and "br" in accept_encoding:
+            responder = BrotliResponder(
+                self.app, self.minimum_size, self.brotli_quality,
+                exclude_content_types=self.exclude_content_types
+            )
+        elif "gzip" in accept_encoding:
+            responder = GZipResponder(
+                self.app, self.minimum_size, compresslevel=self.compresslevel,
+                thread_minimum_size=self.thread_minimum_size,
+                exclude_content_types=self.exclude_content_types
+            )
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size, exclude_content_types=self.exclude_content_types)
+        await responder(scope, receive, send)
+
+
+# Cache-Control per route tag, applied to successful GET/HEAD responses that don't set their own.
+# Override any entry with CACHE_CONTROL_<TAG>, e.g. CACHE_CONTROL_GENERAL="public, max-age=600".
+# The donation feed is per-user (NGO-only visibility) and must show a client its own posts and
+# claims at once, so it is private and revalidated; the ETag keeps unchanged feeds cheap.
+CACHE_CONTROL_BY_TAG = {
+    "General": "public, max-age=300",
+    "Donations": "private, no-cache",
+    "Profile": "private, no-cache",
+    "NGO": "private, no-cache",
+    "Admin": "no-store",
+    "Auth": "no-store",
+}
+for tag in CACHE_CONTROL_BY_TAG:
+    CACHE_CONTROL_BY_TAG[tag] = os.getenv(f"CACHE_CONTROL_{tag.upper()}", CACHE_CONTROL_BY_TAG[tag])
+
+
+class CacheControlMiddleware:
+    """
+    Sets Cache-Control from the matched route's first tag (see CACHE_CONTROL_BY_TAG). Responses
+    under a "no-cache" policy also get a weak ETag over their body, and a matching
+    If-None-Match is answered with 304 and no body.
+    """
+    def __init__(self, app, policies: dict):
+        self.app = app
+        self.policies = policies
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        body = []
+
+        async def send_with_cache_control(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                if 200 <= message["status"] < 300:
+                    # The router has resolved the route by the time the response starts.
+                    route = scope.get("route")
+                    tags = getattr(route, "tags", None)
+                    policy = self.policies.get(tags[0]) if tags else None
+                    headers = MutableHeaders(scope=message)
+                    if policy and "cache-control" not in headers:
+                        headers["Cache-Control"] = policy
+                        if "no-cache" in policy and scope["method"] == "GET" and "etag" not in headers:
+                            start_message = message
+                            return
+                await send(message)
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await send_validated(b"".join(body))
+
+        async def send_validated(content: bytes):
+            etag = 'W/"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+            headers = MutableHeaders(scope=start_message)
+            headers["ETag"] = etag
+            if_none_match = Headers(scope=scope).get("if-none-match", "")
+            if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+                start_message["status"] = 304
+                for name in ("content-length", "content-type"):
+                    if name in headers:
+                        del headers[name]
+                content = b""
+            await send(start_message)
+            await send({"type": "http.response.body", "body": content, "more_body": False})
+
+        await self.app(scope, receive, send_with_cache_control)
+
+
+# -------------------------------------------------
+# METRICS & INSTRUMENTATION
+# -------------------------------------------------
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+# Requests issuing more queries than this are logged, to surface N+1 patterns early.
+DB_QUERIES_WARN_THRESHOLD = int(os.getenv("DB_QUERIES_WARN_THRESHOLD", 25))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _prometheus_labels(names: Tuple[str, ...], values: tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter per label set, rendered in the Prometheus text format."""
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.values: Dict[tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            items = list(self.values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_prometheus_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in the Prometheus text format."""
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.series: Dict[tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = [(labels, list(series)) for labels, series in self.series.items()]
+        for labels, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_prometheus_labels(self.labels, labels, ('le', bound))} {count}")
+            lines.append(f"{self.name}_bucket{_prometheus_labels(self.labels, labels, ('le', '+Inf'))} {series[-2]}")
+            lines.append(f"{self.name}_sum{_prometheus_labels(self.labels, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_prometheus_labels(self.labels, labels)} {series[-2]}")
+        return lines
+
+
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency by route.", ("method", "route", "status"))
+DB_QUERIES_PER_REQUEST = Histogram("db_queries_per_request", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+DB_SECONDS_PER_REQUEST = Histogram("db_query_seconds_per_request", "Time spent in SQL per request.", ("method", "route"))
+DB_QUERIES_TOTAL = Counter("db_queries_total", "SQL statements executed, including outside requests.")
+LLM_CALL_SECONDS = Histogram("llm_call_duration_seconds", "LLM call latency by call site and outcome.", ("call", "outcome"))
+LLM_CALLS_PER_ROUTE = Counter("llm_calls_total", "LLM calls made while serving a route.", ("method", "route"))
+EMAILS_ENQUEUED = Counter("emails_enqueued_total", "Emails queued for sending, by kind.", ("kind",))
+METRICS = [HTTP_REQUEST_SECONDS, DB_QUERIES_PER_REQUEST, DB_SECONDS_PER_REQUEST, DB_QUERIES_TOTAL,
+           LLM_CALL_SECONDS, LLM_CALLS_PER_ROUTE, EMAILS_ENQUEUED]
+
+
+class RequestMetrics:
+    """Per-request tallies; sync handlers run in worker threads that inherit the contextvar."""
+    __slots__ = ("db_queries", "db_seconds", "llm_calls", "profile")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.llm_calls = 0
+        # Set by ProfilingMiddleware for the rare requests being profiled.
+        self.profile = None
+
+
+current_request_metrics: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar("current_request_metrics", default=None)
+
+
+def instrument_engine(bind):
+    """Count and time every SQL statement, attributing it to the current request if any."""
+    @event.listens_for(bind, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        DB_QUERIES_TOTAL.inc()
+        metrics = current_request_metrics.get()
+        if metrics is not None:
+            metrics.db_queries += 1
+            metrics.db_seconds += elapsed
+            if metrics.profile is not None:
+                metrics.profile.record_sql(statement, started, elapsed, executemany)
+
+
+def record_llm_call(call: str, ok: bool, seconds: float):
+    LLM_CALL_SECONDS.observe((call, "ok" if ok else "error"), seconds)
+
+
+class MetricsMiddleware:
+    """Records latency, SQL and LLM usage per route template (never the raw path)."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = current_request_metrics.set(metrics)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request_metrics.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_SECONDS.observe((method, route, str(status_code)), elapsed)
+            DB_QUERIES_PER_REQUEST.observe((method, route), metrics.db_queries)
+            DB_SECONDS_PER_REQUEST.observe((method, route), metrics.db_seconds)
+            if metrics.llm_calls:
+                LLM_CALLS_PER_ROUTE.inc((method, route), metrics.llm_calls)
+            if metrics.db_queries > DB_QUERIES_WARN_THRESHOLD:
+                logger.warning("%s %s ran %s SQL queries (%.1fms)", method, route, metrics.db_queries, metrics.db_seconds * 1000)
+
+
+# -------------------------------------------------
+# REQUEST PROFILING
+# -------------------------------------------------
+# Requests are profiled when an admin sends `X-Profile: 1`, or at random per route template
+# via PROFILE_SAMPLE_RATES, e.g. "GET /donations=0.01,GET /dashboard/user=0.05".
+# Unprofiled requests only pay for a header scan and a dict lookup.
+PROFILE_HEADER = b"x-profile"
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_MS", 5)) / 1000
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", 50))
+PROFILE_SQL_MAX_CHARS = 500
+PROFILE_TOP_FUNCTIONS = 30
+
+
+PROFILE_SAMPLE_RATES = parse_route_rates(os.getenv("PROFILE_SAMPLE_RATES", ""), "PROFILE_SAMPLE_RATES")
+
+
+def _code_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def route_code_objects(route) -> set:
+    """Code objects of a route's endpoint and every dependency it resolves (get_db, get_current_user...)."""
+    codes = {route.endpoint.__code__}
+    pending = list(getattr(route, "dependant", None) and route.dependant.dependencies or [])
+    while pending:
+        dependant = pending.pop()
+        code = getattr(dependant.call, "__code__", None)
+        if code is not None:
+            codes.add(code)
+        pending.extend(dependant.dependencies)
+    return codes
+
+
+class RequestProfile:
+    """
+    Stack-sampling profile of one request plus its SQL timeline.
+
+    cProfile only sees the thread that enables it, while sync handlers and their dependencies
+    hop between threadpool workers, so a sampler thread polls every thread's stack instead and
+    keeps those running this route's endpoint or dependencies. Concurrent requests to the same
+    route can leak into the samples; only one request is profiled at a time to limit that.
+    """
+    def __init__(self, scope, trigger: str, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.id = secrets.token_hex(6)
+        self.scope = scope
+        self.trigger = trigger
+        self.interval = interval
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.status_code = 500
+        self.stacks: Dict[tuple, int] = {}
+        self.samples = 0
+        self.sql: List[dict] = []
+        self.codes = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            route = self.scope.get("route")
+            if route is None or not hasattr(route, "endpoint"):
+                continue
+            if self.codes is None:
+                self.codes = route_code_objects(route)
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                matched = False
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    matched = matched or frame.f_code in self.codes
+                    frame = frame.f_back
+                if matched:
+                    key = tuple(reversed(stack))
+                    self.stacks[key] = self.stacks.get(key, 0) + 1
+                    self.samples += 1
+
+    def record_sql(self, statement: str, started: float, elapsed: float, executemany: bool):
+        self.sql.append({
+            "offset_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(elapsed * 1000, 3),
+            "executemany": executemany,
+            "statement": " ".join(statement.split())[:PROFILE_SQL_MAX_CHARS],
+        })
+
+    def summary(self) -> dict:
+        route = getattr(self.scope.get("route"), "path", None) or "unmatched"
+        return {
+            "id": self.id,
+            "method": self.scope["method"],
+            "path": self.scope["path"],
+            "route": route,
+            "status": self.status_code,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "sql_queries": len(self.sql),
+            "sql_ms": round(sum(query["duration_ms"] for query in self.sql), 3),
+        }
+
+    def top_functions(self, limit: int = PROFILE_TOP_FUNCTIONS) -> List[dict]:
+        """Per function: samples where it was on the stack (total) and at the top of it (self)."""
+        totals: Dict[object, int] = {}
+        own: Dict[object, int] = {}
+        for stack, count in self.stacks.items():
+            own[stack[-1]] = own.get(stack[-1], 0) + count
+            for code in set(stack):
+                totals[code] = totals.get(code, 0) + count
+        ranked = sorted(totals, key=lambda code: (own.get(code, 0), totals[code]), reverse=True)[:limit]
+        return [
+            {
+                "function": _code_label(code),
+                "self_samples": own.get(code, 0),
+                "total_samples": totals[code],
+                "self_ms": round(own.get(code, 0) * self.interval * 1000, 1),
+                "total_ms": round(totals[code] * self.interval * 1000, 1),
+            }
+            for code in ranked
+        ]
+
+    def folded(self) -> str:
+        """Collapsed stacks ("a;b;c count"), the input format of flamegraph.pl and speedscope."""
+        return "".join(
+            ";".join(_code_label(code) for code in stack) + f" {count}\n"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1])
+        )
+
+    def report(self) -> dict:
+        return {**self.summary(), "top_functions": self.top_functions(), "sql_timeline": self.sql}
+
+
+class ProfileStore:
+    """The most recent profiles, kept in memory for download via /admin/profiles (per process)."""
+    def __init__(self, size: int):
+        self.profiles = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+        with self.lock:
+            self.profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self.lock:
+            return next((profile for profile in self.profiles if profile.id == profile_id), None)
+
+    def list(self) -> List[RequestProfile]:
+        with self.lock:
+            return list(reversed(self.profiles))
+
+
+profile_store = ProfileStore(PROFILE_STORE_SIZE)
+
+
+def session_is_admin(scope) -> bool:
+    user_id = scope.get("session", {}).get("user_id")
+    if not user_id:
+        return False
+    db = SessionLocal()
+    try:
+        return bool(db.query(User.is_admin).filter(User.id == user_id).scalar())
+    finally:
+        db.close()
+
+
+class ProfilingMiddleware:
+    """Profiles admin requests sent with `X-Profile: 1` and a PROFILE_SAMPLE_RATES share of traffic."""
+    def __init__(self, app, sample_rates: Dict[Tuple[str, str], float]):
+        self.app = app
+        self.sample_rates = sample_rates
+        self.sampled_routes = None
+        # One profile at a time: a second sampler would both slow requests and blur attribution.
+        self.active = threading.Lock()
+
+    def sample_rate(self, scope) -> float:
+        if self.sampled_routes is None:
+            # Route templates are resolved against the app's routes once, on first use.
+            self.sampled_routes = [
+                (method, route.path_regex, rate)
+                for (method, path), rate in self.sample_rates.items()
+                for route in scope["app"].routes
+                if getattr(route, "path", None) == path
+            ]
+        method = scope["method"]
+        path = scope["path"]
+        for route_method, path_regex, rate in self.sampled_routes:
+            if route_method == method and path_regex.match(path):
+                return rate
+        return 0.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = None
+        if any(name == PROFILE_HEADER and value == b"1" for name, value in scope["headers"]):
+            if await run_in_threadpool(session_is_admin, scope):
+                trigger = "header"
+        elif self.sample_rates and random.random() < self.sample_rate(scope):
+            trigger = "sampled"
+        metrics = current_request_metrics.get()
+        if trigger is None or metrics is None or not self.active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope, trigger)
+        metrics.profile = profile
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                if trigger == "header":
+                    MutableHeaders(scope=message)["X-Profile-Id"] = profile.id
+            await send(message)
+
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.stop()
+            metrics.profile = None
+            self.active.release()
+            profile_store.add(profile)
+            summary = profile.summary()
+            logger.info(
+                "Profiled %s %s (%s): %sms, %s samples, %s SQL queries [profile %s]",
+                summary["method"], summary["route"], trigger, summary["duration_ms"],
+                summary["samples"], summary["sql_queries"], profile.id
+            )
+
+
 # Production requires SameSite="None" and Secure=True for cross-site cookies
 is_production = os.getenv("fastapi_env") == "production"
 
+# Innermost: it reads the session to authorise X-Profile and the route the router resolved.
+app.add_middleware(ProfilingMiddleware, sample_rates=PROFILE_SAMPLE_RATES)
+
 app.add_middleware(
     SessionMiddleware,
     secret_key=SECRET_KEY,
@@ -80,6 +817,16 @@ app.add_middleware(
     https_only=is_production  # True in prod (Render), False in dev (localhost)
 )
 
+app.add_middleware(CacheControlMiddleware, policies=CACHE_CONTROL_BY_TAG)
+
+if os.getenv("RESPONSE_COMPRESSION", "True") == "True":
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", 1024)),
+        compresslevel=int(os.getenv("GZIP_LEVEL", 6)),
+        brotli_quality=int(os.getenv("BROTLI_QUALITY", 4))
+    )
+
 origins = [
     "http://localhost:3000",
     "http://localhost:5173",
@@ -101,6 +848,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency includes every other middleware.
+app.add_middleware(MetricsMiddleware)
+# Wraps even the metrics middleware so its slow-request warnings carry the request id.
+app.add_middleware(RequestContextMiddleware)
+
 # -------------------------------------------------
 # PYDANTIC SCHEMAS
 # -------------------------------------------------
@@ -169,10 +921,10 @@ class DonationResponse(BaseModel):
     food: str
     quantity: str
     location: str
-    safe_until: Optional[str]
-    cooked_at: Optional[str]
-    lat: Optional[str]
-    lng: Optional[str]
+    safe_until: Optional[datetime]
+    cooked_at: Optional[datetime]
+    lat: Optional[float]
+    lng: Optional[float]
     price: float
     status: str
     is_ngo_only: bool
@@ -196,10 +948,46 @@ class BadgeResponse(BaseModel):
     description: str
     icon_url: str
     level: int
-    unlocked_at: str
+    unlocked_at: datetime
     class Config:
         from_attributes = True
 
+class BadgeDefinitionResponse(BaseModel):
+    badge_name: str
+    sanskrit_name: str
+    slug: str
+    description: str
+    icon_url: str
+    level: int
+    type: str
+    threshold: int
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: str
+    value: float
+
+class LeaderboardResponse(BaseModel):
+    metric: str
+    period: str
+    total_ranked: int
+    refreshed_at: Optional[datetime]
+    entries: List[LeaderboardEntry]
+
+class TimeseriesPoint(BaseModel):
+    day: date
+    donations: int = 0
+    claimed: int = 0
+    completed: int = 0
+    kg: float = 0.0
+    meals: int = 0
+
+class TimeseriesResponse(BaseModel):
+    days: int
+    city: Optional[str] = None
+    points: List[TimeseriesPoint]
+
 class NGOBase(BaseModel):
     name: str
     email: str
@@ -208,6 +996,10 @@ class NGOBase(BaseModel):
     address_proof: str
     address: Optional[str] = None
     phone_number: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    capacity_kg: Optional[float] = None
+    accepted_food_types: Optional[str] = None # Comma-separated, e.g. "rice, dal, bread"; empty accepts all
 
 class NGOCreate(NGOBase):
     password: str
@@ -220,6 +1012,10 @@ class NGOUpdate(BaseModel):
     address_proof: Optional[str] = None
     address: Optional[str] = None
     phone_number: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    capacity_kg: Optional[float] = None
+    accepted_food_types: Optional[str] = None
 
 class NGOResponse(NGOBase):
     id: int
@@ -228,6 +1024,64 @@ class NGOResponse(NGOBase):
     class Config:
         from_attributes = True
 
+class NearbyNGO(BaseModel):
+    id: int
+    name: str
+    ngo_type: Optional[str]
+    address: Optional[str]
+    phone_number: Optional[str]
+    lat: float
+    lng: float
+    distance_km: float
+    capacity_kg: Optional[float]
+    accepted_food_types: List[str]
+
+class NearbyNGOResponse(BaseModel):
+    radius_km: float
+    count: int
+    ngos: List[NearbyNGO]
+
+class PickupRouteRequest(BaseModel):
+    # Defaults to every donation this NGO has claimed but not yet collected.
+    donation_ids: Optional[List[int]] = None
+    # Start point; defaults to the NGO's registered location.
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    speed_kmh: Optional[float] = None
+
+class PickupStop(BaseModel):
+    donation_id: int
+    food: Optional[str]
+    quantity: Optional[str]
+    location: Optional[str]
+    status: str
+    lat: float
+    lng: float
+    leg_km: float
+    eta: datetime
+    safe_until: Optional[datetime]
+    late: bool
+
+class PickupRouteResponse(BaseModel):
+    total_km: float
+    total_minutes: float
+    stops: List[PickupStop]
+    # Requested donations left out: no coordinates, not found, or not claimable by this NGO.
+    skipped: List[int]
+    planned_in_ms: float
+
+class ClaimBatchRequest(BaseModel):
+    donation_ids: List[int] = Field(..., min_length=1)
+
+class ClaimBatchResponse(BaseModel):
+    message: str
+    claimed: List[int]
+    # Available when read but taken by a concurrent claimer before our UPDATE ran.
+    lost: List[int]
+    unavailable: List[int]
+    restricted: List[int]
+    not_found: List[int]
+
 class ChatRequest(BaseModel):
     message: str
 
@@ -247,9 +1101,66 @@ engine = create_engine(
     connect_args=connect_args
 )
 
+# Postgres can keep donations in an active-status partition plus per-month history partitions
+# (see donation_partitions.py; migrate_partitions.py converts the table). Once it is partitioned,
+# the archive worker keeps PARTITION_MONTHS_AHEAD months created ahead and drops emptied ones.
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+
+def donations_partitioned(bind) -> bool:
+    if bind.dialect.name != "postgresql":
+        return False
+    with bind.connect() as conn:
+        return is_partitioned(conn)
+
+instrument_engine(engine)
+
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
 
+# Optional read replica for the read-only routes (get_read_db); without one they use the primary.
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL", "")
+if REPLICA_DATABASE_URL.startswith("postgres://"):
+    REPLICA_DATABASE_URL = REPLICA_DATABASE_URL.replace("postgres://", "postgresql://", 1)
+if REPLICA_DATABASE_URL:
+    replica_engine = create_engine(
+        REPLICA_DATABASE_URL,
+        connect_args={"check_same_thread": False} if "sqlite" in REPLICA_DATABASE_URL else {}
+    )
+    instrument_engine(replica_engine)
+    ReadSessionLocal = sessionmaker(bind=replica_engine)
+else:
+    replica_engine = engine
+    ReadSessionLocal = SessionLocal
+# After a client's own write its reads stay on the primary this long, so replica lag never hides it.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
+
+class UTCDateTime(TypeDecorator):
+    """
+    Timezone-aware timestamp, always returned in UTC. Naive values are taken to be UTC.
+    Postgres stores it as timestamptz; SQLite has no zone storage, so it holds naive UTC.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+        return value if dialect.name == "postgresql" else value.replace(tzinfo=None)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+    def result_processor(self, dialect, coltype):
+        if dialect.name == "sqlite":
+            # List endpoints read thousands of these: one C-level parse of the stored text beats
+            # the generic DATETIME processor followed by replace(tzinfo=...).
+            fromisoformat = datetime.fromisoformat
+            return lambda value: None if value is None else fromisoformat(value + "+00:00")
+        return super().result_processor(dialect, coltype)
+
 import bcrypt
 
 # -------------------------------------------------
@@ -270,7 +1181,7 @@ def verify_password(password: str, hashed: str) -> bool:
         pwd_bytes = normalize_password(password)
         return bcrypt.checkpw(pwd_bytes, hashed.encode("utf-8"))
     except Exception as e:
-        print(f"Verification error: {e}")
+        logger.warning("Password verification error: %s", e)
         return False
 
 # -------------------------------------------------
@@ -292,27 +1203,48 @@ class User(Base):
     document_proof = Column(String, nullable=True)
     verification_status = Column(String, default="Approved") # Individuals are auto-approved
 
-class Donation(Base):
-    __tablename__ = "donations"
+class DonationFields:
+    """Columns shared by live donations and the archive."""
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer)
+    user_id = Column(Integer, index=True)
     raw_text = Column(Text)
     food = Column(String)
     quantity = Column(String)
     location = Column(String)
-    safe_until = Column(String)
-    cooked_at = Column(String, nullable=True)
-    lat = Column(String, nullable=True)
-    lng = Column(String, nullable=True)
+    safe_until = Column(UTCDateTime, nullable=True)
+    cooked_at = Column(UTCDateTime, nullable=True)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
     price = Column(Integer, default=0)
     status = Column(String, default="Available")
     is_ngo_only = Column(Boolean, default=False)
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=True)
     
     # Verification details
-    claimed_by_user_id = Column(Integer, nullable=True)
-    claimed_by_ngo_id = Column(Integer, nullable=True)
+    claimed_by_user_id = Column(Integer, nullable=True, index=True)
+    claimed_by_ngo_id = Column(Integer, nullable=True, index=True)
     claim_secret = Column(String, nullable=True) # OTP
-    otp_created_at = Column(String, nullable=True) # ISO Timestamp
+    otp_created_at = Column(UTCDateTime, nullable=True)
+
+class Donation(DonationFields, Base):
+    __tablename__ = "donations"
+    __table_args__ = (
+        # Lazy expiry and the urgency-ordered feed both scan Available rows by safe_until.
+        Index("ix_donations_status_safe_until", "status", "safe_until"),
+        # Without AUTOINCREMENT SQLite hands out an archived donation's id again, and that row
+        # then clashes with it on restore or archiving (see rebuild_donations_autoincrement).
+        {"sqlite_autoincrement": True},
+    )
+
+class ArchivedDonation(DonationFields, Base):
+    """
+    Donations moved out of the live table: old Completed/Expired ones (reason "aged") and
+    admin removals (reason "deleted", restorable). Impact aggregates read both tables.
+    """
+    __tablename__ = "donations_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)  # kept from the live row
+    archived_at = Column(UTCDateTime, nullable=False)
+    archive_reason = Column(String, nullable=False)
 
 class NGO(Base):
     __tablename__ = "ngos"
@@ -327,6 +1259,11 @@ class NGO(Base):
     certificate_id = Column(String, nullable=True)
     address = Column(String, nullable=True)
     phone_number = Column(String, nullable=True)
+    # Pickup base, kg of food it can take in at once, and foods it accepts (for matching)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
+    capacity_kg = Column(Float, nullable=True)
+    accepted_food_types = Column(String, nullable=True)
 
 class UserBadge(Base):
     __tablename__ = "user_badges"
@@ -334,22 +1271,289 @@ class UserBadge(Base):
     user_id = Column(Integer, index=True)
     badge_name = Column(String)
     sanskrit_name = Column(String)
-    unlocked_at = Column(String)
+    unlocked_at = Column(UTCDateTime)
+
+class ImpactRollup(Base):
+    """Per-day, per-donor, per-city donation counters, maintained incrementally by record_rollup()."""
+    __tablename__ = "impact_rollups"
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    city = Column(String, nullable=False)
+    donations = Column(Integer, default=0)
+    claimed = Column(Integer, default=0)
+    completed = Column(Integer, default=0)
+    kg = Column(Float, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("day", "user_id", "city", name="uq_impact_rollup_bucket"),
+        Index("ix_impact_rollups_user_day", "user_id", "day"),
+    )
+
+def upgrade_schema(bind):
+    """
+    create_all() never alters existing tables, so add the columns and indexes
+    introduced since a table was first created.
+    """
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    logger.info("Added missing column %s.%s", table.name, column.name)
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn)
+                    logger.info("Created missing index %s", index.name)
+
+# Columns whose stored type changed (text, naive timestamps): (table, column, str -> value for the new type).
+RETYPED_COLUMNS = [
+    ("donations", "safe_until", parse_timestamp),
+    ("donations", "cooked_at", parse_timestamp),
+    ("donations", "otp_created_at", parse_timestamp),
+    ("donations", "created_at", parse_timestamp),
+    ("donations_archive", "created_at", parse_timestamp),
+    ("user_badges", "unlocked_at", parse_timestamp),
+    # Coordinates were stored exactly as submitted; anything that isn't one becomes NULL.
+    ("donations", "lat", lambda value: parse_coordinate(value, 90)),
+    ("donations", "lng", lambda value: parse_coordinate(value, 180)),
+    ("donations_archive", "lat", lambda value: parse_coordinate(value, 90)),
+    ("donations_archive", "lng", lambda value: parse_coordinate(value, 180)),
+]
+BACKFILL_CHUNK_ROWS = int(os.getenv("BACKFILL_CHUNK_ROWS", 5000))
+
+def column_needs_retype(current, target, dialect: str) -> bool:
+    """Whether a reflected column type differs from the model's (timezone only counts on Postgres)."""
+    target = getattr(target, "impl", target)
+    if not isinstance(current, type(target)):
+        return True
+    return dialect == "postgresql" and bool(getattr(target, "timezone", False)) != bool(getattr(current, "timezone", False))
+
+def retype_columns(bind, chunk_rows: int = BACKFILL_CHUNK_ROWS):
+    """
+    Convert RETYPED_COLUMNS whose stored type differs from the model's (ISO strings, or naive
+    Postgres timestamps): add `<column>__new` with the model's type, fill it in committed
+    chunks of `chunk_rows` (values that don't parse become NULL), then swap it in. An
+    interrupted run just starts the fill again on the next startup.
+    """
+    inspector = inspect(bind)
+    for table_name, column_name, convert in RETYPED_COLUMNS:
+        if not inspector.has_table(table_name):
+            continue
+        column = Base.metadata.tables[table_name].c[column_name]
+        existing = {c["name"]: c["type"] for c in inspector.get_columns(table_name)}
+        if column_name not in existing or not column_needs_retype(existing[column_name], column.type, bind.dialect.name):
+            continue
+        staging = f"{column_name}__new"
+        if staging not in existing:
+            with bind.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {staging} {column.type.compile(dialect=bind.dialect)}"))
+        fill = text(f"UPDATE {table_name} SET {staging} = :value WHERE id = :row_id").bindparams(
+            bindparam("value", type_=column.type)
+        )
+        converted = unparseable = 0
+        last_id = 0
+        while True:
+            with bind.begin() as conn:
+                rows = conn.execute(
+                    text(f"SELECT id, {column_name} FROM {table_name} WHERE id > :last_id AND {column_name} IS NOT NULL ORDER BY id LIMIT :limit"),
+                    {"last_id": last_id, "limit": chunk_rows}
+                ).all()
+                if not rows:
+                    break
+                values = [{"row_id": row_id, "value": convert(str(raw))} for row_id, raw in rows]
+                conn.execute(fill, values)
+            converted += len(values)
+            unparseable += sum(1 for value in values if value["value"] is None)
+            last_id = rows[-1][0]
+        with bind.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {column_name}"))
+            conn.execute(text(f"ALTER TABLE {table_name} RENAME COLUMN {staging} TO {column_name}"))
+        logger.info("Converted %s.%s to %s: %s rows, %s unparseable set to NULL",
+                    table_name, column_name, column.type, converted, unparseable)
+
+def backfill_created_at(bind, chunk_rows: int = BACKFILL_CHUNK_ROWS):
+    """
+    Donations saved before created_at existed have it NULL, which keeps them out of the
+    archive job's age filter. Fill it from cooked_at, else safe_until, else the current time,
+    in committed chunks of `chunk_rows`.
+    """
+    now = bindparam("now", datetime.now(timezone.utc), type_=UTCDateTime())
+    for table in (Donation.__table__, ArchivedDonation.__table__):
+        filled = last_id = 0
+        while True:
+            with bind.begin() as conn:
+                ids = conn.execute(
+                    select(table.c.id).where(table.c.id > last_id, table.c.created_at.is_(None)).order_by(table.c.id).limit(chunk_rows)
+                ).scalars().all()
+                if not ids:
+                    break
+                conn.execute(table.update().where(table.c.id.in_(ids)).values(
+                    created_at=func.coalesce(table.c.cooked_at, table.c.safe_until, now)
+                ))
+            filled += len(ids)
+            last_id = ids[-1]
+        if filled:
+            logger.info("Filled %s.created_at for %s rows", table.name, filled)
+
+def rebuild_donations_autoincrement(bind):
+    """
+    SQLite only: recreate a donations table made before it was AUTOINCREMENT, keeping every id,
+    and start its sequence past the highest live or archived id so neither is handed out again.
+    The search index is dropped with it and rebuilt by setup_search_index.
+    """
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.begin() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'donations'")).scalar()
+        if ddl is None or "AUTOINCREMENT" in ddl.upper():
+            return
+        existing = {row[1] for row in conn.execute(text("PRAGMA table_info(donations)"))}
+        copied = ", ".join(column.name for column in Donation.__table__.columns if column.name in existing)
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        conn.execute(text("ALTER TABLE donations RENAME TO donations_rebuild"))
+        # Its indexes keep their names through the rename; the new table needs them.
+        for (index_name,) in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'donations_rebuild' AND sql IS NOT NULL"
+        )).all():
+            conn.execute(text(f"DROP INDEX {index_name}"))
+        Donation.__table__.create(bind=conn)
+        rows = conn.execute(text(f"INSERT INTO donations ({copied}) SELECT {copied} FROM donations_rebuild")).rowcount
+        conn.execute(text("DROP TABLE donations_rebuild"))
+        last_id = conn.execute(text(
+            "SELECT max(coalesce((SELECT max(id) FROM donations), 0), coalesce((SELECT max(id) FROM donations_archive), 0))"
+        )).scalar()
+        conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'donations'"))
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('donations', :seq)"), {"seq": last_id})
+    logger.info("Rebuilt donations with AUTOINCREMENT: %s rows, next id after %s", rows, last_id)
+
+def prepare_schema(bind) -> Optional[str]:
+    """Create, migrate and index every table; returns the search backend (see setup_search_index)."""
+    Base.metadata.create_all(bind=bind)
+    retype_columns(bind)
+    rebuild_donations_autoincrement(bind)
+    if donations_partitioned(bind):
+        this_month = month_start(datetime.now(timezone.utc).date())
+        ensure_month_partitions(bind, this_month, add_months(this_month, PARTITION_MONTHS_AHEAD))
+    upgrade_schema(bind)
+    backfill_created_at(bind)
+    return setup_search_index(bind)
+
+SEARCH_BACKEND = prepare_schema(engine)
 
-Base.metadata.create_all(bind=engine)
+# -------------------------------------------------
+# FAST SERIALIZATION (column tuples -> orjson)
+# -------------------------------------------------
+# List endpoints can return thousands of rows; validating each ORM object through
+# DonationResponse(from_attributes=True) dominates their CPU time. Instead we select
+# exactly the DonationResponse columns and encode the tuples directly.
+DONATION_RESPONSE_FIELDS = tuple(DonationResponse.model_fields)
+DONATION_RESPONSE_COLUMNS = tuple(
+    cast(Donation.price, Float).label("price") if field == "price" else getattr(Donation, field)
+    for field in DONATION_RESPONSE_FIELDS
+)
+
+def donation_rows(query) -> List[dict]:
+    """Run a Donation query as DonationResponse-shaped dicts without loading ORM objects."""
+    fields = DONATION_RESPONSE_FIELDS
+    return [dict(zip(fields, row)) for row in query.with_entities(*DONATION_RESPONSE_COLUMNS)]
+
+def donation_list_response(query) -> FastJSONResponse:
+    """Serialize a Donation query for a `List[DonationResponse]` route, bypassing per-row validation."""
+    return FastJSONResponse(donation_rows(query))
+
+# -------------------------------------------------
+# IN-PROCESS CACHES
+# -------------------------------------------------
+class TTLCache:
+    """Small per-process cache with expiry, explicit invalidation and hit/miss counters."""
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: Dict[object, Tuple[float, object]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        if len(self.entries) >= self.max_entries:
+            now = time.monotonic()
+            self.entries = {k: e for k, e in self.entries.items() if e[0] > now}
+            if len(self.entries) >= self.max_entries:
+                self.entries.pop(next(iter(self.entries)))
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def invalidate(self, key):
+        self.entries.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
 
 # -------------------------------------------------
 # DEPENDENCIES
 # -------------------------------------------------
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
+    db.info["request"] = request
     try:
         yield db
     finally:
         db.close()
 
+def get_read_db(request: Request):
+    """
+    Session for read-only routes: the replica, unless this client wrote something within the
+    last READ_YOUR_WRITES_SECONDS (see mark_primary_reads) or no replica is configured.
+    """
+    if ReadSessionLocal is SessionLocal or request.session.get("primary_until", 0) > time.time():
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
 
-def get_current_user(request: Request, db: Session = Depends(get_db)):
+@event.listens_for(SessionLocal, "after_flush")
+def note_flush(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def note_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "after_rollback")
+def forget_writes(session):
+    session.info.pop("wrote", None)
+
+@event.listens_for(SessionLocal, "after_commit")
+def mark_primary_reads(session):
+    """Pin the requesting client's reads to the primary after it commits a write."""
+    request = session.info.get("request")
+    if session.info.pop("wrote", False) and request is not None and ReadSessionLocal is not SessionLocal:
+        request.session["primary_until"] = time.time() + READ_YOUR_WRITES_SECONDS
+
+def load_current_user(request: Request, db: Session) -> User:
     user_id = request.session.get("user_id")
     if not user_id:
         raise HTTPException(status_code=401, detail="Not logged in")
@@ -360,6 +1564,13 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
 
     return user
 
+def get_current_user(request: Request, db: Session = Depends(get_db)):
+    return load_current_user(request, db)
+
+def get_current_user_read(request: Request, db: Session = Depends(get_read_db)):
+    """get_current_user for read-only routes, so the whole request runs on one (replica) session."""
+    return load_current_user(request, db)
+
 def get_current_ngo(request: Request, db: Session = Depends(get_db)):
     ngo_id = request.session.get("ngo_id")
     if not ngo_id:
@@ -371,9 +1582,17 @@ def get_current_ngo(request: Request, db: Session = Depends(get_db)):
 
     return ngo
 
-def get_admin_user(user: User = Depends(get_current_user)):
+def require_admin(user: User) -> User:
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
     return user
 
+def get_admin_user(user: User = Depends(get_current_user)):
+    return require_admin(user)
+
+def get_admin_user_read(user: User = Depends(get_current_user_read)):
+    return require_admin(user)
+
 # -------------------------------------------------
 # REWARD & BADGE SYSTEM LOGIC
 # -------------------------------------------------
@@ -541,50 +1760,18 @@ BADGE_DEFINITIONS = [
     },
 ]
 
+@lru_cache(maxsize=8192)
 def parse_kg(quantity_str: str) -> float:
-    if not quantity_str:
-        return 0.0
-    
-    q = quantity_str.lower().strip()
-    
-    try:
-        # 1. Check for specific units
-        # KG
-        match_kg = re.search(r"(\d+(\.\d+)?)\s*(kg|kgs|kilogram)", q)
-        if match_kg:
-            return float(match_kg.group(1))
-            
-        # Grams
-        match_g = re.search(r"(\d+(\.\d+)?)\s*(g|gm|gms|gram|grams)", q)
-        if match_g:
-            return float(match_g.group(1)) / 1000.0
-            
-        # Plates/Meals/Packets (Approx 0.4kg per meal)
-        match_meal = re.search(r"(\d+(\.\d+)?)\s*(plate|plates|meal|meals|packet|packets|serving|servings|pax)", q)
-        if match_meal:
-            count = float(match_meal.group(1))
-            return count * 0.4 
-            
-        # Pounds (approx 0.45kg)
-        match_lb = re.search(r"(\d+(\.\d+)?)\s*(lb|lbs|pound)", q)
-        if match_lb:
-            return float(match_lb.group(1)) * 0.453
-            
-        # 2. Fallback: If just a number, assume it's kg (or maybe meals? let's be generous and say kg for impact)
-        # Or better, just look for the first number
-        match_num = re.search(r"(\d+(\.\d+)?)", q)
-        if match_num:
-            val = float(match_num.group(1))
-            # Heuristic: if val > 20, likely meals/grams? No, let's just default to kg if ambiguous to ensure non-zero impact.
-            return val
-            
-        return 0.0
-    except:
-        return 0.0
+    return quantity_to_kg(quantity_str)
+
+# A donation counts towards impact once it has been claimed, including after handover.
+IMPACT_STATUSES = ("Claimed", "Completed")
 
 def calculate_user_impact(user_id: int, db: Session):
-    donations = db.query(Donation).filter(Donation.user_id == user_id).all()
-    claimed_donations = [d for d in donations if d.status == "Claimed"]
+    donations = rows_with_archive(
+        db, lambda model: (model.quantity, model.status, model.food), lambda model: (model.user_id == user_id,)
+    )
+    claimed_donations = [d for d in donations if d.status in IMPACT_STATUSES]
     
     total_kg = sum(parse_kg(d.quantity) for d in claimed_donations)
     total_meals = int(total_kg * 2) # Assume 1kg = 2 meals
@@ -606,9 +1793,466 @@ def calculate_user_impact(user_id: int, db: Session):
         "safe_count": len([d for d in donations if d.food != "unknown"]) # Mock "safe" check
     }
 
+# -------------------------------------------------
+# BADGE CATALOG & LEADERBOARD
+# -------------------------------------------------
+BADGE_CATALOG = [
+    {
+        "badge_name": d["name"],
+        "sanskrit_name": d["sanskrit"],
+        "slug": d["slug"],
+        "description": d["description"],
+        "icon_url": d["icon_url"],
+        "level": d["level"],
+        "type": d["type"],
+        "threshold": d["threshold"],
+    }
+    for d in BADGE_DEFINITIONS
+]
+
+LEADERBOARD_METRICS = ("kg", "meals", "donations")
+LEADERBOARD_PERIODS = {"week": timedelta(days=7), "month": timedelta(days=30), "all": None}
+LEADERBOARD_REFRESH_SECONDS = int(os.getenv("LEADERBOARD_REFRESH_SECONDS", 300))
+
+class LeaderboardCache:
+    """
+    Materialized rankings for every (metric, period) pair, rebuilt from grouped sums over
+    `impact_rollups` at most every LEADERBOARD_REFRESH_SECONDS. Requests only slice a
+    pre-sorted list; a stale snapshot keeps being served while a background thread rebuilds it.
+    """
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self.rankings: Dict[Tuple[str, str], List[Tuple[int, float]]] = {}
+        self.usernames: Dict[int, str] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def is_stale(self) -> bool:
+        return self.refreshed_at is None or (datetime.utcnow() - self.refreshed_at).total_seconds() > self.refresh_seconds
+
+    def rebuild(self, db: Session):
+        now = datetime.utcnow()
+        totals = {}
+        for period, window in LEADERBOARD_PERIODS.items():
+            query = db.query(ImpactRollup.user_id, func.sum(ImpactRollup.donations), func.sum(ImpactRollup.kg))
+            if window:
+                query = query.filter(ImpactRollup.day >= (now - window).date())
+            donations, kgs = {}, {}
+            for user_id, donation_count, kg in query.group_by(ImpactRollup.user_id):
+                donations[user_id] = int(donation_count or 0)
+                kgs[user_id] = float(kg or 0.0)
+            totals[("donations", period)] = donations
+            totals[("kg", period)] = kgs
+            # Same conversion as calculate_user_impact: 1kg = 2 meals
+            totals[("meals", period)] = {uid: int(kg * 2) for uid, kg in kgs.items()}
+
+        rankings = {
+            key: sorted(((uid, value) for uid, value in values.items() if value > 0), key=lambda e: (-e[1], e[0]))
+            for key, values in totals.items()
+        }
+        ranked_ids = {uid for entries in rankings.values() for uid, _ in entries}
+        usernames = dict(db.query(User.id, User.username).filter(User.id.in_(ranked_ids))) if ranked_ids else {}
+
+        self.rankings, self.usernames, self.refreshed_at = rankings, usernames, now
+        logger.info("Leaderboard rebuilt for %s users", len(ranked_ids))
+
+    def _rebuild_in_background(self):
+        db = SessionLocal()
+        try:
+            self.rebuild(db)
+        except Exception as e:
+            logger.error("Leaderboard refresh failed: %s", e)
+        finally:
+            db.close()
+            self._refreshing = False
+
+    def ensure_fresh(self, db: Session):
+        if not self.is_stale():
+            return
+        if self.refreshed_at is None:
+            # Nothing to serve yet: build synchronously once.
+            with self._lock:
+                if self.refreshed_at is None:
+                    self.rebuild(db)
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def page(self, metric: str, period: str, limit: int, offset: int) -> dict:
+        entries = self.rankings.get((metric, period), [])
+        return {
+            "metric": metric,
+            "period": period,
+            "total_ranked": len(entries),
+            "refreshed_at": self.refreshed_at,
+            "entries": [
+                {"rank": offset + i + 1, "user_id": uid, "username": self.usernames.get(uid, "unknown"), "value": value}
+                for i, (uid, value) in enumerate(entries[offset:offset + limit])
+            ]
+        }
+
+leaderboard_cache = LeaderboardCache(LEADERBOARD_REFRESH_SECONDS)
+
+# -------------------------------------------------
+# DONATION ARCHIVE
+# -------------------------------------------------
+# Completed and Expired donations older than ARCHIVE_AFTER_DAYS are moved to donations_archive
+# in batches so the hot queries only ever scan a small live table. Admin deletes also move the
+# row there (reason "deleted") instead of destroying it. Aggregates that must cover history
+# (impact, dashboards, rollup rebuilds) read the archive too, skipping deleted rows.
+ARCHIVE_REASON_AGED = "aged"
+ARCHIVE_REASON_DELETED = "deleted"
+ARCHIVE_STATUSES = ("Completed", "Expired")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 90))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 1000))
+# How often each worker runs the archive job; 0 leaves it to POST /admin/archive.
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", 3600))
+
+DONATION_COLUMN_NAMES = [column.name for column in Donation.__table__.columns]
+
+def move_donations(db: Session, source, target, ids: List[int], extra: Optional[dict] = None) -> int:
+    """
+    Copy rows `ids` from one donation table to the other with INSERT ... SELECT and delete them
+    from the source, in the caller's transaction. `extra` sets target-only columns.
+    """
+    extra = extra or {}
+    columns = [source.__table__.c[name] for name in DONATION_COLUMN_NAMES]
+    columns += [bindparam(f"extra_{name}", value, type_=target.__table__.c[name].type) for name, value in extra.items()]
+    db.execute(
+        target.__table__.insert().from_select(DONATION_COLUMN_NAMES + list(extra), select(*columns).where(source.id.in_(ids)))
+    )
+    return db.query(source).filter(source.id.in_(ids)).delete(synchronize_session=False)
+
+def archive_terminal_donations(db: Session, older_than_days: int = ARCHIVE_AFTER_DAYS,
+                               batch_size: int = ARCHIVE_BATCH_SIZE, max_batches: Optional[int] = None) -> int:
+    """Archive Completed/Expired donations created more than `older_than_days` ago; one commit per batch."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    archived = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = [row[0] for row in db.query(Donation.id).filter(
+            Donation.status.in_(ARCHIVE_STATUSES), Donation.created_at < cutoff,
+            # A reused SQLite id (see Donation) already in the archive would fail the whole batch.
+            ~select(ArchivedDonation.id).where(ArchivedDonation.id == Donation.id).exists()
+        ).limit(batch_size)]
+        if not ids:
+            # Ends the read's transaction too; its partition locks would block dropping them.
+            db.commit()
+            break
+        archived += move_donations(db, Donation, ArchivedDonation, ids, {
+            "archived_at": datetime.now(timezone.utc), "archive_reason": ARCHIVE_REASON_AGED,
+        })
+        db.commit()
+        batches += 1
+    if archived:
+        logger.info("Archived %s donations older than %s days", archived, older_than_days)
+    return archived
+
+def maintain_donation_partitions(bind=engine) -> List[str]:
+    """
+    Create the coming months' partitions and drop history months the archive job has emptied
+    (those ending before its cutoff). Returns the dropped partitions; a no-op unless partitioned.
+    """
+    if not donations_partitioned(bind):
+        return []
+    now = datetime.now(timezone.utc)
+    this_month = month_start(now.date())
+    ensure_month_partitions(bind, this_month, add_months(this_month, PARTITION_MONTHS_AHEAD))
+    return drop_empty_partitions(bind, (now - timedelta(days=ARCHIVE_AFTER_DAYS)).date())
+
+def archive_worker(stop: threading.Event):
+    while not stop.wait(ARCHIVE_INTERVAL_SECONDS):
+        db = SessionLocal()
+        try:
+            archive_terminal_donations(db)
+            maintain_donation_partitions()
+        except Exception as e:
+            db.rollback()
+            logger.error("Donation archive job failed: %s", e)
+        finally:
+            db.close()
+
+archive_stop = threading.Event()
+if ARCHIVE_INTERVAL_SECONDS > 0:
+    threading.Thread(target=archive_worker, args=(archive_stop,), name="donation-archiver", daemon=True).start()
+    atexit.register(archive_stop.set)
+
+def count_with_archive(db: Session, criteria: Callable[[type], tuple]) -> int:
+    """Donations matching criteria(model) in the live table plus the archive, minus deleted ones."""
+    live = db.query(func.count(Donation.id)).filter(*criteria(Donation)).scalar()
+    archived = db.query(func.count(ArchivedDonation.id)).filter(
+        ArchivedDonation.archive_reason != ARCHIVE_REASON_DELETED, *criteria(ArchivedDonation)
+    ).scalar()
+    return live + archived
+
+def rows_with_archive(db: Session, columns: Callable[[type], tuple], criteria: Callable[[type], tuple]) -> list:
+    """Column tuples from the live table followed by the (non-deleted) archive."""
+    return db.query(*columns(Donation)).filter(*criteria(Donation)).all() + db.query(*columns(ArchivedDonation)).filter(
+        ArchivedDonation.archive_reason != ARCHIVE_REASON_DELETED, *criteria(ArchivedDonation)
+    ).all()
+
+# -------------------------------------------------
+# IMPACT ROLLUPS
+# -------------------------------------------------
+ROLLUP_COUNTERS = ("donations", "claimed", "completed", "kg")
+
+def donation_city(location: Optional[str]) -> str:
+    """Best-effort city key: the last comma-separated part of the parsed location."""
+    if not location or location == "unknown":
+        return "unknown"
+    return location.rsplit(",", 1)[-1].strip().lower() or "unknown"
+
+def rollup_key(donation: Donation) -> dict:
+    created_at = donation.created_at or datetime.now(timezone.utc)
+    return {"day": created_at.date(), "user_id": donation.user_id, "city": donation_city(donation.location)}
+
+def _upsert_rollup(db: Session, key: dict, deltas: dict):
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(ImpactRollup).values(**key, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "user_id", "city"],
+            set_={name: getattr(ImpactRollup, name) + getattr(stmt.excluded, name) for name in deltas}
+        )
+        db.execute(stmt)
+        return
+
+    updated = db.query(ImpactRollup).filter_by(**key).update(
+        {getattr(ImpactRollup, name): getattr(ImpactRollup, name) + value for name, value in deltas.items()},
+        synchronize_session=False
+    )
+    if not updated:
+        db.add(ImpactRollup(**key, **deltas))
+
+def record_rollup(db: Session, donation: Donation, donations: int = 0, claimed: int = 0, completed: int = 0):
+    """
+    Apply counter deltas for one donation to its (day, user, city) bucket in the caller's
+    transaction. kg follows `claimed`, so a claim adds the donation's weight and an
+    un-claim (OTP expiry) or removal takes it back out.
+    """
+    deltas = {
+        "donations": donations,
+        "claimed": claimed,
+        "completed": completed,
+        "kg": claimed * parse_kg(donation.quantity) if claimed else 0.0,
+    }
+    _upsert_rollup(db, rollup_key(donation), deltas)
+
+def move_rollup_city(db: Session, donation: Donation, old_city: str):
+    """Re-bucket an (unclaimed) donation whose location was edited."""
+    if donation_city(donation.location) == old_city:
+        return
+    _upsert_rollup(db, {**rollup_key(donation), "city": old_city}, {"donations": -1})
+    record_rollup(db, donation, donations=1)
+
+def record_rollup_removal(db: Session, donation: Donation):
+    """Take everything a donation contributed back out of its bucket."""
+    record_rollup(
+        db, donation,
+        donations=-1,
+        claimed=-1 if donation.status in IMPACT_STATUSES else 0,
+        completed=-1 if donation.status == "Completed" else 0
+    )
+
+def rebuild_impact_rollups(db: Session):
+    """Recompute every bucket from the donations and archive tables (initial backfill or repair)."""
+    db.query(ImpactRollup).delete(synchronize_session=False)
+    buckets: Dict[Tuple[date, int, str], dict] = {}
+    columns = lambda model: db.query(model.user_id, model.location, model.quantity, model.status, model.created_at)
+    rows = itertools.chain(
+        columns(Donation).yield_per(10000),
+        columns(ArchivedDonation).filter(ArchivedDonation.archive_reason != ARCHIVE_REASON_DELETED).yield_per(10000),
+    )
+    for user_id, location, quantity, donation_status, created_at in rows:
+        key = ((created_at or datetime.now(timezone.utc)).date(), user_id, donation_city(location))
+        bucket = buckets.setdefault(key, {"donations": 0, "claimed": 0, "completed": 0, "kg": 0.0})
+        bucket["donations"] += 1
+        if donation_status in IMPACT_STATUSES:
+            bucket["claimed"] += 1
+            bucket["kg"] += parse_kg(quantity)
+        if donation_status == "Completed":
+            bucket["completed"] += 1
+    db.bulk_insert_mappings(ImpactRollup, [
+        {"day": day, "user_id": user_id, "city": city, **counters}
+        for (day, user_id, city), counters in buckets.items()
+    ])
+    db.commit()
+    logger.info("Rebuilt %s impact rollup buckets", len(buckets))
+
+def rollup_timeseries(db: Session, days: int, user_id: Optional[int] = None, city: Optional[str] = None) -> List[dict]:
+    """Daily totals for the last `days` days (zero-filled), summed from rollup buckets."""
+    start = datetime.utcnow().date() - timedelta(days=days - 1)
+    query = db.query(
+        ImpactRollup.day,
+        *(func.sum(getattr(ImpactRollup, name)) for name in ROLLUP_COUNTERS)
+    ).filter(ImpactRollup.day >= start)
+    if user_id is not None:
+        query = query.filter(ImpactRollup.user_id == user_id)
+    if city:
+        query = query.filter(ImpactRollup.city == city.strip().lower())
+    totals = {row[0]: row[1:] for row in query.group_by(ImpactRollup.day)}
+
+    points = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        donations, claimed, completed, kg = totals.get(day, (0, 0, 0, 0.0))
+        kg = float(kg or 0.0)
+        points.append({
+            "day": day,
+            "donations": int(donations or 0),
+            "claimed": int(claimed or 0),
+            "completed": int(completed or 0),
+            "kg": kg,
+            "meals": int(kg * 2)
+        })
+    return points
+
+def backfill_impact_rollups():
+    db = SessionLocal()
+    try:
+        if not db.query(ImpactRollup.id).first() and (db.query(Donation.id).first() or db.query(ArchivedDonation.id).first()):
+            rebuild_impact_rollups(db)
+    finally:
+        db.close()
+
+backfill_impact_rollups()
+
+# -------------------------------------------------
+# NGO DASHBOARD AGGREGATES
+# -------------------------------------------------
+ngo_dashboard_cache = TTLCache(ttl_seconds=int(os.getenv("NGO_DASHBOARD_CACHE_SECONDS", 300)))
+
+def build_ngo_dashboard(ngo_id: int, db: Session) -> dict:
+    """Claim statistics for one NGO, using only the claimed_by_ngo_id index."""
+    claims = rows_with_archive(
+        db, lambda model: (model.user_id, model.quantity, model.status), lambda model: (model.claimed_by_ngo_id == ngo_id,)
+    )
+    received = [c for c in claims if c.status in IMPACT_STATUSES]
+    kg_received = sum(parse_kg(c.quantity) for c in received)
+    recent = donation_rows(
+        db.query(Donation).filter(Donation.claimed_by_ngo_id == ngo_id).order_by(Donation.id.desc()).limit(5)
+    )
+    return {
+        "stats": {
+            "active_claims": sum(1 for c in claims if c.status == "Claimed"),
+            "completed": sum(1 for c in claims if c.status == "Completed"),
+            "total_claimed": len(received),
+            "unique_donors": len({c.user_id for c in received}),
+        },
+        "impact": {
+            "kg_received": kg_received,
+            "meals_received": int(kg_received * 2),  # Same 1kg = 2 meals as calculate_user_impact
+        },
+        "recent_activity": recent
+    }
+
+# -------------------------------------------------
+# NGO MATCHING
+# -------------------------------------------------
+# Approved NGOs with coordinates, kept in memory for matching NGO-only donations (see ngo_matching.py).
+NGO_INDEX_CELL_KM = float(os.getenv("NGO_INDEX_CELL_KM", 2))
+NGO_MATCH_RADIUS_KM = float(os.getenv("NGO_MATCH_RADIUS_KM", 25))
+NGO_MATCH_LIMIT = int(os.getenv("NGO_MATCH_LIMIT", 5))
+# Average pickup speed used to check an NGO can arrive before safe_until.
+NGO_PICKUP_SPEED_KMH = float(os.getenv("NGO_PICKUP_SPEED_KMH", 20))
+
+ngo_index = GridIndex(cell_km=NGO_INDEX_CELL_KM)
+
+def coordinate_input(value, limit: float) -> Optional[float]:
+    """Submitted donation or NGO coordinate: None when blank, 400 unless it is a number within +/-limit."""
+    if value is None or not str(value).strip():
+        return None
+    coordinate = parse_coordinate(value, limit)
+    if coordinate is None:
+        raise HTTPException(status_code=400, detail="Invalid coordinates")
+    return coordinate
+
+def ngo_index_entry(ngo) -> Optional[NGOEntry]:
+    """Index entry for an NGO row or column tuple, or None if it shouldn't be matched."""
+    if ngo.registration_status != "Approved":
+        return None
+    # Rows saved before coordinates were validated may hold values the grid can't place.
+    lat, lng = parse_coordinate(ngo.lat, 90), parse_coordinate(ngo.lng, 180)
+    if lat is None or lng is None:
+        return None
+    return NGOEntry(
+        ngo.id, ngo.name, lat, lng, ngo.capacity_kg, parse_food_types(ngo.accepted_food_types),
+        ngo.ngo_type, ngo.address, ngo.phone_number
+    )
+
+def sync_ngo_index(ngo: NGO):
+    """Call after committing any change to an NGO's status, location, capacity or food types."""
+    entry = ngo_index_entry(ngo)
+    if entry is None:
+        ngo_index.remove(ngo.id)
+    else:
+        ngo_index.upsert(entry)
+
+def rebuild_ngo_index():
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            NGO.id, NGO.name, NGO.lat, NGO.lng, NGO.capacity_kg, NGO.accepted_food_types, NGO.registration_status,
+            NGO.ngo_type, NGO.address, NGO.phone_number
+        ).filter(NGO.registration_status == "Approved", NGO.lat.isnot(None), NGO.lng.isnot(None))
+        ngo_index.replace_all(entry for entry in map(ngo_index_entry, rows) if entry is not None)
+    finally:
+        db.close()
+    logger.info("NGO index built with %s NGOs", len(ngo_index))
+
+rebuild_ngo_index()
+
+def ngo_open_load_kg(db: Session, ngo_ids: List[int]) -> Dict[int, float]:
+    """kg each NGO has claimed but not yet picked up, which counts against its capacity."""
+    if not ngo_ids:
+        return {}
+    load = {}
+    claims = db.query(Donation.claimed_by_ngo_id, Donation.quantity).filter(
+        Donation.claimed_by_ngo_id.in_(ngo_ids),
+        Donation.status == "Claimed"
+    )
+    for ngo_id, quantity in claims:
+        load[ngo_id] = load.get(ngo_id, 0.0) + parse_kg(quantity)
+    return load
+
+def match_ngos_for_donation(donation: Donation, db: Session) -> list:
+    """Best NGOs to offer an NGO-only donation to; empty when the donation has no coordinates."""
+    lat = parse_coordinate(donation.lat, 90)
+    lng = parse_coordinate(donation.lng, 180)
+    if lat is None or lng is None:
+        return []
+    started = time.perf_counter()
+    matches = rank_ngos(
+        ngo_index, lat, lng,
+        food=donation.food,
+        kg=parse_kg(donation.quantity),
+        hours_remaining=hours_left(donation.safe_until, datetime.now(timezone.utc)),
+        open_load_kg=lambda ngo_ids: ngo_open_load_kg(db, ngo_ids),
+        k=NGO_MATCH_LIMIT,
+        radius_km=NGO_MATCH_RADIUS_KM,
+        speed_kmh=NGO_PICKUP_SPEED_KMH
+    )
+    logger.info(
+        "Matched donation %s to %s NGOs in %.1fms",
+        donation.id, len(matches), (time.perf_counter() - started) * 1000
+    )
+    return matches
+
+def enqueue_email(background_tasks: BackgroundTasks, send_email, *args):
+    """Queue one of the send_*_email tasks below, counting it per kind for /metrics."""
+    EMAILS_ENQUEUED.inc((send_email.__name__.removeprefix("send_").removesuffix("_email"),))
+    background_tasks.add_task(send_email, *args)
+
 async def send_badge_email(email: str, badge_info: dict):
     """Background task to send badge notification email."""
-    logger.info(f"Preparing to send badge email to {email} for {badge_info['name']}")
+    logger.info("Preparing to send badge email to %s for %s", email, badge_info['name'])
     message = MessageSchema(
         subject=f"Meal Mitra Achievement: {badge_info['name']}!",
         recipients=[email],
@@ -623,13 +2267,13 @@ async def send_badge_email(email: str, badge_info: dict):
     fm = FastMail(conf)
     try:
         await fm.send_message(message, template_name="badge_notification_email.html")
-        logger.info(f"Badge email successfully sent to {email}")
+        logger.info("Badge email successfully sent to %s", email)
     except Exception as e:
-        logger.error(f"Background email failed for {email}: {e}")
+        logger.error("Background email failed for %s: %s", email, e)
 
 async def send_ngo_status_email(email: str, ngo_name: str, status: str):
     """Background task to send NGO approval/rejection email."""
-    logger.info(f"Sending NGO status email to {email} ({status})")
+    logger.info("Sending NGO status email to %s (%s)", email, status)
     message = MessageSchema(
         subject=f"Meal Mitra NGO Registration: {status}",
         recipients=[email],
@@ -642,13 +2286,13 @@ async def send_ngo_status_email(email: str, ngo_name: str, status: str):
     fm = FastMail(conf)
     try:
         await fm.send_message(message, template_name="ngo_verification_email.html")
-        logger.info(f"NGO status email sent to {email}")
+        logger.info("NGO status email sent to %s", email)
     except Exception as e:
-        logger.error(f"Failed to send NGO status email to {email}: {e}")
+        logger.error("Failed to send NGO status email to %s: %s", email, e)
 
 async def send_donation_otp_email(email: str, otp: str, food_name: str, claimer_name: str):
     """Background task to send Donation OTP."""
-    logger.info(f"Sending Donation OTP to {email}")
+    logger.info("Sending Donation OTP to %s", email)
     message = MessageSchema(
         subject=f"Action Required: Verify Donation Handover (OTP: {otp})",
         recipients=[email],
@@ -662,13 +2306,33 @@ async def send_donation_otp_email(email: str, otp: str, food_name: str, claimer_
     fm = FastMail(conf)
     try:
         await fm.send_message(message, template_name="donation_claim_email.html")
-        logger.info(f"OTP email sent to {email}")
+        logger.info("OTP email sent to %s", email)
     except Exception as e:
-        logger.error(f"Failed to send OTP email to {email}: {e}")
+        logger.error("Failed to send OTP email to %s: %s", email, e)
+
+async def send_claim_batch_email(email: str, claimer_name: str, groups: List[dict]):
+    """One email to a multi-donation claimer with every donor's OTP and items."""
+    logger.info("Sending batch claim OTPs to %s (%s donors)", email, len(groups))
+    message = MessageSchema(
+        subject=f"Action Required: Verify {len(groups)} Donation Handover(s)",
+        recipients=[email],
+        template_body={
+            "claimer_name": claimer_name,
+            "groups": groups,
+            "total_items": sum(group["items"] for group in groups)
+        },
+        subtype=MessageType.html
+    )
+    fm = FastMail(conf)
+    try:
+        await fm.send_message(message, template_name="donation_batch_claim_email.html")
+        logger.info("Batch claim email sent to %s", email)
+    except Exception as e:
+        logger.error("Failed to send batch claim email to %s: %s", email, e)
 
 async def send_org_status_email(email: str, business_name: str, status: str):
     """Background task to send Organization approval/rejection email."""
-    logger.info(f"Sending Organization status email to {email} ({status})")
+    logger.info("Sending Organization status email to %s (%s)", email, status)
     message = MessageSchema(
         subject=f"Meal Mitra Organization Registration: {status}",
         recipients=[email],
@@ -681,9 +2345,9 @@ async def send_org_status_email(email: str, business_name: str, status: str):
     fm = FastMail(conf)
     try:
         await fm.send_message(message, template_name="org_verification_email.html")
-        logger.info(f"Organization status email sent to {email}")
+        logger.info("Organization status email sent to %s", email)
     except Exception as e:
-        logger.error(f"Failed to send Organization status email to {email}: {e}")
+        logger.error("Failed to send Organization status email to %s: %s", email, e)
 
 def check_and_unlock_badges(user_id: int, db: Session, background_tasks: Optional[BackgroundTasks] = None):
     impact = calculate_user_impact(user_id, db)
@@ -691,7 +2355,7 @@ def check_and_unlock_badges(user_id: int, db: Session, background_tasks: Optiona
     
     user = db.query(User).filter(User.id == user_id).first()
     if not user or not user.email:
-        logger.warning(f"Cannot check badges for user ID {user_id}: User not found or no email")
+        logger.warning("Cannot check badges for user ID %s: User not found or no email", user_id)
         return []
 
     new_badges_unlocked = []
@@ -721,7 +2385,7 @@ def check_and_unlock_badges(user_id: int, db: Session, background_tasks: Optiona
                 user_id=user_id,
                 badge_name=defn["name"],
                 sanskrit_name=defn["sanskrit"],
-                unlocked_at=datetime.now().isoformat()
+                unlocked_at=datetime.now(timezone.utc)
             )
             db.add(badge)
             new_badges_unlocked.append(defn)
@@ -729,56 +2393,180 @@ def check_and_unlock_badges(user_id: int, db: Session, background_tasks: Optiona
     if new_badges_unlocked:
         db.commit()
         badge_names = [b["name"] for b in new_badges_unlocked]
-        logger.info(f"User {user_id} unlocked new badges: {', '.join(badge_names)}")
+        logger.info("User %s unlocked new badges: %s", user_id, ', '.join(badge_names))
         
         # Trigger background emails
         if background_tasks:
             for b_info in new_badges_unlocked:
-                background_tasks.add_task(send_badge_email, user.email, b_info)
+                enqueue_email(background_tasks, send_badge_email, user.email, b_info)
     
     return [b["name"] for b in new_badges_unlocked]
 
 # -------------------------------------------------
-# FOOD PARSER (Groq AI)
+# LLM PROVIDER
+# -------------------------------------------------
+# Hard per-request limit enforced by the HTTP client. GROQ_BASE_URL (read by the Groq SDK)
+# points the Groq provider at a stub server, e.g. `python -m benchmarks.stub_llm_server`;
+# LLM_PROVIDER=stub skips the network entirely (see llm_providers.py).
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 10))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 1))
+llm_provider = provider_from_env(GROQ_API_KEY, LLM_TIMEOUT_SECONDS, LLM_MAX_RETRIES)
+if llm_provider:
+    logger.info("LLM provider: %s (%s)", llm_provider.name, llm_provider.model)
+else:
+    logger.info("LLM provider: none, using local fallbacks")
+
 # -------------------------------------------------
+# LLM CIRCUIT BREAKER
+# -------------------------------------------------
+# How long a request waits for the LLM before answering with its fallback (local parser
+# result, canned chat reply). The upstream call keeps running until LLM_TIMEOUT_SECONDS
+# so its outcome still counts towards the breaker.
+LLM_BUDGET_SECONDS = float(os.getenv("LLM_BUDGET_SECONDS", 4))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+llm_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_MAX_CONCURRENCY", 16)), thread_name_prefix="llm")
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures. While open every call is
+    short-circuited; after `reset_seconds` a single probe is let through (half-open) and its
+    outcome either closes the breaker or re-opens it for another `reset_seconds`.
+    """
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.counters = {"calls": 0, "successes": 0, "failures": 0, "trips": 0, "short_circuits": 0, "budget_exceeded": 0, "fallbacks": 0}
+        self.latencies = deque(maxlen=1000)
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                self.probe_in_flight = False
+            if self.state == "closed" or (self.state == "half_open" and not self.probe_in_flight):
+                self.probe_in_flight = self.state == "half_open"
+                self.counters["calls"] += 1
+                return True
+            self.counters["short_circuits"] += 1
+            return False
+
+    def record(self, ok: bool, latency: float):
+        with self.lock:
+            self.latencies.append(latency)
+            if ok:
+                self.counters["successes"] += 1
+                self.consecutive_failures = 0
+                if self.state != "closed":
+                    logger.info("Circuit '%s' closed after successful probe", self.name)
+                self.state = "closed"
+            else:
+                self.counters["failures"] += 1
+                self.consecutive_failures += 1
+                if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+                    self.state = "open"
+                    self.opened_at = time.monotonic()
+                    self.counters["trips"] += 1
+                    logger.warning("Circuit '%s' opened after %s consecutive failures", self.name, self.consecutive_failures)
+            self.probe_in_flight = False
+
+    def release_probe(self):
+        """Give up a half-open probe without an outcome (e.g. the client went away)."""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def count(self, counter: str):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            state = self.state
+            counters = dict(self.counters)
+        latency_ms = {}
+        if latencies:
+            latency_ms = {
+                "p50": round(statistics.median(latencies) * 1000, 1),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1)
+            }
+        return {"state": state, **counters, "latency_ms": latency_ms}
+
+llm_breaker = CircuitBreaker("groq", LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+
+def call_llm(fn, fallback, label: str, budget_seconds: float = LLM_BUDGET_SECONDS):
+    """
+    Run the blocking LLM call `fn` through the breaker and return its result, or
+    `fallback()` when the breaker is open, the call fails, or no answer arrives
+    within `budget_seconds`.
+    """
+    if llm_provider is None:
+        return fallback()
+    if not llm_breaker.allow():
+        llm_breaker.count("fallbacks")
+        logger.warning("LLM circuit open, using fallback for %s", label)
+        return fallback()
+
+    request_metrics = current_request_metrics.get()
+    if request_metrics is not None:
+        request_metrics.llm_calls += 1
+    started = time.monotonic()
+    future = llm_executor.submit(fn)
+
+    def record_outcome(f):
+        # Answers that arrive after the budget are as useless to the caller as errors.
+        latency = time.monotonic() - started
+        llm_breaker.record(f.exception() is None and latency <= budget_seconds, latency)
+        record_llm_call(label, f.exception() is None, latency)
+
+    future.add_done_callback(record_outcome)
+    try:
+        return future.result(timeout=budget_seconds)
+    except FutureTimeoutError:
+        llm_breaker.count("budget_exceeded")
+        logger.warning("LLM call for %s exceeded %ss budget, using fallback", label, budget_seconds)
+    except Exception as e:
+        logger.error("LLM call for %s failed: %s", label, e)
+    llm_breaker.count("fallbacks")
+    return fallback()
+
 # -------------------------------------------------
 # FOOD PARSER (Groq AI)
 # -------------------------------------------------
+def local_parsed_food(local) -> ParsedFood:
+    return ParsedFood(
+        food=local.food,
+        quantity=local.quantity,
+        location=local.location,
+        price=local.price,
+        is_ngo_only=local.is_ngo_only,
+        cooked_at=local.cooked_at,
+        safe_until=local.safe_until
+    )
+
 def parse_food_text(text: str, cooked_at: Optional[str] = None) -> ParsedFood:
-    logger.info(f"Parsing food text: {text} (Cooked At: {cooked_at})")
+    logger.info("Parsing food text: %s (Cooked At: %s)", LogPayload(text), cooked_at)
+    # Hand the parser and the LLM one ISO format, whatever the client sent.
+    cooked = parse_timestamp(cooked_at)
+    if cooked is not None:
+        cooked_at = cooked.isoformat()
     
-    if not GROQ_API_KEY:
-        logger.warning("GROQ_API_KEY not found. Falling back to regex parser.")
-        # Fallback to simple regex if no API key
-        text_lower = text.lower()
-        quantity = "unknown"
-        food = "unknown"
-        location = "unknown"
-        
-        qty_match = re.search(r"(\d+\s?(kg|kgs|kilogram|plates|packets))", text_lower)
-        if qty_match:
-            quantity = qty_match.group(1)
-
-        food_keywords = ["chawal", "rice", "dal", "sabzi", "roti", "bread"]
-        for f in food_keywords:
-            if f in text_lower:
-                food = f
-                break
-
-        loc_match = re.search(r"(ghar|home|office|canteen)", text_lower)
-        if loc_match:
-            location = loc_match.group(1)
-
-        return ParsedFood(
-            food=food,
-            quantity=quantity,
-            location=location,
-            cooked_at=cooked_at,
-            safe_until=None
-        )
+    local = parse_food_message(text, cooked_at)
+    if llm_provider is None or FOOD_PARSER_MODE == "local":
+        if llm_provider is None:
+            logger.warning("No LLM provider configured. Falling back to local parser.")
+        return local_parsed_food(local)
+    if FOOD_PARSER_MODE == "local-first" and local.complete:
+        logger.info("Local parser handled message without Groq: %s, %s", local.food, local.quantity)
+        return local_parsed_food(local)
 
-    client = Groq(api_key=GROQ_API_KEY)
-    
     prompt = f"""
     The following text is a food donation message: "{text}"
     The user specified the food was cooked/bought at: "{cooked_at if cooked_at else 'Time not provided'}"
@@ -797,18 +2585,12 @@ def parse_food_text(text: str, cooked_at: Optional[str] = None) -> ParsedFood:
     Example output: {{"food": "Dal Tadka", "quantity": "unknown", "location": "unknown", "price": 0.0, "is_ngo_only": false, "cooked_at": "2026-01-10T10:00:00", "estimated_safety_hours": 8, "safe_until": "2026-01-10T18:00:00"}}
     """
     
-    try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-        content = completion.choices[0].message.content
-        logger.info(f"Groq API response: {content}")
+    def llm_parse() -> ParsedFood:
+        content = llm_provider.complete([{"role": "user", "content": prompt}], json_mode=True)
+        logger.info("LLM (%s) response: %s", llm_provider.name, LogPayload(content))
         return ParsedFood.model_validate_json(content)
-    except Exception as e:
-        logger.error(f"Groq Parsing Error: {e}")
-        return ParsedFood(food="unknown", quantity="unknown", location="unknown", cooked_at=cooked_at, safe_until=None)
+
+    return call_llm(llm_parse, lambda: local_parsed_food(local), "food parsing")
 
 # -------------------------------------------------
 # AUTH ROUTES
@@ -827,9 +2609,9 @@ def register(
 ):
     username = username.strip().lower()
     email = email.strip().lower()
-    logger.info(f"Registering user: {username} ({email})")
+    logger.info("Registering user: %s (%s)", username, email)
     if db.query(User).filter((User.username == username) | (User.email == email)).first():
-        logger.warning(f"Registration failed: Username '{username}' or email '{email}' already exists")
+        logger.warning("Registration failed: Username '%s' or email '%s' already exists", username, email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Username or email already exists"
@@ -859,7 +2641,7 @@ def register_organization(
     db: Session = Depends(get_db)
 ):
     email = email.strip().lower()
-    logger.info(f"Registering organization: {business_name} ({email}) as {role}")
+    logger.info("Registering organization: %s (%s) as %s", business_name, email, role)
     
     if db.query(User).filter(User.email == email).first():
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -885,12 +2667,12 @@ async def forgot_password(
     db: Session = Depends(get_db)
 ):
     email = email.strip().lower()
-    logger.info(f"Password reset requested for email: {email}")
+    logger.info("Password reset requested for email: %s", email)
     user = db.query(User).filter(User.email == email).first()
     
     if not user:
         # We return success even if user not found to prevent user enumeration
-        logger.info(f"Email {email} not found, but returning success for security")
+        logger.info("Email %s not found, but returning success for security", email)
         return {"message": "Recovery email sent if the account exists"}
 
     token = serializer.dumps(email, salt=SALT)
@@ -904,11 +2686,12 @@ async def forgot_password(
     )
 
     fm = FastMail(conf)
+    EMAILS_ENQUEUED.inc(("password_reset",))
     try:
         await fm.send_message(message, template_name="password_reset_email.html")
-        logger.info(f"HTML reset email sent to {email}")
+        logger.info("HTML reset email sent to %s", email)
     except Exception as e:
-        logger.error(f"Failed to send email: {e}")
+        logger.error("Failed to send email: %s", e)
         raise HTTPException(status_code=500, detail="Failed to send email")
 
     return {"message": "Recovery email sent"}
@@ -931,7 +2714,7 @@ def reset_password(
 
     user.password = hash_password(new_password)
     db.commit()
-    logger.info(f"Password updated for user: {email}")
+    logger.info("Password updated for user: %s", email)
 
     return {"message": "Password updated successfully"}
 
@@ -943,36 +2726,36 @@ def login(
     db: Session = Depends(get_db)
 ):
     username = username.strip().lower()
-    logger.info(f"Login attempt for user: {username}")
+    logger.info("Login attempt for user: %s", username)
     user = db.query(User).filter(User.username == username).first()
     if not user or not verify_password(password, user.password):
-        logger.warning(f"Login failed: Invalid credentials for user '{username}'")
+        logger.warning("Login failed: Invalid credentials for user '%s'", username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Invalid credentials"
         )
     
     if user.verification_status != "Approved":
-        logger.warning(f"Login denied: User '{username}' is {user.verification_status}")
+        logger.warning("Login denied: User '%s' is %s", username, user.verification_status)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Account is {user.verification_status}. Please wait for admin verification."
         )
 
     request.session["user_id"] = user.id
-    logger.info(f"User '{username}' logged in successfully (ID: {user.id})")
+    logger.info("User '%s' logged in successfully (ID: %s)", username, user.id)
     return {"message": "Login successful"}
 
 @app.post("/logout", response_model=dict, tags=["Auth"])
 def logout(request: Request):
     user_id = request.session.get("user_id")
     request.session.clear()
-    logger.info(f"User ID {user_id} logged out")
+    logger.info("User ID %s logged out", user_id)
     return {"message": "Logged out successfully"}
 
 @app.get("/profile", response_model=ProfileResponse, tags=["Profile"])
-def get_profile(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    logger.info(f"Fetching profile for user: {user.username}")
+def get_profile(user: User = Depends(get_current_user_read), db: Session = Depends(get_read_db)):
+    logger.info("Fetching profile for user: %s", user.username)
     donations = db.query(Donation).filter(Donation.user_id == user.id).all()
     impact = calculate_user_impact(user.id, db)
     
@@ -986,8 +2769,8 @@ def get_profile(user: User = Depends(get_current_user), db: Session = Depends(ge
     }
 
 @app.get("/profile/badges", response_model=List[BadgeResponse], tags=["Profile"])
-def get_user_badges(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    logger.info(f"Fetching enriched badges for user: {user.username}")
+def get_user_badges(user: User = Depends(get_current_user_read), db: Session = Depends(get_read_db)):
+    logger.info("Fetching enriched badges for user: %s", user.username)
     user_badges = db.query(UserBadge).filter(UserBadge.user_id == user.id).all()
     
     enriched_badges = []
@@ -1012,7 +2795,7 @@ def get_user_badges(user: User = Depends(get_current_user), db: Session = Depend
 
 @app.patch("/profile", response_model=UserResponse, tags=["Profile"])
 def patch_profile(update: UserUpdate, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    logger.info(f"Patching profile for user: {user.username}")
+    logger.info("Patching profile for user: %s", user.username)
     if update.username is not None:
         user.username = update.username.strip().lower()
     if update.email is not None:
@@ -1023,17 +2806,19 @@ def patch_profile(update: UserUpdate, user: User = Depends(get_current_user), db
         user.phone_number = update.phone_number
     db.commit()
     db.refresh(user)
+    invalidate_chat_context(user_id=user.id)
     return user
 
 @app.put("/profile", response_model=UserResponse, tags=["Profile"])
 def put_profile(update: UserUpdate, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    logger.info(f"Updating profile for user: {user.username}")
+    logger.info("Updating profile for user: %s", user.username)
     user.username = update.username.strip().lower() if update.username else user.username
     user.email = update.email.strip().lower() if update.email else user.email
     user.address = update.address if update.address else user.address
     user.phone_number = update.phone_number if update.phone_number else user.phone_number
     db.commit()
     db.refresh(user)
+    invalidate_chat_context(user_id=user.id)
     return user
 
 # -------------------------------------------------
@@ -1049,11 +2834,16 @@ async def ngo_register(
     address_proof: str = Form(...),
     address: Optional[str] = Form(None),
     phone_number: Optional[str] = Form(None),
+    lat: Optional[float] = Form(None),
+    lng: Optional[float] = Form(None),
+    capacity_kg: Optional[float] = Form(None),
+    accepted_food_types: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
     name = name.strip()
     email = email.strip().lower()
-    logger.info(f"Registering NGO: {name} ({email})")
+    logger.info("Registering NGO: %s (%s)", name, email)
+    lat, lng = coordinate_input(lat, 90), coordinate_input(lng, 180)
     
     if db.query(NGO).filter((NGO.name == name) | (NGO.email == email)).first():
         raise HTTPException(
@@ -1070,10 +2860,15 @@ async def ngo_register(
         address_proof=address_proof,
         registration_status="Applied",
         address=address,
-        phone_number=phone_number
+        phone_number=phone_number,
+        lat=lat,
+        lng=lng,
+        capacity_kg=capacity_kg,
+        accepted_food_types=accepted_food_types
     )
     db.add(new_ngo)
     db.commit()
+    sync_ngo_index(new_ngo)
     return {"message": "NGO registered and application status: Applied"}
 
 @app.post("/ngo/login", response_model=dict, tags=["NGO"])
@@ -1084,7 +2879,7 @@ def ngo_login(
     db: Session = Depends(get_db)
 ):
     email = email.strip().lower()
-    logger.info(f"NGO Login attempt for: {email}")
+    logger.info("NGO Login attempt for: %s", email)
     ngo = db.query(NGO).filter(NGO.email == email).first()
     
     if not ngo or not verify_password(password, ngo.password):
@@ -1094,7 +2889,7 @@ def ngo_login(
         )
 
     request.session["ngo_id"] = ngo.id
-    logger.info(f"NGO '{ngo.name}' logged in successfully (ID: {ngo.id})")
+    logger.info("NGO '%s' logged in successfully (ID: %s)", ngo.name, ngo.id)
     return {"message": "NGO Login successful"}
 
 @app.get("/ngo/profile", response_model=NGOResponse, tags=["NGO"])
@@ -1103,7 +2898,7 @@ def ngo_profile(ngo: NGO = Depends(get_current_ngo)):
 
 @app.patch("/ngo/profile", response_model=NGOResponse, tags=["NGO"])
 def patch_ngo_profile(update: NGOUpdate, ngo: NGO = Depends(get_current_ngo), db: Session = Depends(get_db)):
-    logger.info(f"Patching NGO profile for: {ngo.name}")
+    logger.info("Patching NGO profile for: %s", ngo.name)
     if update.name is not None:
         ngo.name = update.name.strip()
     if update.email is not None:
@@ -1118,13 +2913,23 @@ def patch_ngo_profile(update: NGOUpdate, ngo: NGO = Depends(get_current_ngo), db
         ngo.address = update.address
     if update.phone_number is not None:
         ngo.phone_number = update.phone_number
+    if update.lat is not None:
+        ngo.lat = coordinate_input(update.lat, 90)
+    if update.lng is not None:
+        ngo.lng = coordinate_input(update.lng, 180)
+    if update.capacity_kg is not None:
+        ngo.capacity_kg = update.capacity_kg
+    if update.accepted_food_types is not None:
+        ngo.accepted_food_types = update.accepted_food_types
     db.commit()
     db.refresh(ngo)
+    invalidate_chat_context(ngo_id=ngo.id)
+    sync_ngo_index(ngo)
     return ngo
 
 @app.put("/ngo/profile", response_model=NGOResponse, tags=["NGO"])
 def put_ngo_profile(update: NGOUpdate, ngo: NGO = Depends(get_current_ngo), db: Session = Depends(get_db)):
-    logger.info(f"Updating NGO profile for: {ngo.name}")
+    logger.info("Updating NGO profile for: %s", ngo.name)
     ngo.name = update.name.strip() if update.name else ngo.name
     ngo.email = update.email.strip().lower() if update.email else ngo.email
     ngo.ngo_type = update.ngo_type if update.ngo_type else ngo.ngo_type
@@ -1132,10 +2937,114 @@ def put_ngo_profile(update: NGOUpdate, ngo: NGO = Depends(get_current_ngo), db:
     ngo.address_proof = update.address_proof if update.address_proof else ngo.address_proof
     ngo.address = update.address if update.address else ngo.address
     ngo.phone_number = update.phone_number if update.phone_number else ngo.phone_number
+    ngo.lat = coordinate_input(update.lat, 90) if update.lat is not None else ngo.lat
+    ngo.lng = coordinate_input(update.lng, 180) if update.lng is not None else ngo.lng
+    ngo.capacity_kg = update.capacity_kg if update.capacity_kg is not None else ngo.capacity_kg
+    ngo.accepted_food_types = update.accepted_food_types if update.accepted_food_types else ngo.accepted_food_types
     db.commit()
     db.refresh(ngo)
+    invalidate_chat_context(ngo_id=ngo.id)
+    sync_ngo_index(ngo)
     return ngo
 
+PICKUP_ROUTE_MAX_STOPS = int(os.getenv("PICKUP_ROUTE_MAX_STOPS", 200))
+PICKUP_SERVICE_MINUTES = float(os.getenv("PICKUP_SERVICE_MINUTES", 5))
+
+@app.post("/ngo/pickup-route", response_model=PickupRouteResponse, tags=["NGO"])
+def plan_pickup_route(payload: PickupRouteRequest, ngo: NGO = Depends(get_current_ngo), db: Session = Depends(get_db)):
+    """
+    Orders the NGO's claimed donations (or the given Available/claimed ones) into one pickup trip,
+    shortest first but keeping each pickup before its safe_until where possible.
+    """
+    lat = payload.lat if payload.lat is not None else ngo.lat
+    lng = payload.lng if payload.lng is not None else ngo.lng
+    if parse_coordinate(lat, 90) is None or parse_coordinate(lng, 180) is None:
+        raise HTTPException(status_code=400, detail="Set your NGO location or pass lat/lng to plan a route")
+
+    query = db.query(Donation)
+    if payload.donation_ids is None:
+        query = query.filter(Donation.claimed_by_ngo_id == ngo.id, Donation.status == "Claimed")
+    else:
+        if len(payload.donation_ids) > PICKUP_ROUTE_MAX_STOPS:
+            raise HTTPException(status_code=400, detail=f"At most {PICKUP_ROUTE_MAX_STOPS} donations per route")
+        query = query.filter(
+            Donation.id.in_(payload.donation_ids),
+            (Donation.status == "Available") | ((Donation.status == "Claimed") & (Donation.claimed_by_ngo_id == ngo.id))
+        )
+    donations = query.limit(PICKUP_ROUTE_MAX_STOPS).all()
+
+    now = datetime.now(timezone.utc)
+    by_id = {}
+    stops = []
+    for donation in donations:
+        stop_lat = parse_coordinate(donation.lat, 90)
+        stop_lng = parse_coordinate(donation.lng, 180)
+        if stop_lat is None or stop_lng is None:
+            continue
+        by_id[donation.id] = donation
+        stops.append(Stop(donation.id, stop_lat, stop_lng, hours_left(donation.safe_until, now)))
+    requested = payload.donation_ids if payload.donation_ids is not None else [d.id for d in donations]
+    skipped = [donation_id for donation_id in dict.fromkeys(requested) if donation_id not in by_id]
+
+    started = time.perf_counter()
+    speed_kmh = payload.speed_kmh if payload.speed_kmh and payload.speed_kmh > 0 else NGO_PICKUP_SPEED_KMH
+    route = plan_route(lat, lng, stops, speed_kmh=speed_kmh, service_minutes=PICKUP_SERVICE_MINUTES)
+    planned_in_ms = (time.perf_counter() - started) * 1000
+    logger.info("Planned %s-stop pickup route for NGO %s in %.1fms", len(stops), ngo.id, planned_in_ms)
+
+    return {
+        "total_km": round(route.total_km, 2),
+        "total_minutes": round((route.arrival_hours[-1] * 60 + PICKUP_SERVICE_MINUTES) if stops else 0, 1),
+        "stops": [
+            {
+                "donation_id": stop.id,
+                "food": by_id[stop.id].food,
+                "quantity": by_id[stop.id].quantity,
+                "location": by_id[stop.id].location,
+                "status": by_id[stop.id].status,
+                "lat": stop.lat,
+                "lng": stop.lng,
+                "leg_km": round(leg, 2),
+                "eta": now + timedelta(hours=arrival),
+                "safe_until": by_id[stop.id].safe_until,
+                "late": late,
+            }
+            for stop, leg, arrival, late in zip(route.stops, route.legs_km, route.arrival_hours, route.late)
+        ],
+        "skipped": skipped,
+        "planned_in_ms": round(planned_in_ms, 2)
+    }
+
+NGO_NEARBY_MAX_RADIUS_KM = float(os.getenv("NGO_NEARBY_MAX_RADIUS_KM", 100))
+
+@app.get("/ngos/nearby", response_model=NearbyNGOResponse, tags=["General"])
+def get_nearby_ngos(lat: float, lng: float, radius_km: float = 10, limit: int = 50):
+    """Approved NGOs within radius_km of a point, nearest first, served from the in-memory NGO index."""
+    if parse_coordinate(lat, 90) is None or parse_coordinate(lng, 180) is None:
+        raise HTTPException(status_code=400, detail="Invalid coordinates")
+    radius_km = max(0.1, min(radius_km, NGO_NEARBY_MAX_RADIUS_KM))
+    limit = max(1, min(limit, 200))
+    nearby = ngo_index.nearest(lat, lng, limit, radius_km)
+    return {
+        "radius_km": radius_km,
+        "count": len(nearby),
+        "ngos": [
+            {
+                "id": entry.id,
+                "name": entry.name,
+                "ngo_type": entry.ngo_type,
+                "address": entry.address,
+                "phone_number": entry.phone_number,
+                "lat": entry.lat,
+                "lng": entry.lng,
+                "distance_km": round(distance, 2),
+                "capacity_kg": entry.capacity_kg,
+                "accepted_food_types": list(entry.food_types),
+            }
+            for distance, entry in nearby
+        ]
+    }
+
 # -------------------------------------------------
 # DONATION ROUTE
 # -------------------------------------------------
@@ -1152,7 +3061,7 @@ def donate_food(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    logger.info(f"User {user.username} (ID: {user.id}) is donating: {text}")
+    logger.info("User %s (ID: %s) is donating: %s", user.username, user.id, LogPayload(text))
     parsed = parse_food_text(text, cooked_at=cooked_at)
 
     donation = Donation(
@@ -1161,26 +3070,151 @@ def donate_food(
         food=parsed.food or "unknown",
         quantity=parsed.quantity or "unknown",
         location=parsed.location or "unknown",
-        safe_until=parsed.safe_until,
-        cooked_at=parsed.cooked_at or cooked_at,
-        lat=lat,
-        lng=lng,
+        safe_until=parse_timestamp(parsed.safe_until),
+        cooked_at=parse_timestamp(parsed.cooked_at) or parse_timestamp(cooked_at),
+        lat=coordinate_input(lat, 90),
+        lng=coordinate_input(lng, 180),
         price=parsed.price or 0,
         is_ngo_only=parsed.is_ngo_only or False
     )
 
     db.add(donation)
+    db.flush()
+    record_rollup(db, donation, donations=1)
     db.commit()
+    invalidate_chat_context(user_id=user.id)
     db.refresh(donation)
     
     # Check for badges (Annadātā, Friendly Helper, Kind Heart etc.)
     check_and_unlock_badges(user.id, db, background_tasks)
 
-    logger.info(f"Donation created successfully: ID {donation.id}")
-    return {
+    logger.info("Donation created successfully: ID %s", donation.id)
+    response = {
         "donation_id": donation.id,
         "cleaned": parsed.model_dump()
     }
+    if donation.is_ngo_only:
+        response["matched_ngos"] = [match.as_dict() for match in match_ngos_for_donation(donation, db)]
+    return response
+
+CLAIM_BATCH_MAX = int(os.getenv("CLAIM_BATCH_MAX", 100))
+
+@app.post("/donations/claim", response_model=ClaimBatchResponse, tags=["Donations"])
+def claim_donations(
+    payload: ClaimBatchRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Claim several donations at once. All still-available ones are claimed by a single UPDATE,
+    each donor gets one OTP covering all of their items, and one email goes to each party.
+    """
+    user_id = request.session.get("user_id")
+    ngo_id = request.session.get("ngo_id")
+    if not user_id and not ngo_id:
+        raise HTTPException(status_code=401, detail="Must be logged in as User or NGO to claim")
+
+    donation_ids = list(dict.fromkeys(payload.donation_ids))
+    if len(donation_ids) > CLAIM_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {CLAIM_BATCH_MAX} donations per claim")
+
+    if ngo_id:
+        claimer = db.query(NGO).filter(NGO.id == ngo_id).first()
+        claimer_name = claimer.name if claimer else None
+        ngo_approved = bool(claimer) and claimer.registration_status == "Approved"
+    else:
+        claimer = db.query(User).filter(User.id == user_id).first()
+        claimer_name = claimer.username if claimer else None
+        ngo_approved = False
+    if not claimer:
+        raise HTTPException(status_code=401, detail="Invalid session")
+
+    found = {d.id: d for d in db.query(Donation).filter(Donation.id.in_(donation_ids))}
+    not_found = [i for i in donation_ids if i not in found]
+    unavailable = [i for i in donation_ids if i in found and found[i].status != "Available"]
+    restricted = [
+        i for i in donation_ids
+        if i in found and found[i].status == "Available" and found[i].is_ngo_only and not ngo_approved
+    ]
+    candidates = [i for i in donation_ids if i in found and i not in unavailable and i not in restricted]
+    logger.info("%s %s is claiming %s donations", "NGO ID" if ngo_id else "User ID", ngo_id or user_id, len(candidates))
+
+    claimed: List[int] = []
+    otps = {}
+    if candidates:
+        otps = {found[i].user_id: "".join(random.choices(string.digits, k=6)) for i in candidates}
+        otp_created_at = datetime.now(timezone.utc)
+        claim = update(Donation).where(
+            Donation.id.in_(candidates),
+            Donation.status == "Available"
+        ).values(
+            status="Claimed",
+            claim_secret=case(otps, value=Donation.user_id),
+            otp_created_at=otp_created_at,
+            claimed_by_ngo_id=ngo_id if ngo_id else None,
+            claimed_by_user_id=None if ngo_id else user_id
+        ).execution_options(synchronize_session=False)
+        if db.get_bind().dialect.update_returning:
+            claimed = [row[0] for row in db.execute(claim.returning(Donation.id))]
+        else:
+            db.execute(claim)
+            claimer_column = Donation.claimed_by_ngo_id if ngo_id else Donation.claimed_by_user_id
+            claimed = [row[0] for row in db.query(Donation.id).filter(
+                Donation.id.in_(candidates),
+                claimer_column == (ngo_id or user_id),
+                Donation.otp_created_at == otp_created_at
+            )]
+        claimed_set = set(claimed)
+        claimed = [i for i in candidates if i in claimed_set]
+
+        # One rollup upsert per (day, donor, city) bucket rather than per donation.
+        deltas: Dict[tuple, dict] = {}
+        for donation_id in claimed:
+            donation = found[donation_id]
+            key = rollup_key(donation)
+            bucket = deltas.setdefault(tuple(key.values()), {"key": key, "claimed": 0, "kg": 0.0})
+            bucket["claimed"] += 1
+            bucket["kg"] += parse_kg(donation.quantity)
+        for bucket in deltas.values():
+            _upsert_rollup(db, bucket["key"], {"claimed": bucket["claimed"], "kg": bucket["kg"]})
+        db.commit()
+
+    lost = [i for i in candidates if i not in set(claimed)]
+    if lost:
+        logger.info("Lost %s donations to concurrent claimers: %s", len(lost), lost)
+
+    if claimed:
+        if ngo_id:
+            ngo_dashboard_cache.invalidate(ngo_id)
+        items_by_donor: Dict[int, List[Donation]] = {}
+        for donation_id in claimed:
+            items_by_donor.setdefault(found[donation_id].user_id, []).append(found[donation_id])
+        donors = {u.id: u for u in db.query(User).filter(User.id.in_(list(items_by_donor)))}
+        groups = []
+        for donor_id, items in items_by_donor.items():
+            invalidate_chat_context(user_id=donor_id)
+            food_names = ", ".join(d.food or "Donation" for d in items)
+            donor = donors.get(donor_id)
+            if donor:
+                enqueue_email(background_tasks, send_donation_otp_email, donor.email, otps[donor_id], food_names, claimer_name)
+            groups.append({
+                "donor_name": donor.username if donor else "Donor",
+                "food_names": food_names,
+                "otp": otps[donor_id],
+                "items": len(items)
+            })
+        enqueue_email(background_tasks, send_claim_batch_email, claimer.email, claimer_name, groups)
+        check_and_unlock_badges(user_id or ngo_id, db, background_tasks)
+
+    return {
+        "message": f"Claimed {len(claimed)} of {len(donation_ids)} donations. Check your email for the OTP verification codes.",
+        "claimed": claimed,
+        "lost": lost,
+        "unavailable": unavailable,
+        "restricted": restricted,
+        "not_found": not_found
+    }
 
 @app.post("/donations/{donation_id}/claim", response_model=dict, tags=["Donations"])
 def claim_donation(
@@ -1214,23 +3248,25 @@ def claim_donation(
             raise HTTPException(status_code=403, detail="Only Approved NGOs can claim restricted donations. Please wait for admin verification.")
 
         # NGOs get it for free
-        logger.info(f"NGO ID {ngo_id} ({ngo.name}) is claiming NGO-only donation ID: {donation_id}")
+        logger.info("NGO ID %s (%s) is claiming NGO-only donation ID: %s", ngo_id, ngo.name, donation_id)
     else:
         # Public donation
         if user_id:
-             logger.info(f"User ID {user_id} is claiming public donation ID: {donation_id}")
+             logger.info("User ID %s is claiming public donation ID: %s", user_id, donation_id)
         elif ngo_id:
-             logger.info(f"NGO ID {ngo_id} is claiming public donation ID: {donation_id}")
+             logger.info("NGO ID %s is claiming public donation ID: %s", ngo_id, donation_id)
     
     # Generate OTP
     otp = "".join(random.choices(string.digits, k=6))
     
     donation.status = "Claimed"
     donation.claim_secret = otp
-    donation.otp_created_at = datetime.utcnow().isoformat()
+    donation.otp_created_at = datetime.now(timezone.utc)
+    record_rollup(db, donation, claimed=1)
     
     if ngo_id:
         donation.claimed_by_ngo_id = ngo_id
+        ngo_dashboard_cache.invalidate(ngo_id)
         claimer = db.query(NGO).filter(NGO.id == ngo_id).first()
         claimer_name = claimer.name
         claimer_email = claimer.email
@@ -1241,18 +3277,22 @@ def claim_donation(
         claimer_email = claimer.email
         
     db.commit()
+    invalidate_chat_context(user_id=donation.user_id)
     
     # Send OTP to Donor and Claimer
     donor = db.query(User).filter(User.id == donation.user_id).first()
     if donor:
-        background_tasks.add_task(send_donation_otp_email, donor.email, otp, donation.food, claimer_name)
-    background_tasks.add_task(send_donation_otp_email, claimer_email, otp, donation.food, claimer_name)
+        enqueue_email(background_tasks, send_donation_otp_email, donor.email, otp, donation.food, claimer_name)
+    enqueue_email(background_tasks, send_donation_otp_email, claimer_email, otp, donation.food, claimer_name)
 
     # Check for badges
     check_and_unlock_badges(user_id or ngo_id, db, background_tasks)
 
     return {"message": "Donation claimed successfully. Check your email for the OTP verification code."}
 
+# A claim OTP must be verified within this long of being issued.
+CLAIM_OTP_TTL = timedelta(hours=float(os.getenv("CLAIM_OTP_TTL_HOURS", 1)))
+
 @app.post("/donations/{donation_id}/verify", response_model=dict, tags=["Donations"])
 def verify_donation_claim(
     donation_id: int,
@@ -1261,106 +3301,266 @@ def verify_donation_claim(
     db: Session = Depends(get_db)
 ):
     """Verify the OTP to complete the donation handover."""
+    # The happy path is one conditional UPDATE on the primary key: right donor, still Claimed,
+    # matching OTP issued within the last CLAIM_OTP_TTL. Only a miss loads the row to explain why.
+    completed = db.query(Donation).filter(
+        Donation.id == donation_id,
+        Donation.user_id == user.id,
+        Donation.status == "Claimed",
+        Donation.claim_secret == otp,
+        or_(Donation.otp_created_at.is_(None), Donation.otp_created_at >= datetime.now(timezone.utc) - CLAIM_OTP_TTL)
+    ).update({Donation.status: "Completed"}, synchronize_session=False)
+
     donation = db.query(Donation).filter(Donation.id == donation_id).first()
-    if not donation:
-        raise HTTPException(status_code=404, detail="Donation not found")
-        
-    # Only Donor or Claimer can verify (in this design, we trust the Donor to output the code or Claimer to provide it)
-    # Ideally, the Donor enters the code given by Claimer.
-    if donation.user_id != user.id:
-         raise HTTPException(status_code=403, detail="Only the donor can verify the handover")
-         
-    if donation.status != "Claimed":
-        raise HTTPException(status_code=400, detail=f"Donation is in {donation.status} state")
-        
-    # Check OTP
-    if donation.claim_secret != otp:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-        
-    # Check Expiry (1 hour)
-    if donation.otp_created_at:
-        created_at = datetime.fromisoformat(donation.otp_created_at)
-        if datetime.utcnow() - created_at > timedelta(hours=1):
-            donation.status = "Available" # Reset? Or Expired? Let's reset to Available so someone else can claim.
-            donation.claim_secret = None
-            donation.claimed_by_user_id = None
-            donation.claimed_by_ngo_id = None
-            db.commit()
-            raise HTTPException(status_code=400, detail="OTP Expired. Donation has been made available again.")
+    if not completed:
+        if not donation:
+            raise HTTPException(status_code=404, detail="Donation not found")
+
+        # Only Donor or Claimer can verify (in this design, we trust the Donor to output the code or Claimer to provide it)
+        # Ideally, the Donor enters the code given by Claimer.
+        if donation.user_id != user.id:
+             raise HTTPException(status_code=403, detail="Only the donor can verify the handover")
+
+        if donation.status != "Claimed":
+            raise HTTPException(status_code=400, detail=f"Donation is in {donation.status} state")
+
+        # Check OTP
+        if donation.claim_secret != otp:
+            raise HTTPException(status_code=400, detail="Invalid OTP")
+
+        # Right OTP, so it has expired
+        ngo_dashboard_cache.invalidate(donation.claimed_by_ngo_id)
+        donation.status = "Available" # Reset? Or Expired? Let's reset to Available so someone else can claim.
+        donation.claim_secret = None
+        donation.claimed_by_user_id = None
+        donation.claimed_by_ngo_id = None
+        record_rollup(db, donation, claimed=-1)
+        db.commit()
+        invalidate_chat_context(user_id=donation.user_id)
+        raise HTTPException(status_code=400, detail="OTP Expired. Donation has been made available again.")
 
-    donation.status = "Completed"
+    record_rollup(db, donation, completed=1)
+    ngo_dashboard_cache.invalidate(donation.claimed_by_ngo_id)
     db.commit()
+    invalidate_chat_context(user_id=donation.user_id)
     
     return {"message": "Donation verified and completed successfully!"}
 
-@app.get("/donations", response_model=List[DonationResponse], tags=["Donations"])
-def get_all_donations(db: Session = Depends(get_db)):
-    # Lazy Expiration Logic
-    now_iso = datetime.utcnow().isoformat()
-    available_donations = db.query(Donation).filter(Donation.status == "Available").all()
-    
-    expired_count = 0
-    for d in available_donations:
-        if d.safe_until and d.safe_until < now_iso:
-            d.status = "Expired"
-            expired_count += 1
-    
-    if expired_count > 0:
-        db.commit()
-        logger.info(f"Lazily expired {expired_count} donations")
+# Feed ordering. sort=priority scores each donation as
+#   URGENCY_WEIGHT * min(hours left / URGENCY_HORIZON_HOURS, 1) + DISTANCE_WEIGHT * (distance / radius)^2
+# lowest first, entirely in SQL. Unknown safe_until counts as a full horizon; distance is
+# squared so the expression stays plain arithmetic on every backend.
+FEED_URGENCY_WEIGHT = 0.6
+FEED_DISTANCE_WEIGHT = 0.4
+FEED_URGENCY_HORIZON_HOURS = float(os.getenv("FEED_URGENCY_HORIZON_HOURS", 12))
+FEED_MAX_RADIUS_KM = float(os.getenv("FEED_MAX_RADIUS_KM", 100))
+FEED_MAX_LIMIT = int(os.getenv("FEED_MAX_LIMIT", 1000))
+
+def donation_distance_sq(lat: float, lng: float):
+    """SQL expression for the squared equirectangular distance (km^2) from (lat, lng) to a donation."""
+    dy = (Donation.lat - lat) * KM_PER_DEGREE_LAT
+    dx = (Donation.lng - lng) * (KM_PER_DEGREE_LAT * math.cos(math.radians(lat)))
+    return dx * dx + dy * dy
+
+def epoch_seconds_sql(column, dialect: str):
+    """SQL expression for a UTCDateTime column as Unix seconds."""
+    if dialect == "postgresql":
+        return extract("epoch", column)
+    return (func.julianday(column) - 2440587.5) * 86400
+
+def within_radius(query, lat: Optional[float], lng: Optional[float], radius_km: float, max_radius_km: float):
+    """Restrict a Donation query to radius_km around (lat, lng); unchanged when both are None."""
+    if lat is None and lng is None:
+        return query, radius_km
+    if parse_coordinate(lat, 90) is None or parse_coordinate(lng, 180) is None:
+        raise HTTPException(status_code=400, detail="Invalid coordinates")
+    radius_km = max(0.1, min(radius_km, max_radius_km))
+    return query.filter(
+        Donation.lat.isnot(None), Donation.lng.isnot(None), donation_distance_sq(lat, lng) <= radius_km * radius_km
+    ), radius_km
+
+class Throttle:
+    """Lets one caller through per interval in this process; callers in between skip instead of waiting."""
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def ready(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            if now < self.next_at:
+                return False
+            self.next_at = now + self.interval_seconds
+            return True
+
+# The feed hides donations past safe_until itself, so marking them Expired (for dashboards and
+# counts) only has to happen now and then, not as a primary write on every feed read.
+FEED_EXPIRY_INTERVAL_SECONDS = float(os.getenv("FEED_EXPIRY_INTERVAL_SECONDS", 60))
+feed_expiry_throttle = Throttle(FEED_EXPIRY_INTERVAL_SECONDS)
+
+def expire_stale_donations(now: datetime) -> int:
+    """Lazy expiry: mark Available donations past safe_until as Expired, on the primary."""
+    db = SessionLocal()
+    try:
+        expired_count = db.query(Donation).filter(
+            Donation.status == "Available",
+            Donation.safe_until < now
+        ).update({Donation.status: "Expired"}, synchronize_session=False)
+        if expired_count > 0:
+            db.commit()
+            logger.info("Lazily expired %s donations", expired_count)
+        return expired_count
+    finally:
+        db.close()
 
-    return db.query(Donation).filter(Donation.status == "Available").all()
+@app.get("/donations", response_model=List[DonationResponse], tags=["Donations"])
+def get_all_donations(
+    sort: Optional[Literal["urgency", "priority"]] = None,
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: float = 10,
+    limit: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Available donations. sort=urgency lists the food that spoils soonest first; sort=priority
+    (needs lat/lng) weighs that against distance. lat/lng also limit the feed to radius_km.
+    """
+    now = datetime.now(timezone.utc)
+    if feed_expiry_throttle.ready():
+        expire_stale_donations(now)
+
+    # Expiry is throttled (and the replica may lag it), so filter out stale food here as well.
+    query = db.query(Donation).filter(
+        Donation.status == "Available",
+        or_(Donation.safe_until.is_(None), Donation.safe_until >= now)
+    )
+    query, radius_km = within_radius(query, lat, lng, radius_km, FEED_MAX_RADIUS_KM)
+    if sort == "priority":
+        if lat is None:
+            raise HTTPException(status_code=400, detail="sort=priority needs lat and lng")
+        now_epoch = now.timestamp()
+        hours = (epoch_seconds_sql(Donation.safe_until, db.get_bind().dialect.name) - now_epoch) / 3600
+        urgency = func.coalesce(hours, FEED_URGENCY_HORIZON_HOURS) / FEED_URGENCY_HORIZON_HOURS
+        score = (
+            FEED_URGENCY_WEIGHT * case((urgency > 1, 1.0), else_=urgency)
+            + FEED_DISTANCE_WEIGHT * donation_distance_sq(lat, lng) / (radius_km * radius_km)
+        )
+        query = query.order_by(score, Donation.id)
+    elif sort == "urgency":
+        query = query.order_by(Donation.safe_until.asc().nulls_last(), Donation.id)
+    if limit is not None:
+        query = query.limit(max(1, min(limit, FEED_MAX_LIMIT)))
+    return donation_list_response(query)
+
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 200))
+SEARCH_MAX_RADIUS_KM = float(os.getenv("SEARCH_MAX_RADIUS_KM", 100))
+
+@app.get("/donations/search", response_model=List[DonationResponse], tags=["Donations"])
+def search_donations(
+    q: str = Query(..., min_length=1, max_length=200),
+    status_filter: Optional[str] = Query("Available", alias="status"),
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: float = 10,
+    sort: Literal["newest", "relevance"] = "newest",
+    limit: int = 50,
+    db: Session = Depends(get_db)
+):
+    """
+    Donations whose food, text or location match every word of `q` (prefixes and other
+    spellings of known foods count). Text, status and distance are filtered in one query;
+    pass status= empty to search every status. Newest first, or best match first with
+    sort=relevance.
+    """
+    terms = query_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query has no searchable words")
+    limit = max(1, min(limit, SEARCH_MAX_RESULTS))
+    query = db.query(Donation)
+
+    if SEARCH_BACKEND == "fts5":
+        match = text("donations_fts MATCH :match").bindparams(match=fts5_query(terms))
+        if sort == "relevance":
+            query = query.join(fts_table, fts_table.c.rowid == Donation.id).filter(match).order_by(fts_table.c.rank)
+        else:
+            # As a set lookup SQLite walks donations newest-first and stops at `limit`, instead
+            # of joining and sorting every match (5x faster for broad words like "rice").
+            query = query.filter(Donation.id.in_(select(fts_table.c.rowid).where(match)))
+    elif SEARCH_BACKEND == "tsvector":
+        match = tsquery(terms)
+        query = query.filter(text("donations.search_vector @@ to_tsquery('simple', :match)").bindparams(match=match))
+        if sort == "relevance":
+            query = query.order_by(text("ts_rank(donations.search_vector, to_tsquery('simple', :match)) DESC").bindparams(match=match))
+    else:
+        columns = (Donation.food, Donation.raw_text, Donation.location)
+        for typed, spellings in terms:
+            patterns = [f"%{word}%" for word in (typed,) + spellings]
+            query = query.filter(or_(*(column.ilike(pattern) for column in columns for pattern in patterns)))
+    query = query.order_by(Donation.id.desc())
+
+    if status_filter:
+        query = query.filter(Donation.status == status_filter)
+        if status_filter == "Available":
+            # Not yet lazily expired by GET /donations, but already past safe_until.
+            query = query.filter(or_(Donation.safe_until.is_(None), Donation.safe_until >= datetime.now(timezone.utc)))
+    query, _ = within_radius(query, lat, lng, radius_km, SEARCH_MAX_RADIUS_KM)
+    return donation_list_response(query.limit(limit))
 
 @app.get("/my-donations", response_model=List[DonationResponse], tags=["Profile"])
 def my_donations(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    logger.info(f"Fetching donations for user: {user.username}")
-    return db.query(Donation).filter(Donation.user_id == user.id).all()
+    logger.info("Fetching donations for user: %s", user.username)
+    return donation_list_response(db.query(Donation).filter(Donation.user_id == user.id))
 
 @app.patch("/donations/{donation_id}", response_model=DonationResponse, tags=["Donations"])
 def patch_donation(donation_id: int, update: DonationUpdate, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    logger.info(f"Patching donation ID: {donation_id} for user: {user.username}")
+    logger.info("Patching donation ID: %s for user: %s", donation_id, user.username)
     donation = db.query(Donation).filter(Donation.id == donation_id, Donation.user_id == user.id).first()
     if not donation:
         raise HTTPException(status_code=404, detail="Donation not found or not owned by you")
     if donation.status != "Available":
         raise HTTPException(status_code=400, detail="Cannot update a claimed or completed donation")
+    old_city = donation_city(donation.location)
 
     if update.text is not None:
         donation.raw_text = update.text
         # Re-parse if text changed
-        new_cooked_at = update.cooked_at if update.cooked_at else donation.cooked_at
+        new_cooked_at = update.cooked_at if update.cooked_at else (donation.cooked_at.isoformat() if donation.cooked_at else None)
         parsed = parse_food_text(update.text, cooked_at=new_cooked_at)
         donation.food = parsed.food or "unknown"
         donation.quantity = parsed.quantity or "unknown"
         donation.price = parsed.price or 0
         donation.is_ngo_only = parsed.is_ngo_only or False
-        donation.safe_until = parsed.safe_until
-        donation.cooked_at = parsed.cooked_at or new_cooked_at
+        donation.safe_until = parse_timestamp(parsed.safe_until)
+        donation.cooked_at = parse_timestamp(parsed.cooked_at) or parse_timestamp(new_cooked_at)
 
     if update.location is not None:
         donation.location = update.location
     if update.lat is not None:
-        donation.lat = update.lat
+        donation.lat = coordinate_input(update.lat, 90)
     if update.lng is not None:
-        donation.lng = update.lng
+        donation.lng = coordinate_input(update.lng, 180)
     if update.price is not None:
         donation.price = update.price
     if update.cooked_at is not None and update.text is None:
         # If only cooked_at is updated, re-calculate safety with existing text
-        donation.cooked_at = update.cooked_at
+        donation.cooked_at = parse_timestamp(update.cooked_at)
         parsed = parse_food_text(donation.raw_text, cooked_at=update.cooked_at)
-        donation.safe_until = parsed.safe_until
+        donation.safe_until = parse_timestamp(parsed.safe_until)
 
+    move_rollup_city(db, donation, old_city)
     db.commit()
+    invalidate_chat_context(user_id=user.id)
     db.refresh(donation)
     return donation
 
 @app.put("/donations/{donation_id}", response_model=DonationResponse, tags=["Donations"])
 def put_donation(donation_id: int, update: DonationUpdate, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    logger.info(f"Updating donation ID: {donation_id} for user: {user.username}")
+    logger.info("Updating donation ID: %s for user: %s", donation_id, user.username)
     donation = db.query(Donation).filter(Donation.id == donation_id, Donation.user_id == user.id).first()
     if not donation:
         raise HTTPException(status_code=404, detail="Donation not found or not owned by you")
@@ -1369,6 +3569,7 @@ def put_donation(donation_id: int, update: DonationUpdate, user: User = Depends(
 
     if not update.text:
          raise HTTPException(status_code=400, detail="Text is required for full update")
+    old_city = donation_city(donation.location)
 
     donation.raw_text = update.text
     parsed = parse_food_text(update.text, cooked_at=update.cooked_at)
@@ -1377,12 +3578,14 @@ def put_donation(donation_id: int, update: DonationUpdate, user: User = Depends(
     donation.price = update.price if update.price is not None else (parsed.price or 0)
     donation.is_ngo_only = parsed.is_ngo_only or False
     donation.location = update.location if update.location else "unknown"
-    donation.lat = update.lat
-    donation.lng = update.lng
-    donation.cooked_at = parsed.cooked_at or update.cooked_at
-    donation.safe_until = parsed.safe_until
+    donation.lat = coordinate_input(update.lat, 90)
+    donation.lng = coordinate_input(update.lng, 180)
+    donation.cooked_at = parse_timestamp(parsed.cooked_at) or parse_timestamp(update.cooked_at)
+    donation.safe_until = parse_timestamp(parsed.safe_until)
 
+    move_rollup_city(db, donation, old_city)
     db.commit()
+    invalidate_chat_context(user_id=user.id)
     db.refresh(donation)
     return donation
 
@@ -1390,29 +3593,81 @@ def put_donation(donation_id: int, update: DonationUpdate, user: User = Depends(
 # ADMIN ROUTES
 # -------------------------------------------------
 @app.get("/admin/users", response_model=List[UserResponse], tags=["Admin"])
-def admin_get_users(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
-    logger.info(f"Admin {admin.username} is fetching all users")
+def admin_get_users(admin: User = Depends(get_admin_user_read), db: Session = Depends(get_read_db)):
+    logger.info("Admin %s is fetching all users", admin.username)
     return db.query(User).all()
 
 @app.get("/admin/donations", response_model=List[DonationResponse], tags=["Admin"])
-def admin_get_donations(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
-    logger.info(f"Admin {admin.username} is fetching all donations")
-    return db.query(Donation).all()
+def admin_get_donations(admin: User = Depends(get_admin_user_read), db: Session = Depends(get_read_db)):
+    logger.info("Admin %s is fetching all donations", admin.username)
+    return donation_list_response(db.query(Donation))
 
 @app.delete("/admin/donations/{donation_id}", response_model=dict, tags=["Admin"])
 def admin_delete_donation(donation_id: int, admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
-    logger.info(f"Admin {admin.username} is deleting donation ID: {donation_id}")
+    logger.info("Admin %s is deleting donation ID: %s", admin.username, donation_id)
     donation = db.query(Donation).filter(Donation.id == donation_id).first()
     if not donation:
         raise HTTPException(status_code=404, detail="Donation not found")
+    if db.get(ArchivedDonation, donation_id) is not None:
+        # Only possible for ids SQLite reused before donations was AUTOINCREMENT.
+        raise HTTPException(status_code=409, detail=f"An archived donation already has ID {donation_id}")
     
-    db.delete(donation)
+    record_rollup_removal(db, donation)
+    ngo_dashboard_cache.invalidate(donation.claimed_by_ngo_id)
+    # Soft delete: the row moves to the archive and can be restored.
+    donor_id = donation.user_id
+    move_donations(db, Donation, ArchivedDonation, [donation_id], {
+        "archived_at": datetime.now(timezone.utc), "archive_reason": ARCHIVE_REASON_DELETED,
+    })
     db.commit()
+    invalidate_chat_context(user_id=donor_id)
     return {"message": f"Donation {donation_id} deleted successfully"}
 
+@app.post("/admin/donations/{donation_id}/restore", response_model=dict, tags=["Admin"])
+def admin_restore_donation(donation_id: int, admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
+    """Undo an admin delete: move the donation back to the live table and its impact back into the rollups."""
+    logger.info("Admin %s is restoring donation ID: %s", admin.username, donation_id)
+    donation = db.query(ArchivedDonation).filter(
+        ArchivedDonation.id == donation_id, ArchivedDonation.archive_reason == ARCHIVE_REASON_DELETED
+    ).first()
+    if not donation:
+        raise HTTPException(status_code=404, detail="Deleted donation not found")
+    if db.get(Donation, donation_id) is not None:
+        # Only possible for ids SQLite reused before donations was AUTOINCREMENT.
+        raise HTTPException(status_code=409, detail=f"A live donation already has ID {donation_id}")
+
+    donor_id = donation.user_id
+    record_rollup(
+        db, donation,
+        donations=1,
+        claimed=1 if donation.status in IMPACT_STATUSES else 0,
+        completed=1 if donation.status == "Completed" else 0
+    )
+    ngo_dashboard_cache.invalidate(donation.claimed_by_ngo_id)
+    move_donations(db, ArchivedDonation, Donation, [donation_id])
+    db.commit()
+    invalidate_chat_context(user_id=donor_id)
+    return {"message": f"Donation {donation_id} restored successfully"}
+
+@app.post("/admin/archive", response_model=dict, tags=["Admin"])
+def admin_run_archive(
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    max_batches: Optional[int] = None,
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Run the archive job now instead of waiting for the background worker."""
+    logger.info("Admin %s triggered donation archiving (older than %s days)", admin.username, older_than_days)
+    archived = archive_terminal_donations(db, older_than_days=max(0, older_than_days), max_batches=max_batches)
+    return {
+        "archived": archived,
+        "older_than_days": max(0, older_than_days),
+        "partitions_dropped": maintain_donation_partitions(),
+    }
+
 @app.post("/admin/promote/{user_id}", response_model=dict, tags=["Admin"])
 def admin_promote_user(user_id: int, admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
-    logger.info(f"Admin {admin.username} is promoting user ID: {user_id}")
+    logger.info("Admin %s is promoting user ID: %s", admin.username, user_id)
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1422,8 +3677,8 @@ def admin_promote_user(user_id: int, admin: User = Depends(get_admin_user), db:
     return {"message": f"User {user.username} promoted to admin"}
 
 @app.get("/admin/ngos", response_model=List[NGOResponse], tags=["Admin"])
-def admin_get_ngos(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
-    logger.info(f"Admin {admin.username} is fetching all NGOs")
+def admin_get_ngos(admin: User = Depends(get_admin_user_read), db: Session = Depends(get_read_db)):
+    logger.info("Admin %s is fetching all NGOs", admin.username)
     return db.query(NGO).all()
 
 @app.post("/admin/ngos/{ngo_id}/verify", response_model=dict, tags=["Admin"])
@@ -1434,7 +3689,7 @@ async def admin_verify_ngo(
     admin: User = Depends(get_admin_user), 
     db: Session = Depends(get_db)
 ):
-    logger.info(f"Admin {admin.username} is verifying NGO ID: {ngo_id} (Action: {action})")
+    logger.info("Admin %s is verifying NGO ID: %s (Action: %s)", admin.username, ngo_id, action)
     ngo = db.query(NGO).filter(NGO.id == ngo_id).first()
     if not ngo:
         raise HTTPException(status_code=404, detail="NGO not found")
@@ -1447,23 +3702,22 @@ async def admin_verify_ngo(
         raise HTTPException(status_code=400, detail="Invalid action. Use 'approve' or 'reject'.")
     
     db.commit()
+    invalidate_chat_context(ngo_id=ngo.id)
+    sync_ngo_index(ngo)
     
     # Send notification email
-    background_tasks.add_task(send_ngo_status_email, ngo.email, ngo.name, ngo.registration_status)
+    enqueue_email(background_tasks, send_ngo_status_email, ngo.email, ngo.name, ngo.registration_status)
     
     return {"message": f"NGO {ngo.name} status updated to {ngo.registration_status}"}
 
 @app.get("/dashboard/user", tags=["Profile"])
-def get_user_dashboard(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_user_dashboard(user: User = Depends(get_current_user_read), db: Session = Depends(get_read_db)):
     """Aggregation of user statistics for their dashboard."""
-    logger.info(f"Fetching dashboard for user: {user.username}")
+    logger.info("Fetching dashboard for user: %s", user.username)
     
     # 1. Basic Counts
-    total_donated = db.query(Donation).filter(Donation.user_id == user.id).count()
-    total_claimed = db.query(Donation).filter(
-        (Donation.claimed_by_user_id == user.id) | 
-        (Donation.status == "Claimed") # Simplified logic, ideally check claimer ID
-    ).count()
+    total_donated = count_with_archive(db, lambda model: (model.user_id == user.id,))
+    total_claimed = count_with_archive(db, lambda model: (model.claimed_by_user_id == user.id,))
     if user.role != "Individual":
          # Orgs might behave like NGOs for claiming? Or just track donations.
          pass
@@ -1479,17 +3733,37 @@ def get_user_dashboard(user: User = Depends(get_current_user), db: Session = Dep
     return {
         "stats": {
             "total_donated": total_donated,
-            "total_claimed_by_others": db.query(Donation).filter(Donation.user_id == user.id, Donation.status == "Completed").count(),
+            "total_claimed": total_claimed,
+            "total_claimed_by_others": count_with_archive(db, lambda model: (model.user_id == user.id, model.status == "Completed")),
             "active_listings": active_donations
         },
         "impact": impact,
         "recent_activity": recent
     }
 
+@app.get("/dashboard/user/timeseries", response_model=TimeseriesResponse, tags=["Profile"])
+def get_user_timeseries(days: int = 30, user: User = Depends(get_current_user_read), db: Session = Depends(get_read_db)):
+    """Daily donation/claim/kg series for the current user, read from impact rollups."""
+    days = max(1, min(days, 366))
+    return {"days": days, "points": rollup_timeseries(db, days, user_id=user.id)}
+
+@app.get("/dashboard/ngo", tags=["NGO"])
+def get_ngo_dashboard(ngo: NGO = Depends(get_current_ngo), db: Session = Depends(get_db)):
+    """
+    Claim history and impact for the logged-in NGO (cached until its next claim/verification).
+    Built on the primary: a stale replica read would stay cached until the next invalidation.
+    """
+    logger.info("Fetching dashboard for NGO: %s", ngo.name)
+    dashboard = ngo_dashboard_cache.get(ngo.id)
+    if dashboard is None:
+        dashboard = build_ngo_dashboard(ngo.id, db)
+        ngo_dashboard_cache.set(ngo.id, dashboard)
+    return dashboard
+
 @app.get("/dashboard/admin", tags=["Admin"])
-def get_admin_dashboard(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
+def get_admin_dashboard(admin: User = Depends(get_admin_user_read), db: Session = Depends(get_read_db)):
     """System-wide statistics for the Admin Dashboard."""
-    logger.info(f"Fetching admin dashboard for: {admin.username}")
+    logger.info("Fetching admin dashboard for: %s", admin.username)
     
     # 1. User Stats
     total_users = db.query(User).count()
@@ -1501,11 +3775,12 @@ def get_admin_dashboard(admin: User = Depends(get_admin_user), db: Session = Dep
     
     # 3. Donation Health
     stats = {
-        "total": db.query(Donation).count(),
+        "total": count_with_archive(db, lambda model: ()),
         "available": db.query(Donation).filter(Donation.status == "Available").count(),
         "claimed": db.query(Donation).filter(Donation.status == "Claimed").count(),
-        "completed": db.query(Donation).filter(Donation.status == "Completed").count(),
-        "expired": db.query(Donation).filter(Donation.status == "Expired").count()
+        "completed": count_with_archive(db, lambda model: (model.status == "Completed",)),
+        "expired": count_with_archive(db, lambda model: (model.status == "Expired",)),
+        "archived": db.query(ArchivedDonation).filter(ArchivedDonation.archive_reason == ARCHIVE_REASON_AGED).count()
     }
     
     return {
@@ -1521,9 +3796,20 @@ def get_admin_dashboard(admin: User = Depends(get_admin_user), db: Session = Dep
         "system_health": "Good" # Placeholder
     }
 
+@app.get("/dashboard/admin/timeseries", response_model=TimeseriesResponse, tags=["Admin"])
+def get_admin_timeseries(
+    days: int = 30,
+    city: Optional[str] = None,
+    admin: User = Depends(get_admin_user_read),
+    db: Session = Depends(get_read_db)
+):
+    """System-wide daily series, optionally for a single city, read from impact rollups."""
+    days = max(1, min(days, 366))
+    return {"days": days, "city": city, "points": rollup_timeseries(db, days, city=city)}
+
 @app.get("/admin/organizations", response_model=List[UserResponse], tags=["Admin"])
-def admin_get_organizations(admin: User = Depends(get_admin_user), db: Session = Depends(get_db)):
-    logger.info(f"Admin {admin.username} fetching organizations")
+def admin_get_organizations(admin: User = Depends(get_admin_user_read), db: Session = Depends(get_read_db)):
+    logger.info("Admin %s fetching organizations", admin.username)
     return db.query(User).filter(User.role != "Individual").all()
 
 @app.post("/admin/organizations/{user_id}/verify", response_model=dict, tags=["Admin"])
@@ -1534,7 +3820,7 @@ async def admin_verify_organization(
     admin: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    logger.info(f"Admin {admin.username} verifying User ID: {user_id} (Action: {action})")
+    logger.info("Admin %s verifying User ID: %s (Action: %s)", admin.username, user_id, action)
     org_user = db.query(User).filter(User.id == user_id).first()
     
     if not org_user:
@@ -1548,21 +3834,69 @@ async def admin_verify_organization(
         raise HTTPException(status_code=400, detail="Invalid action")
         
     db.commit()
+    invalidate_chat_context(user_id=org_user.id)
     
     # Send email
-    background_tasks.add_task(send_org_status_email, org_user.email, org_user.username, org_user.verification_status)
+    enqueue_email(background_tasks, send_org_status_email, org_user.email, org_user.username, org_user.verification_status)
     
     return {"message": f"Organization {org_user.username} status updated to {org_user.verification_status}"}
 
-@app.post("/chat", response_model=dict, tags=["General"])
-def chat_bot(
-    request_body: ChatRequest,
-    request: Request,
+@app.get("/badges", response_model=List[BadgeDefinitionResponse], tags=["General"])
+def get_badge_catalog():
+    """Public catalog of every badge and its unlock rule."""
+    return BADGE_CATALOG
+
+@app.get("/leaderboard", response_model=LeaderboardResponse, tags=["General"])
+def get_leaderboard(
+    metric: str = "kg",
+    period: str = "all",
+    limit: int = 10,
+    offset: int = 0,
     db: Session = Depends(get_db)
 ):
-    """Context-aware chatbot for health, nutrition, and platform queries. Accessible to All."""
+    """Top donors by kg saved, meals served or donation count, served from materialized rankings."""
+    if metric not in LEADERBOARD_METRICS:
+        raise HTTPException(status_code=400, detail=f"Invalid metric. Use one of: {', '.join(LEADERBOARD_METRICS)}")
+    if period not in LEADERBOARD_PERIODS:
+        raise HTTPException(status_code=400, detail=f"Invalid period. Use one of: {', '.join(LEADERBOARD_PERIODS)}")
+    limit = max(1, min(limit, 100))
+    offset = max(0, offset)
+
+    leaderboard_cache.ensure_fresh(db)
+    return leaderboard_cache.page(metric, period, limit, offset)
+
+CHAT_FALLBACK_RESPONSE = "I'm currently having trouble connecting to my brain. Please try again later! 🤖"
+CHAT_MAX_STREAMS_PER_PRINCIPAL = int(os.getenv("CHAT_MAX_STREAMS_PER_PRINCIPAL", 2))
+active_chat_streams: Dict[str, int] = {}
+
+CHAT_SYSTEM_PROMPT = """
+    You are 'Meal-Mitra Bot', an AI assistant for the Meal-Mitra food donation platform.
+    
+    YOUR MISSION:
+    - Help users reduce food waste.
+    - Provide advice on food safety, nutrition, and health.
+    - Explain platform features (donating, claiming, badges).
+    - Use the provided USER CONTEXT to personalize answers.
     
-    # 1. Gather Context
+    USER CONTEXT:
+    {context}
+    
+    GUARDRAILS:
+    - ONLY answer questions related to Food, Health, Nutrition, and Meal-Mitra.
+    - IF asked about completely unrelated topics (entertainment, coding, politics), politely refuse: "I am only tuned to help with food, health, and Meal-Mitra."
+    - Be friendly, encouraging, and concise.
+    """
+
+GUEST_CHAT_CONTEXT = "User is a guest visitor. Encourage them to join Meal-Mitra to donate or claim food."
+
+# Per-principal USER CONTEXT, invalidated by invalidate_chat_context() when the underlying data changes.
+chat_context_cache = TTLCache(ttl_seconds=int(os.getenv("CHAT_CONTEXT_CACHE_SECONDS", 600)))
+# Guest answers keyed on the normalized question; guests all share the same context.
+chat_response_cache = TTLCache(ttl_seconds=int(os.getenv("CHAT_RESPONSE_CACHE_SECONDS", 3600)), max_entries=2000)
+CHAT_RESPONSE_CACHE_MAX_CHARS = 200
+
+def build_chat_context(request: Request, db: Session) -> str:
+    """USER CONTEXT block describing the session's user, NGO or guest."""
     user_id = request.session.get("user_id")
     ngo_id = request.session.get("ngo_id")
     
@@ -1602,45 +3936,267 @@ def chat_bot(
             """
 
     if not context:
-        context = "User is a guest visitor. Encourage them to join Meal-Mitra to donate or claim food."
+        context = GUEST_CHAT_CONTEXT
+    return context
 
-    # 2. Construct System Prompt
-    system_prompt = f"""
-    You are 'Meal-Mitra Bot', an AI assistant for the Meal-Mitra food donation platform.
-    
-    YOUR MISSION:
-    - Help users reduce food waste.
-    - Provide advice on food safety, nutrition, and health.
-    - Explain platform features (donating, claiming, badges).
-    - Use the provided USER CONTEXT to personalize answers.
-    
-    USER CONTEXT:
-    {context}
-    
-    GUARDRAILS:
-    - ONLY answer questions related to Food, Health, Nutrition, and Meal-Mitra.
-    - IF asked about completely unrelated topics (entertainment, coding, politics), politely refuse: "I am only tuned to help with food, health, and Meal-Mitra."
-    - Be friendly, encouraging, and concise.
-    """
+
+def invalidate_chat_context(user_id: Optional[int] = None, ngo_id: Optional[int] = None):
+    if user_id:
+        chat_context_cache.invalidate(f"user:{user_id}")
+    if ngo_id:
+        chat_context_cache.invalidate(f"ngo:{ngo_id}")
+
+def build_chat_system_prompt(request: Request, db: Session) -> str:
+    """Personalized system prompt for the session's user, NGO or guest."""
+    principal = chat_principal(request)
+    if principal.startswith("guest:"):
+        context = GUEST_CHAT_CONTEXT
+    else:
+        context = chat_context_cache.get(principal)
+        if context is None:
+            context = build_chat_context(request, db)
+            chat_context_cache.set(principal, context)
+    return CHAT_SYSTEM_PROMPT.format(context=context)
+
+def chat_response_cache_key(request: Request, message: str) -> Optional[str]:
+    """Cache key for a guest's question, or None when the answer must not be shared."""
+    if not chat_principal(request).startswith("guest:") or len(message) > CHAT_RESPONSE_CACHE_MAX_CHARS:
+        return None
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", message.lower()).split())
+    return normalized or None
+
+def chat_principal(request: Request) -> str:
+    """Key used for per-caller chat limits: the session's user/NGO, else the client address."""
+    if request.session.get("user_id"):
+        return f"user:{request.session['user_id']}"
+    if request.session.get("ngo_id"):
+        return f"ngo:{request.session['ngo_id']}"
+    return f"guest:{request.client.host if request.client else 'unknown'}"
+
+def sse_event(data: dict, event: Optional[str] = None) -> bytes:
+    prefix = f"event: {event}\n" if event else ""
+    return (prefix + "data: ").encode() + orjson.dumps(data) + b"\n\n"
+
+@app.post("/chat", response_model=dict, tags=["General"])
+def chat_bot(
+    request_body: ChatRequest,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """Context-aware chatbot for health, nutrition, and platform queries. Accessible to All."""
+    cache_key = chat_response_cache_key(request, request_body.message)
+    if cache_key:
+        cached = chat_response_cache.get(cache_key)
+        if cached is not None:
+            return {"response": cached}
+
+    system_prompt = build_chat_system_prompt(request, db)
     
-    # 3. Call Groq API
-    try:
-        client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-        chat_completion = client.chat.completions.create(
-            messages=[
+    def llm_chat() -> str:
+        return llm_provider.complete(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": request_body.message}
             ],
-            model="llama-3.3-70b-versatile",
             temperature=0.7,
-            max_tokens=300,
+            max_tokens=300
         )
-        response_text = chat_completion.choices[0].message.content
-        return {"response": response_text}
-    except Exception as e:
-        logger.error(f"Chatbot error: {e}")
-        # Soft fallback if AI fails
-        return {"response": "I'm currently having trouble connecting to my brain. Please try again later! 🤖"}
+
+    # Soft fallback if AI fails or is too slow
+    response_text = call_llm(llm_chat, lambda: None, "chat")
+    if response_text is None:
+        return {"response": CHAT_FALLBACK_RESPONSE}
+    if cache_key and response_text:
+        chat_response_cache.set(cache_key, response_text)
+    return {"response": response_text}
+
+@app.post("/chat/stream", tags=["General"])
+async def chat_bot_stream(
+    request_body: ChatRequest,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Streaming variant of /chat. Emits Server-Sent Events: one `{"token": ...}` data event per
+    chunk, then an `event: done`. The upstream completion is closed as soon as the client
+    disconnects. Each user/NGO/guest may hold CHAT_MAX_STREAMS_PER_PRINCIPAL streams at once.
+    """
+    principal = chat_principal(request)
+    if active_chat_streams.get(principal, 0) >= CHAT_MAX_STREAMS_PER_PRINCIPAL:
+        raise HTTPException(status_code=429, detail="Too many chat responses in progress. Please wait for the current one to finish.")
+
+    cache_key = chat_response_cache_key(request, request_body.message)
+    cached = chat_response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        async def cached_stream():
+            yield sse_event({"token": cached})
+            yield sse_event({}, event="done")
+        return StreamingResponse(cached_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    system_prompt = await run_in_threadpool(build_chat_system_prompt, request, db)
+
+    async def token_stream():
+        # Claim the slot when streaming actually starts so an abandoned response can't leak it.
+        if active_chat_streams.get(principal, 0) >= CHAT_MAX_STREAMS_PER_PRINCIPAL:
+            yield sse_event({"error": "Too many chat responses in progress."}, event="error")
+            return
+        if llm_provider is None or not llm_breaker.allow():
+            if llm_provider is not None:
+                llm_breaker.count("fallbacks")
+            yield sse_event({"token": CHAT_FALLBACK_RESPONSE})
+            yield sse_event({}, event="done")
+            return
+        active_chat_streams[principal] = active_chat_streams.get(principal, 0) + 1
+        request_metrics = current_request_metrics.get()
+        if request_metrics is not None:
+            request_metrics.llm_calls += 1
+        stream = None
+        tokens = []
+        started = time.monotonic()
+        outcome = None
+        try:
+            stream = llm_provider.stream(
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": request_body.message}
+                ],
+                temperature=0.7,
+                max_tokens=300
+            )
+            # The budget covers time to the first token; once tokens flow the client timeout applies.
+            token = await asyncio.wait_for(anext(stream, None), timeout=LLM_BUDGET_SECONDS)
+            while token is not None:
+                if await request.is_disconnected():
+                    logger.info("Chat stream for %s cancelled by client", principal)
+                    return
+                tokens.append(token)
+                yield sse_event({"token": token})
+                token = await anext(stream, None)
+            outcome = True
+            if cache_key and tokens:
+                chat_response_cache.set(cache_key, "".join(tokens))
+        except asyncio.CancelledError:
+            logger.info("Chat stream for %s cancelled", principal)
+            raise
+        except Exception as e:
+            outcome = False
+            if isinstance(e, asyncio.TimeoutError):
+                llm_breaker.count("budget_exceeded")
+            llm_breaker.count("fallbacks")
+            logger.error("Chatbot stream error: %r", e)
+            if not tokens:
+                yield sse_event({"token": CHAT_FALLBACK_RESPONSE})
+        finally:
+            # A stream abandoned by the client says nothing about upstream health.
+            if outcome is not None:
+                llm_breaker.record(outcome, time.monotonic() - started)
+                record_llm_call("chat stream", outcome, time.monotonic() - started)
+            else:
+                llm_breaker.release_probe()
+            if stream is not None:
+                await stream.aclose()
+            remaining = active_chat_streams.get(principal, 1) - 1
+            if remaining > 0:
+                active_chat_streams[principal] = remaining
+            else:
+                active_chat_streams.pop(principal, None)
+        yield sse_event({}, event="done")
+
+    return StreamingResponse(
+        token_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/admin/chat/cache-stats", response_model=dict, tags=["Admin"])
+def admin_chat_cache_stats(admin: User = Depends(get_admin_user)):
+    """Hit rates of the chatbot's context and guest-response caches."""
+    return {
+        "context_cache": chat_context_cache.stats(),
+        "response_cache": chat_response_cache.stats()
+    }
+
+@app.get("/admin/llm/stats", response_model=dict, tags=["Admin"])
+def admin_llm_stats(admin: User = Depends(get_admin_user)):
+    """Circuit breaker state, call/fallback counters and recent latencies for LLM calls."""
+    return llm_breaker.stats()
+
+@app.get("/admin/profiles", response_model=List[dict], tags=["Admin"])
+def admin_list_profiles(admin: User = Depends(get_admin_user)):
+    """Recently captured request profiles, newest first (see ProfilingMiddleware)."""
+    return [profile.summary() for profile in profile_store.list()]
+
+def get_stored_profile(profile_id: str) -> RequestProfile:
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@app.get("/admin/profiles/{profile_id}", response_model=dict, tags=["Admin"])
+def admin_get_profile(profile_id: str, admin: User = Depends(get_admin_user)):
+    """Hottest functions and the SQL timeline of one profiled request."""
+    return get_stored_profile(profile_id).report()
+
+@app.get("/admin/profiles/{profile_id}/folded", tags=["Admin"])
+def admin_download_profile(profile_id: str, admin: User = Depends(get_admin_user)):
+    """Collapsed stacks for flamegraph.pl or speedscope."""
+    profile = get_stored_profile(profile_id)
+    return Response(
+        profile.folded(),
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.folded"'}
+    )
+
+def cache_metric_lines() -> List[str]:
+    caches = {
+        "ngo_dashboard": ngo_dashboard_cache,
+        "chat_context": chat_context_cache,
+        "chat_response": chat_response_cache,
+    }
+    lines = [
+        "# HELP cache_entries Entries currently held by an in-process cache.",
+        "# TYPE cache_entries gauge",
+        *(f'cache_entries{{cache="{name}"}} {len(cache.entries)}' for name, cache in caches.items()),
+        "# HELP cache_lookups_total In-process cache lookups by result.",
+        "# TYPE cache_lookups_total counter",
+    ]
+    for name, cache in caches.items():
+        lines.append(f'cache_lookups_total{{cache="{name}",result="hit"}} {cache.hits}')
+        lines.append(f'cache_lookups_total{{cache="{name}",result="miss"}} {cache.misses}')
+    return lines
+
+LLM_CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+def llm_breaker_metric_lines() -> List[str]:
+    breaker = llm_breaker.stats()
+    lines = [
+        "# HELP llm_circuit_state LLM circuit breaker state (0 closed, 1 half-open, 2 open).",
+        "# TYPE llm_circuit_state gauge",
+        f"llm_circuit_state {LLM_CIRCUIT_STATE_VALUES[breaker['state']]}",
+        "# HELP llm_breaker_events_total LLM circuit breaker events by kind.",
+        "# TYPE llm_breaker_events_total counter",
+    ]
+    for kind in ("trips", "short_circuits", "budget_exceeded", "fallbacks"):
+        lines.append(f'llm_breaker_events_total{{event="{kind}"}} {breaker[kind]}')
+    return lines
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@app.get("/metrics", tags=["General"], include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus scrape endpoint. Set METRICS_TOKEN to require `Authorization: Bearer <token>`."""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(cache_metric_lines())
+    lines.extend(llm_breaker_metric_lines())
+    return Response(
+        "\n".join(lines) + "\n",
+        media_type="text/plain; version=0.0.4",
+        headers={"Cache-Control": "no-store"}
+    )
 
 @app.get("/", tags=["General"])
 def root():
@@ -0,0 +1,52 @@
+"""
+One-off migration: convert the Postgres donations table to the partitioned layout described
+in donation_partitions.py.
+
+The conversion copies every donation into the new table inside one transaction that holds an
+exclusive lock on donations, so stop the app (or run it in a maintenance window) first. Rows
+created before the first monthly partition land in donations_history_default. Once the table
+is partitioned, the app's archive worker keeps future months created and drops emptied ones.
+
+Example (from the backend directory):
+    DATABASE_URL=postgresql://localhost/mealmitra python migrate_partitions.py --months-back 12
+"""
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+
+from main import PARTITION_MONTHS_AHEAD, donations_partitioned, engine, setup_search_index, upgrade_schema
+from donation_partitions import add_months, month_start, partition_donations
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("db_migrator")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-back", type=int, default=4, help="past months that get their own partition")
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD, help="future months created up front")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("Partitioning is Postgres-only; point DATABASE_URL at a postgresql:// database")
+    if donations_partitioned(engine):
+        logger.info("donations is already partitioned; nothing to do")
+        return
+
+    started = time.perf_counter()
+    this_month = month_start(datetime.now(timezone.utc).date())
+    try:
+        rows = partition_donations(engine, add_months(this_month, -args.months_back),
+                                   add_months(this_month, args.months_ahead))
+    except ValueError as e:
+        sys.exit(str(e))
+    # The new table has only its primary key; recreate the secondary and search indexes.
+    upgrade_schema(engine)
+    setup_search_index(engine)
+    logger.info("Partitioned %s donations in %.1fs", rows, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Ranks approved NGOs for an NGO-only donation by distance, spare capacity and how much time
+is left before the food stops being safe.
+
+NGOs live in a GridIndex: a uniform lat/lng grid, so a radius query only measures the NGOs
+in the few cells around the donation instead of every NGO. Longitudes are not wrapped at the
+antimeridian, which is fine for a service operating within one country.
+"""
+import heapq
+import math
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_coordinate(value, limit: float) -> Optional[float]:
+    """Float coordinate from a form/string column, or None when missing or out of range."""
+    try:
+        coordinate = float(value)
+    except (TypeError, ValueError):
+        return None
+    return coordinate if math.isfinite(coordinate) and -limit <= coordinate <= limit else None
+
+
+def parse_food_types(value: Optional[str]) -> Tuple[str, ...]:
+    """Comma-separated food keywords ("rice, dal, bread"); empty means every food is accepted."""
+    return tuple(sorted({part.strip().lower() for part in (value or "").split(",") if part.strip()}))
+
+
+def hours_left(safe_until: Optional[datetime], now: datetime) -> Optional[float]:
+    """Hours from `now` until safe_until (both timezone-aware), or None when it is unknown."""
+    if safe_until is None:
+        return None
+    return (safe_until - now).total_seconds() / 3600
+
+
+class NGOEntry(NamedTuple):
+    id: int
+    name: str
+    lat: float
+    lng: float
+    capacity_kg: Optional[float]
+    food_types: Tuple[str, ...]
+    # Directory details for /ngos/nearby, so it never has to go back to the database.
+    ngo_type: Optional[str] = None
+    address: Optional[str] = None
+    phone_number: Optional[str] = None
+
+    def accepts(self, food: Optional[str]) -> bool:
+        if not self.food_types or not food:
+            return True
+        food = food.lower()
+        return any(food_type in food or food in food_type for food_type in self.food_types)
+
+
+class GridIndex:
+    """NGOEntry points bucketed into cell_km-sized cells; safe for concurrent reads and writes."""
+    def __init__(self, cell_km: float = 2.0):
+        self.cell_km = cell_km
+        self.cell_deg = cell_km / KM_PER_DEGREE_LAT
+        self.cells: Dict[Tuple[int, int], Dict[int, NGOEntry]] = {}
+        self.cell_of: Dict[int, Tuple[int, int]] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.cell_of)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def upsert(self, entry: NGOEntry):
+        cell = self._cell(entry.lat, entry.lng)
+        with self.lock:
+            self._discard(entry.id)
+            self.cells.setdefault(cell, {})[entry.id] = entry
+            self.cell_of[entry.id] = cell
+
+    def remove(self, ngo_id: int):
+        with self.lock:
+            self._discard(ngo_id)
+
+    def _discard(self, ngo_id: int):
+        cell = self.cell_of.pop(ngo_id, None)
+        if cell is not None:
+            bucket = self.cells[cell]
+            del bucket[ngo_id]
+            if not bucket:
+                del self.cells[cell]
+
+    def replace_all(self, entries: Iterable[NGOEntry]):
+        cells: Dict[Tuple[int, int], Dict[int, NGOEntry]] = {}
+        cell_of = {}
+        for entry in entries:
+            cell = self._cell(entry.lat, entry.lng)
+            cells.setdefault(cell, {})[entry.id] = entry
+            cell_of[entry.id] = cell
+        with self.lock:
+            self.cells, self.cell_of = cells, cell_of
+
+    def _candidates(self, lat: float, lng: float, radius_km: float) -> List[NGOEntry]:
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+        row_min, col_min = self._cell(lat - dlat, lng - dlng)
+        row_max, col_max = self._cell(lat + dlat, lng + dlng)
+        with self.lock:
+            if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self.cells):
+                # Huge radius: scanning the occupied cells is cheaper than probing empty ones.
+                return [
+                    entry for (row, col), bucket in self.cells.items()
+                    if row_min <= row <= row_max and col_min <= col <= col_max
+                    for entry in bucket.values()
+                ]
+            found = []
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    bucket = self.cells.get((row, col))
+                    if bucket:
+                        found.extend(bucket.values())
+            return found
+
+    def within(self, lat: float, lng: float, radius_km: float, limit: Optional[int] = None,
+               predicate: Optional[Callable[[NGOEntry], bool]] = None) -> List[Tuple[float, NGOEntry]]:
+        """(distance_km, entry) pairs within radius_km, nearest first, at most `limit` of them."""
+        matches = []
+        for entry in self._candidates(lat, lng, radius_km):
+            if predicate is not None and not predicate(entry):
+                continue
+            distance = haversine_km(lat, lng, entry.lat, entry.lng)
+            if distance <= radius_km:
+                matches.append((distance, entry))
+        if limit is not None and limit < len(matches):
+            return heapq.nsmallest(limit, matches, key=lambda match: match[0])
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def nearest(self, lat: float, lng: float, limit: int, radius_km: float,
+                predicate: Optional[Callable[[NGOEntry], bool]] = None) -> List[Tuple[float, NGOEntry]]:
+        """
+        Like within(..., limit=limit), but visits cells in rings outward from the query point and
+        stops once `limit` entries are closer than any unvisited cell, so dense cities stay cheap.
+        """
+        row0, col0 = self._cell(lat, lng)
+        lng_stretch = 1 / max(math.cos(math.radians(lat)), 0.01)
+        max_ring = math.ceil(radius_km / self.cell_km) + 1
+        best: List[Tuple[float, int, NGOEntry]] = []  # max-heap of the `limit` nearest, as (-distance, id, entry)
+        ring = 0
+        with self.lock:
+            while ring <= max_ring:
+                inner_cols = math.ceil((ring - 1) * lng_stretch) if ring else -1
+                cols = math.ceil(ring * lng_stretch)
+                for row in range(row0 - ring, row0 + ring + 1):
+                    inner_row = abs(row - row0) < ring
+                    for col in range(col0 - cols, col0 + cols + 1):
+                        if inner_row and abs(col - col0) <= inner_cols:
+                            continue  # visited in an earlier ring
+                        bucket = self.cells.get((row, col))
+                        if not bucket:
+                            continue
+                        for entry in bucket.values():
+                            if predicate is not None and not predicate(entry):
+                                continue
+                            distance = haversine_km(lat, lng, entry.lat, entry.lng)
+                            if distance > radius_km:
+                                continue
+                            if len(best) < limit:
+                                heapq.heappush(best, (-distance, entry.id, entry))
+                            elif distance < -best[0][0]:
+                                heapq.heapreplace(best, (-distance, entry.id, entry))
+                # Everything within ring * cell_km of the point has now been seen.
+                if len(best) == limit and -best[0][0] <= ring * self.cell_km:
+                    break
+                ring += 1
+        return sorted(((-negative, entry) for negative, _, entry in best), key=lambda match: match[0])
+
+
+class NGOMatch(NamedTuple):
+    ngo: NGOEntry
+    distance_km: float
+    remaining_capacity_kg: Optional[float]
+    slack_hours: Optional[float]
+    score: float
+
+    def as_dict(self) -> dict:
+        return {
+            "ngo_id": self.ngo.id,
+            "name": self.ngo.name,
+            "distance_km": round(self.distance_km, 2),
+            "remaining_capacity_kg": None if self.remaining_capacity_kg is None else round(self.remaining_capacity_kg, 1),
+            "slack_hours": None if self.slack_hours is None else round(self.slack_hours, 1),
+            "score": round(self.score, 3),
+        }
+
+
+# Score weights; each component is scaled to 0..1 and unknown values score a neutral 0.5.
+DISTANCE_WEIGHT = 0.5
+CAPACITY_WEIGHT = 0.3
+DEADLINE_WEIGHT = 0.2
+# Slack beyond this many hours between arrival and safe_until earns no extra credit.
+COMFORTABLE_SLACK_HOURS = 2.0
+
+
+def rank_ngos(index: GridIndex, lat: float, lng: float, food: Optional[str], kg: float,
+              hours_remaining: Optional[float], open_load_kg: Callable[[List[int]], Dict[int, float]],
+              k: int = 5, radius_km: float = 25.0, speed_kmh: float = 20.0, candidates: int = 50) -> List[NGOMatch]:
+    """
+    Top-k NGOs for a donation at (lat, lng). The `candidates` nearest NGOs accepting the food
+    are scored; those that would arrive after safe_until, or that have no capacity left once
+    their pending pickups (open_load_kg, queried only for the candidates) are counted, are skipped.
+    """
+    nearby = index.nearest(lat, lng, candidates, radius_km, predicate=lambda entry: entry.accepts(food))
+    if not nearby:
+        return []
+    load = open_load_kg([entry.id for _, entry in nearby if entry.capacity_kg is not None])
+
+    matches = []
+    for distance, entry in nearby:
+        slack = None
+        if hours_remaining is not None:
+            slack = hours_remaining - distance / speed_kmh
+            if slack <= 0:
+                continue
+        remaining = None
+        if entry.capacity_kg is not None:
+            remaining = entry.capacity_kg - load.get(entry.id, 0.0)
+            if remaining <= 0:
+                continue
+
+        distance_score = 1 - distance / radius_km
+        capacity_score = 0.5 if remaining is None else min(1.0, remaining / kg) if kg > 0 else 1.0
+        deadline_score = 0.5 if slack is None else min(1.0, slack / COMFORTABLE_SLACK_HOURS)
+        score = DISTANCE_WEIGHT * distance_score + CAPACITY_WEIGHT * capacity_score + DEADLINE_WEIGHT * deadline_score
+        matches.append(NGOMatch(entry, distance, remaining, slack, score))
+
+    return heapq.nlargest(k, matches, key=lambda match: match.score)
@@ -0,0 +1,310 @@
+"""
+Bulk synthetic data generator for staging and benchmarks.
+
+Unlike seed_data.py (a handful of fixture accounts through the ORM), this writes large
+volumes with batched Core INSERTs in one transaction per table. Every account shares
+one bcrypt hash computed up front. All randomness comes from --seed, so the same
+arguments (including --anchor) always produce the same dataset.
+
+Examples (from the backend directory):
+    python seed_bulk.py --users 100000 --donations 1000000 --ngos 10000 --reset
+    python seed_bulk.py --donations 50000 --cities "Pune:5,Mumbai:3,Nagpur:1" \\
+        --statuses "Available:20,Claimed:10,Completed:50,Expired:20" --anchor 2026-01-01T12:00:00
+
+Every account's password is --password (default "Seed@123"). Usernames are
+<prefix>_user_<n>, except n=0, which is the admin <prefix>_admin. NGO logins are
+<prefix>_ngo_<n>@example.com.
+"""
+import argparse
+import bisect
+import itertools
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional
+
+import bcrypt
+from sqlalchemy import func, insert, select
+
+from main import Base, Donation, NGO, SessionLocal, User, engine, normalize_password, prepare_schema, rebuild_impact_rollups, rebuild_ngo_index
+from food_parser import FOOD_LEXICON
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("db_seeder")
+
+DEFAULT_CITIES = {"Pune": 30, "Mumbai": 30, "Nagpur": 10, "Nashik": 10, "Thane": 10, "Aurangabad": 5, "Kolhapur": 5}
+DEFAULT_AREAS = ["FC Road", "Shivaji Nagar", "Kothrud", "Andheri West", "Dadar", "Civil Lines", "MG Road", "Station Road"]
+DEFAULT_STATUSES = {"Completed": 55, "Expired": 30, "Claimed": 5, "Available": 10}
+DEFAULT_FOODS = {name: 1 for name, _, _ in FOOD_LEXICON}
+# quantity unit -> (weight, low, high); the amount is drawn uniformly between low and high
+DEFAULT_QUANTITIES = {"kg": (50, 1, 20), "plates": (30, 5, 50), "packets": (10, 2, 30), "pieces": (10, 10, 100)}
+SAFETY_HOURS = {name: hours for name, hours, _ in FOOD_LEXICON}
+CITY_CENTERS = {
+    "Pune": (18.5204, 73.8567), "Mumbai": (19.0760, 72.8777), "Nagpur": (21.1458, 79.0882),
+    "Nashik": (19.9975, 73.7898), "Thane": (19.2183, 72.9781), "Aurangabad": (19.8762, 75.3433),
+    "Kolhapur": (16.7050, 74.2433),
+}
+CITY_SPREAD_DEG = 0.13
+
+
+class WeightedChoice:
+    """O(log n) weighted draws from a fixed table using precomputed cumulative weights."""
+    def __init__(self, weights: Dict[object, float]):
+        self.values = list(weights)
+        self.cumulative = list(itertools.accumulate(weights.values()))
+        self.total = self.cumulative[-1]
+
+    def draw(self, rng: random.Random):
+        return self.values[bisect.bisect_right(self.cumulative, rng.random() * self.total)]
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """'Pune:3,Mumbai:2' -> {'Pune': 3.0, 'Mumbai': 2.0}; a missing weight counts as 1."""
+    weights = {}
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name:
+            weights[name.strip()] = float(weight) if weight else 1.0
+    if not weights:
+        raise argparse.ArgumentTypeError(f"no entries in '{spec}'")
+    return weights
+
+
+def donor_weights(users: int, skew: float) -> WeightedChoice:
+    """Zipf-like donor activity: user k donates in proportion to 1 / k**skew (0 = uniform)."""
+    return WeightedChoice({user_id: 1.0 / (rank ** skew) for rank, user_id in enumerate(range(1, users + 1), start=1)})
+
+
+def insert_batches(table, rows: Iterable[dict], batch_size: int) -> int:
+    """Insert `rows` in executemany batches inside a single transaction (autobegun by the first statement)."""
+    total = 0
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            # Throwaway data: skip fsyncs while loading.
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        statement = insert(table)
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            conn.execute(statement, batch)
+            total += len(batch)
+        conn.commit()
+    return total
+
+
+def user_rows(count: int, prefix: str, password_hash: str, cities: WeightedChoice, rng: random.Random) -> Iterator[dict]:
+    for n in range(count):
+        yield {
+            "username": f"{prefix}_admin" if n == 0 else f"{prefix}_user_{n}",
+            "email": f"{prefix}_user_{n}@example.com",
+            "password": password_hash,
+            "is_admin": n == 0,
+            "address": f"{rng.choice(DEFAULT_AREAS)}, {cities.draw(rng)}",
+            "phone_number": f"9{n:09d}",
+            "role": "Individual",
+            "verification_status": "Approved",
+        }
+
+
+def ngo_rows(count: int, prefix: str, password_hash: str, cities: WeightedChoice, rng: random.Random) -> Iterator[dict]:
+    food_names = list(DEFAULT_FOODS)
+    for n in range(count):
+        city = cities.draw(rng)
+        center = CITY_CENTERS.get(city)
+        yield {
+            "name": f"{prefix.title()} NGO {n}",
+            "email": f"{prefix}_ngo_{n}@example.com",
+            "password": password_hash,
+            "ngo_type": rng.choice(["Trust", "Society", "Section 8 Company"]),
+            "id_proof": "seeded",
+            "address_proof": "seeded",
+            "registration_status": "Approved" if rng.random() < 0.9 else "Applied",
+            "address": f"{rng.choice(DEFAULT_AREAS)}, {city}",
+            # Scattered up to ~15 km around the city centre; cities without a known centre get no coordinates.
+            "lat": round(center[0] + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG), 6) if center else None,
+            "lng": round(center[1] + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG), 6) if center else None,
+            "capacity_kg": float(rng.randrange(20, 501, 10)),
+            "accepted_food_types": ", ".join(rng.sample(food_names, 3)) if rng.random() < 0.3 else None,
+        }
+
+
+def donation_rows(
+    count: int,
+    first_user_id: int,
+    users: int,
+    first_ngo_id: int,
+    ngos: int,
+    anchor: datetime,
+    days: int,
+    donors: WeightedChoice,
+    cities: WeightedChoice,
+    statuses: WeightedChoice,
+    foods: WeightedChoice,
+    quantities: Dict[str, tuple],
+    ngo_only_share: float,
+    rng: random.Random
+) -> Iterator[dict]:
+    units = WeightedChoice({unit: spec[0] for unit, spec in quantities.items()})
+    for _ in range(count):
+        food = foods.draw(rng)
+        unit = units.draw(rng)
+        _, low, high = quantities[unit]
+        amount = rng.randint(int(low), int(high))
+        location = f"{rng.choice(DEFAULT_AREAS)}, {cities.draw(rng)}"
+        donation_status = statuses.draw(rng)
+        safety_hours = SAFETY_HOURS.get(food, 6)
+        if donation_status == "Available":
+            # Still inside its safety window, so it shows up in the feed.
+            created_at = anchor - timedelta(hours=rng.random() * safety_hours * 0.75)
+        else:
+            created_at = anchor - timedelta(days=rng.random() * days)
+        cooked_at = created_at - timedelta(minutes=rng.randint(0, 60))
+
+        claimed_by_user_id = None
+        claimed_by_ngo_id = None
+        claim_secret = None
+        otp_created_at = None
+        if donation_status in ("Claimed", "Completed"):
+            if ngos and rng.random() < 0.4:
+                claimed_by_ngo_id = first_ngo_id + rng.randrange(ngos)
+            else:
+                claimed_by_user_id = first_user_id + rng.randrange(users)
+            if donation_status == "Claimed":
+                claim_secret = f"{rng.randrange(10 ** 6):06d}"
+                otp_created_at = created_at + timedelta(minutes=rng.randint(1, 30))
+
+        yield {
+            "user_id": first_user_id + donors.draw(rng) - 1,
+            "raw_text": f"{amount} {unit} {food.lower()} at {location}",
+            "food": food,
+            "quantity": f"{amount} {unit}",
+            "location": location,
+            "safe_until": cooked_at + timedelta(hours=safety_hours),
+            "cooked_at": cooked_at,
+            "price": 0,
+            "status": donation_status,
+            "is_ngo_only": rng.random() < ngo_only_share,
+            "created_at": created_at,
+            "claimed_by_user_id": claimed_by_user_id,
+            "claimed_by_ngo_id": claimed_by_ngo_id,
+            "claim_secret": claim_secret,
+            "otp_created_at": otp_created_at,
+        }
+
+
+def seed_bulk(
+    users: int = 1000,
+    donations: int = 10000,
+    ngos: int = 100,
+    seed: int = 42,
+    prefix: str = "seed",
+    password: str = "Seed@123",
+    bcrypt_rounds: int = 12,
+    cities: Optional[Dict[str, float]] = None,
+    statuses: Optional[Dict[str, float]] = None,
+    foods: Optional[Dict[str, float]] = None,
+    quantities: Optional[Dict[str, tuple]] = None,
+    ngo_only_share: float = 0.15,
+    donor_skew: float = 1.0,
+    days: int = 365,
+    anchor: Optional[datetime] = None,
+    batch_size: int = 5000,
+    reset: bool = False
+) -> Dict[str, int]:
+    """Generate the dataset and return the number of rows inserted per table."""
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+        prepare_schema(engine)
+
+    with engine.connect() as conn:
+        if conn.execute(select(User.id).where(User.username == f"{prefix}_admin")).first():
+            raise ValueError(f"Accounts with prefix '{prefix}' already exist; use --reset or a different --prefix.")
+        first_user_id = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+        first_ngo_id = (conn.execute(select(func.max(NGO.id))).scalar() or 0) + 1
+
+    rng = random.Random(seed)
+    anchor = anchor or datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    password_hash = bcrypt.hashpw(normalize_password(password), bcrypt.gensalt(rounds=bcrypt_rounds)).decode("utf-8")
+    city_choice = WeightedChoice(cities or DEFAULT_CITIES)
+
+    started = time.perf_counter()
+    counts = {
+        "users": insert_batches(User, user_rows(users, prefix, password_hash, city_choice, rng), batch_size),
+        "ngos": insert_batches(NGO, ngo_rows(ngos, prefix, password_hash, city_choice, rng), batch_size),
+    }
+    logger.info("Inserted %s users and %s NGOs in %.1fs", counts["users"], counts["ngos"], time.perf_counter() - started)
+
+    if donations and users:
+        started = time.perf_counter()
+        counts["donations"] = insert_batches(Donation, donation_rows(
+            donations, first_user_id, users, first_ngo_id, ngos, anchor, days,
+            donor_weights(users, donor_skew),
+            city_choice,
+            WeightedChoice(statuses or DEFAULT_STATUSES),
+            WeightedChoice(foods or DEFAULT_FOODS),
+            quantities or DEFAULT_QUANTITIES,
+            ngo_only_share,
+            rng
+        ), batch_size)
+        elapsed = time.perf_counter() - started
+        logger.info("Inserted %s donations in %.1fs (%.0f rows/s)", counts["donations"], elapsed, counts["donations"] / max(elapsed, 1e-9))
+
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            rebuild_impact_rollups(db)
+        finally:
+            db.close()
+        logger.info("Rebuilt impact rollups in %.1fs", time.perf_counter() - started)
+    # The importing process (e.g. the load test) already built its NGO index from the empty table.
+    rebuild_ngo_index()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--donations", type=int, default=10000)
+    parser.add_argument("--ngos", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="seed", help="username/email prefix for generated accounts")
+    parser.add_argument("--password", default="Seed@123", help="password shared by every generated account")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="cost of the shared hash (lower = faster logins)")
+    parser.add_argument("--cities", type=parse_weights, help='weighted cities, e.g. "Pune:3,Mumbai:2"')
+    parser.add_argument("--statuses", type=parse_weights, help='weighted statuses, e.g. "Available:10,Completed:60,Expired:30"')
+    parser.add_argument("--foods", type=parse_weights, help='weighted food names, e.g. "Rice:5,Dal:5,Roti:3"')
+    parser.add_argument("--ngo-only-share", type=float, default=0.15)
+    parser.add_argument("--donor-skew", type=float, default=1.0, help="Zipf exponent for donations per user (0 = uniform)")
+    parser.add_argument("--days", type=int, default=365, help="history window for non-available donations")
+    parser.add_argument("--anchor", type=datetime.fromisoformat, help="'now' for generated timestamps (default: current UTC hour)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = seed_bulk(
+        users=args.users,
+        donations=args.donations,
+        ngos=args.ngos,
+        seed=args.seed,
+        prefix=args.prefix,
+        password=args.password,
+        bcrypt_rounds=args.bcrypt_rounds,
+        cities=args.cities,
+        statuses=args.statuses,
+        foods=args.foods,
+        ngo_only_share=args.ngo_only_share,
+        donor_skew=args.donor_skew,
+        days=args.days,
+        anchor=args.anchor,
+        batch_size=args.batch_size,
+        reset=args.reset
+    )
+    logger.info("Bulk seeding completed in %.1fs: %s", time.perf_counter() - started, counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from main import SessionLocal, User, NGO, Donation, hash_password, Base, engine
 import logging
+from datetime import datetime
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -73,8 +74,8 @@ def seed_data():
                 status="Available",
                 is_ngo_only=False,
                 price=0,
-                safe_until="2026-01-10T20:00:00", # Manually set for seed
-                cooked_at="2026-01-10T14:00:00"
+                safe_until=datetime(2026, 1, 10, 20, 0), # Manually set for seed
+                cooked_at=datetime(2026, 1, 10, 14, 0)
             )
             session.add(donation)
             logger.info("Test donation created.")